@@ -9,7 +9,151 @@ See help on the PMF class for more information.
 import numpy
 from series import *
 
-class PMF:
+def uniformSampler(rng=None):
+   ''' Returns a function of an optional size that draws uniformly from
+       [0,1) using rng.  rng may be a numpy.random.Generator, a
+       numpy.random.RandomState or None for numpy.random. '''
+   if rng is None:
+      rng = numpy.random
+   # Generator objects only provide random(), older interfaces provide
+   # random_sample().
+   try:
+      return rng.random_sample
+   except AttributeError:
+      return rng.random
+
+def latticeOffset(values):
+   ''' Returns values[0] as an integer if values are consecutive integers
+       in increasing order, or None otherwise. '''
+   if len(values) == 0 or values[0] != numpy.floor(values[0]):
+      return None
+   if not numpy.all(numpy.diff(values) == 1):
+      return None
+   return int(values[0])
+
+def isScalar(value):
+   ''' Returns True if value is a real constant rather than a
+       distribution. '''
+   return isinstance(value, (int, long, float, numpy.integer, numpy.floating))
+
+def isPoolDescription(description, length=2):
+   ''' Returns True if description is a tuple or list of length integers,
+       such as the [X, Y] of a pool, rather than a distribution. '''
+   if not isinstance(description, (tuple, list)) or len(description) != length:
+      return False
+   for value in description:
+      if not isinstance(value, (int, long, numpy.integer)):
+         return False
+   return True
+
+def familyTable(pmfs):
+   ''' Returns the PMF objects pmfs as one 2-D array.  Row 0 holds the
+       sorted union of their values and row i holds the probabilities of
+       pmfs[i-1] over it, with zeros where it has no such value. '''
+   values = numpy.unique(numpy.concatenate([pmf.getDistribution(0) for pmf in pmfs]))
+   table = numpy.zeros( (len(pmfs)+1, len(values)) )
+   table[0,:] = values
+   for i, pmf in enumerate(pmfs):
+      offset, pvalues, probs = pmf.getStorage()
+      if pvalues is None and len(values) == values[-1] - values[0] + 1:
+         # On an all integer support lattices occupy a contiguous run.
+         start = numpy.searchsorted(values, offset)
+         table[i+1,start:start+len(probs)] = probs
+      else:
+         table[i+1,numpy.searchsorted(values, pmf.getDistribution(0))] = probs
+   return table
+
+def familyMoment(table, k=1):
+   ''' Returns the moments of order k of every row of a family table, as
+       from familyTable(), in one product.  Entry i is the moment of row
+       i+1. '''
+   return numpy.dot(table[1:,:], table[0,:]**k)
+
+def comparisonMatrix(pmfs, op='<', tile=256):
+   ''' Returns the matrix of op between every pair of the PMF objects
+       pmfs, where entry [i,j] is pmfs[i] op pmfs[j] as the comparison
+       operators compute it.  op is one of '<', '<=', '>', '>=', '==' and
+       '!='.  Values within the largest error of pmfs are equal.
+
+       The PMFs are aligned once by familyTable() and each block of tile
+       rows is computed from their CDFs by matrix products, so only a
+       tile by len(pmfs) block is built at a time besides the result. '''
+   table = familyTable(pmfs)
+   error = max([pmf.error for pmf in pmfs])
+   return compareTable(table, op, error, tile)
+
+def compareTable(table, op, error, tile=256, start=0, stop=None, out=None):
+   ''' Returns rows start to stop of the comparison matrix of the rows of
+       a family table, as comparisonMatrix() computes it, with values
+       within error taken as equal.  The rows are written into out when
+       it is given, an array of stop-start rows, so they may be computed
+       in pieces. '''
+   if op not in ('<', '<=', '>', '>=', '==', '!='):
+      raise ValueError('Unknown comparison operator: %s' %(op))
+   values = table[0,:]
+   probs = table[1:,:]
+   n = len(probs)
+   if stop is None:
+      stop = n
+   if out is None:
+      out = numpy.empty( (stop-start, n) )
+
+   # Column v of cdfs holds the probability of values before v, so
+   # cdfs[:,hi] - cdfs[:,lo] is the probability of values lo to hi-1.
+   cdfs = numpy.zeros( (n, len(values)+1) )
+   numpy.cumsum(probs, axis=1, out=cdfs[:,1:])
+   # Truncated distributions may total slightly less than 1.
+   totals = cdfs[:,-1]
+
+   # P(A < B) is the probability of A on each value times the probability
+   # of B above it.  P(A > B) is the same with the roles swapped.
+   above = totals[:,numpy.newaxis] - cdfs[:,1:]
+   if op in ('==', '!=', '<=', '>='):
+      # Every value within error of v compares equal to v, and these form
+      # a contiguous run of the sorted support.
+      lo = numpy.searchsorted(values, values - error, side='left')
+      hi = numpy.searchsorted(values, values + error, side='right')
+      window = cdfs[:,hi] - cdfs[:,lo]
+
+   for first in range(start, stop, tile):
+      rows = slice(first, min(first+tile, stop))
+      if op in ('<', '<='):
+         block = numpy.dot(probs[rows], above.T)
+      elif op in ('>', '>='):
+         block = numpy.dot(above[rows], probs.T)
+      else:
+         block = numpy.zeros( (rows.stop-rows.start, n) )
+      if op in ('==', '!=', '<=', '>='):
+         block += numpy.dot(probs[rows], window.T)
+      if op == '!=':
+         block = 1.0 - block
+      out[rows.start-start:rows.stop-start] = block
+   return out
+
+def computeCumulants(values, probs):
+   ''' Returns the first four cumulants of the distribution of values
+       with probabilities probs as an array.  Like PMF.moment(), the
+       probabilities are not renormalized. '''
+   mean = numpy.dot(values, probs)
+   # Central moments are taken about the mean to avoid cancellation.
+   centred = values - mean
+   squares = centred * centred
+   mu2 = numpy.dot(squares, probs)
+   mu3 = numpy.dot(squares * centred, probs)
+   mu4 = numpy.dot(squares * squares, probs)
+   return numpy.array([mean, mu2, mu3, mu4 - 3.0 * mu2 * mu2])
+
+def cumulantStatistics(cumulants):
+   ''' Returns (mean, variance, skewness, kurtosis) from the first four
+       cumulants.  The kurtosis is the excess kurtosis, zero for a normal
+       distribution.  Skewness and kurtosis are nan without variance. '''
+   mean, variance, k3, k4 = cumulants
+   with numpy.errstate(divide='ignore', invalid='ignore'):
+      skewness = numpy.float64(k3) / variance ** 1.5
+      kurtosis = numpy.float64(k4) / variance ** 2
+   return mean, variance, skewness, kurtosis
+
+class PMF(object):
    ''' Represents a discrete probability mass function.
 
        Allows direct sampling from the distribution, calculation of
@@ -20,6 +164,34 @@ class PMF:
    # Think of this as a minimum precision requirement.
    error = 1e-5
 
+   # Largest total probability that pruneTails() may drop from the results
+   # of arithmetic, as a fraction of error, such as 0.1.  None disables
+   # pruning.
+   prunefraction = None
+
+   # Number of operands, such as pools built from [X, Y], whose sums,
+   # highests and lowests may drop probability without the total dropped
+   # exceeding the bound.  See pruneTails().
+   pruneoperands = 64
+
+   # Probability dropped by pruneTails() from this distribution and the
+   # operands it was built from, and the number of those operands.
+   dropped = 0.0
+   operands = 1
+
+   # Cache of generated distributions, such as cache.pools, for subclasses
+   # that build distributions from a description with genDistribution.
+   # None disables caching.
+   poolcache = None
+
+   # Storage of the distribution.  When the values are consecutive
+   # integers, only the first value, offset, and the probability vector,
+   # probs, are stored and values is None.  Otherwise values holds the
+   # values and offset is None.  The 2xN distribution is built on demand.
+   offset = None
+   values = None
+   probs = None
+
    def __init__(self, distribution):
       '''
       Instantiate a discrete PMF.  Distribution is expected to be
@@ -33,15 +205,120 @@ class PMF:
 
       self.distribution = self.castToDistribution(distribution)
 
+   @classmethod
+   def fromTrusted(cls, distribution, error=None):
+      ''' Builds an object of this class around distribution, a 2xN array
+          of floats that is valid by construction, such as the result of
+          arithmetic on other PMFs.  The array is used without validation
+          or numpy.matrix casts.  User input should go through the
+          constructor instead. '''
+      pmf = cls.__new__(cls)
+      if error is not None:
+         pmf.error = error
+      # Subclasses that regenerate from their description keep the
+      # distribution they were given.
+      pmf.description = None
+      pmf.distribution = distribution
+      return pmf
+
+   @classmethod
+   def fromStorage(cls, storage, error=None):
+      ''' Builds an object of this class, as fromTrusted() does, from the
+          stored form of a distribution as returned by getStorage().  The
+          arrays are used without copies. '''
+      pmf = cls.__new__(cls)
+      if error is not None:
+         pmf.error = error
+      pmf.description = None
+      pmf.setStorage(storage)
+      return pmf
+
+   @classmethod
+   def fromLattice(cls, offset, probs, error=None):
+      ''' Builds an object of this class, as fromTrusted() does, over the
+          consecutive integer values offset, offset+1, ... with the
+          probability vector probs.  probs is used without copies. '''
+      return cls.fromStorage( (offset, None, probs), error )
+
+   @classmethod
+   def fromSupport(cls, values, probs, error=None):
+      ''' Builds an object of this class, as fromTrusted() does, over the
+          sorted values with the probability vector probs.  Consecutive
+          integer values are stored as a lattice, other values are stored
+          as they are.  The arrays are used without copies. '''
+      offset = latticeOffset(values)
+      if offset is not None:
+         return cls.fromLattice(offset, probs, error)
+      return cls.fromStorage( (None, values, probs), error )
+
+   @classmethod
+   def fromFamily(cls, table, X, error=None):
+      ''' Builds an object of this class, as fromTrusted() does, from row
+          X of a family table such as XdY.family() returns.  The zero
+          probabilities padding either end of the row are left out.  The
+          arrays are views of the table. '''
+      nonzero = numpy.flatnonzero(table[X,:])
+      if len(nonzero) == 0:
+         raise ValueError('Row %d of the family table is empty' %(X))
+      lo, hi = nonzero[0], nonzero[-1] + 1
+      return cls.fromSupport(table[0,lo:hi], table[X,lo:hi], error)
+
    def moment(self,k):
       ''' Calculate sample moment of order k; useful in
-          estimating distribution parameters. '''
-      return numpy.dot( self.getDistribution(0)**k, self.getDistribution(1) )
+          estimating distribution parameters.  Moments are cached with
+          the distribution. '''
+      return self.getCached('moment%s' % (k,),
+         lambda: numpy.dot( self.getDistribution(0)**k, self.getDistribution(1) ))
+
+   def getCumulants(self):
+      ''' Returns the first four cumulants of the distribution as an
+          array.  They are cached with the distribution.  Whole pools
+          built from [X, Y], such as XdY and XhY, and their sums know them
+          without a pass over the distribution. '''
+      return self.getCached('cumulants',
+         lambda: computeCumulants(self.getDistribution(0), self.getDistribution(1)))
+
+   def getStatistics(self):
+      ''' Returns (mean, variance, skewness, kurtosis) of the
+          distribution, as cumulantStatistics() does. '''
+      return cumulantStatistics(self.getCumulants())
+
+   @classmethod
+   def poolStatistics(cls, X, Y):
+      ''' Returns (mean, variance, skewness, kurtosis) of the pool of X
+          dice with Y faces, for subclasses that define poolCumulants(),
+          without building the distribution. '''
+      return cumulantStatistics(cls.poolCumulants(X, Y))
+
+   def knownCumulants(self):
+      ''' Returns the cumulants if they are already cached, or None.  They
+          are only carried to sums, shifts and scales of distributions
+          that total 1; the cumulants of a truncated or pruned
+          distribution, which are not renormalized, do not transform
+          that way, so None is returned for those. '''
+      cumulants = self.peekCached('cumulants')
+      if cumulants is None or abs(numpy.sum(self.probs) - 1.0) > 1e-12 * len(self.probs):
+         return None
+      return cumulants
 
    def EV(self):
       ''' Calculates the Expected Value by finding the first moment. '''
       return self.moment(1)
 
+   def castOperand(self, other, operation):
+      ''' Returns other as a PMF for use in the operation named by
+          operation.  PMF objects are valid by construction and are
+          returned as they are.  Anything else is validated and "cast". '''
+      if isinstance(other, PMF):
+         return other
+      if not self.validateDistribution(other):
+          raise TypeError('Invalid distribution for %s: %s' %(operation, self.validationError))
+      return PMF.fromTrusted(self.castToDistribution(other), self.error)
+
+   def combinedError(self, other):
+      ''' Returns the larger of the error values of this PMF and other. '''
+      return max(self.error, other.error)
+
    def getError(self):
       ''' Return the internal maximal error value as a singleton
           real number. '''
@@ -52,18 +329,175 @@ class PMF:
           real number specified by the argument error. '''
       self.error = error
 
+   def getDropped(self):
+      ''' Return the total probability dropped by pruning the tails of
+          this distribution and of the operands it was built from. '''
+      return self.dropped
+
+   def getPruneBound(self):
+      ''' Return the largest total probability pruning may drop, or None
+          if pruning is disabled. '''
+      if not self.prunefraction:
+         return None
+      return self.error * self.prunefraction
+
+   def pruneTails(self, inherited=0.0, operands=2):
+      ''' Trims the tails of this distribution, a new result of arithmetic
+          on operands leaf operands that had already dropped inherited
+          probability, and records the total dropped.  A result of n
+          operands drops at most (n-1)/(pruneoperands-1) of
+          getPruneBound() in all, split between the two tails.  That
+          holds by induction whatever the shape of the expression, as in
+          (a+b)+(c+d), since the two sides of every operation together
+          hold n-2 shares.  So any expression of up to pruneoperands
+          operands drops no more than the bound.  Results of more
+          operands are not pruned, but the parts they are built from may
+          each have dropped up to the bound, so raise pruneoperands for
+          larger expressions.  Returns this object. '''
+      self.dropped = inherited
+      self.operands = operands
+      bound = self.getPruneBound()
+      if bound is None or operands > self.pruneoperands:
+         return self
+      share = (operands - 1) / float(self.pruneoperands - 1)
+      if bound * share <= inherited:
+         return self
+      allowance = (bound * share - inherited) / 2.0
+
+      # Results of arithmetic hold sorted values.  Find the longest run at
+      # each end holding no more than the allowance.
+      probs = self.probs
+      head = numpy.cumsum(probs)
+      tail = numpy.cumsum(probs[::-1])
+      lo = numpy.searchsorted(head, allowance, side='right')
+      hi = len(probs) - numpy.searchsorted(tail, allowance, side='right')
+      if lo == 0 and hi == len(probs) or lo >= hi:
+         return self
+      if lo > 0:
+         self.dropped += head[lo-1]
+      if hi < len(probs):
+         self.dropped += tail[len(probs)-hi-1]
+
+      # Slicing keeps views of the arrays.
+      if self.values is None:
+         self.setStorage( (self.offset + lo, None, probs[lo:hi]) )
+      else:
+         self.setStorage( (None, self.values[lo:hi], probs[lo:hi]) )
+      return self
+
    def getDistribution(self, row=None, col=None):
       ''' Safer way to return a copy of the distribution, specifically
-          in the case of infinite distributions. '''
+          in the case of infinite distributions.  The values and
+          probabilities rows are returned without building the whole
+          2xN array. '''
+      if row in (0, -2):
+         if self.values is None and isinstance(col, (int, long, numpy.integer)):
+            # A single lattice value needs no array at all.
+            n = len(self.probs)
+            if not -n <= col < n:
+               raise IndexError('index %d is out of bounds for size %d' % (col, n))
+            return float(self.offset + col % n)
+         values = self.getValues()
+         return values if col is None else values[col]
+      if row in (1, -1):
+         return self.probs if col is None else self.probs[col]
+      distribution = numpy.array([self.getValues(), self.probs])
       if row is None and col is None:
-         return self.distribution
+         return distribution
       if col is None:
          # first if check precludes row from being None
-         return self.distribution[row,:]
+         return distribution[row,:]
       if row is None:
          # first if check precludes col from being None
-         return self.distribution[:,col]
-      return self.distribution[row,col]
+         return distribution[:,col]
+      return distribution[row,col]
+
+   def getValues(self):
+      ''' Returns the values of the distribution as an array. '''
+      if self.values is not None:
+         return self.values
+      return numpy.arange(len(self.probs), dtype=float) + self.offset
+
+   def storeDistribution(self, distribution):
+      ''' Stores a 2xN distribution array.  Consecutive integer values
+          are reduced to their offset so only the probabilities are kept. '''
+      values = distribution[0,:]
+      offset = latticeOffset(values)
+      if offset is None:
+         self.setStorage( (None, values, distribution[1,:]) )
+      else:
+         # Copy the probabilities so the 2xN array can be released.
+         self.setStorage( (offset, None, numpy.array(distribution[1,:])) )
+
+   # The 2xN distribution, built from and stored into the compact form.
+   distribution = property(getDistribution, storeDistribution)
+
+   def getStorage(self):
+      ''' Returns the stored form of the distribution as the tuple
+          (offset, values, probs).  Exactly one of offset and values is
+          None. '''
+      return (self.offset, self.values, self.probs)
+
+   def setStorage(self, storage):
+      ''' Replaces the distribution with the stored form storage, a
+          tuple (offset, values, probs) as returned by getStorage(). '''
+      self.offset, self.values, self.probs = storage
+
+   def getLattice(self):
+      ''' Returns the distribution as (offset, probs) over consecutive
+          integers starting at offset.  Integer values with gaps are filled
+          with zero probability.  Raises TypeError for non-integer values. '''
+      if self.offset is not None:
+         return self.offset, self.probs
+      values = self.values
+      if numpy.any(values != numpy.floor(values)):
+         raise TypeError('Distribution values are not integers')
+      offset = int(numpy.min(values))
+      probs = numpy.bincount((values - offset).astype(int), weights=self.probs)
+      return offset, probs
+
+   def genCachedStorage(self, X, Y, *params):
+      ''' Returns the stored form, as from getStorage(), of the
+          distribution that genDistribution(X, Y, *params) builds for this
+          class and error.  It comes from poolcache when it holds one, and
+          is otherwise generated and stored there.  Cached arrays are
+          read-only. '''
+      key = (self.__class__, X, Y, self.error) + params
+      if self.poolcache is not None:
+         storage = self.poolcache.get(key)
+         if storage is not None:
+            return storage
+
+      # Generated distributions are valid by construction.
+      storage = self.genDistribution(X, Y, *params).getStorage()
+
+      if self.poolcache is not None:
+         self.poolcache.store(key, storage)
+      return storage
+
+   def getSortedDistribution(self):
+      ''' Returns the values and probabilities of the distribution as
+          two arrays ordered by increasing value.  The result is cached
+          with the distribution and should not be modified. '''
+      return self.getCached('sorted', self.sortDistribution)
+
+   def sortDistribution(self):
+      ''' Sorts the values and probabilities of the distribution by value
+          and returns them as two arrays. '''
+      if self.offset is not None:
+         # Lattices are already in order.
+         return self.getValues(), self.probs
+      values = self.getDistribution(0)
+      probs = self.getDistribution(1)
+      order = numpy.argsort(values, kind='mergesort')
+      return values[order], probs[order]
+
+   def getCDFAt(self, values):
+      ''' Returns the probability that a sample is less than or equal to
+          each of the given values. '''
+      svalues, sprobs = self.getSortedDistribution()
+      cdf = numpy.concatenate(([0.0], numpy.cumsum(sprobs)))
+      return cdf[numpy.searchsorted(svalues, values, side='right')]
 
    def castToDistribution(self, dist):
       ''' Method to convert input into internal array format. '''
@@ -76,7 +510,10 @@ class PMF:
 
       # "Cast" to a numpy matrix, as it is more flexible with inputs.
       # Then "cast" to numpy array, as it is better for calculations.
-      dist = numpy.array(numpy.matrix(dist)).squeeze()
+      # A 2x1 distribution of a single point keeps both of its rows.
+      dist = numpy.array(numpy.matrix(dist))
+      if dist.shape[0] != 2:
+         dist = dist.squeeze()
 
       # Check for singleton value.  Cast this to a PMF with a single
       # value with unity chance of occurence.
@@ -146,61 +583,56 @@ class PMF:
    def __len__(self):
       ''' Return length as a number of values N.  The distribution is
           of size 2xN. '''
-      return len(self[1,:])
+      return len(self.probs)
 
    def __getitem__(self,key):
-      ''' Pass along slice to the distribution and return that. '''
+      ''' Pass along slice to the distribution and return that.  A single
+          row is indexed without building the whole distribution. '''
+      if isinstance(key, tuple) and len(key) == 2 and \
+            isinstance(key[0], (int, long, numpy.integer)):
+         return self.getDistribution(key[0], key[1])
       return self.getDistribution().__getitem__(key)
 
    def __lt__(self, other):
       ''' Return the probability that a random sample from this
           distribution is less than a random sample from the other
           distribution. '''
-      # First, make sure other can be compared properly.  
-      if not self.validateDistribution(other):
-          raise TypeError('Invalid distribution for comparison: %s' %(self.validationError))
-
-      # "cast" into a friendly format
-      other = self.__class__(other)
-
-      # Use slow O(NM) ~ O(N^2) algorithm to compare and calculate.
-      cumsum = 0.0
-      for i in range(0,len(self)):
-         for j in range(0,len(other)):
-            # For each element, compare if the value is less in this
-            # distribution than the other.  If it is, accumulate the
-            # probability of those two events occurring together.
-            if self[0,i] < other[0,j]:
-               cumsum += (self[1,i]*other[1,j])
-
-      # The probability that this distribution is less than the other
-      # has been calculated.  Return it.
-      return cumsum
+      # First, make sure other can be compared properly.
+      other = self.castOperand(other, 'comparison')
+
+      # Sort both supports and accumulate the other distribution so that
+      # each value in this distribution finds, by binary search, the total
+      # probability of the other distribution lying strictly above it.
+      # This is O((N+M) log(N+M)) rather than comparing every pair.
+      avalues, aprobs = self.getSortedDistribution()
+      bvalues, bprobs = other.getSortedDistribution()
+      bcdf = numpy.concatenate(([0.0], numpy.cumsum(bprobs)))
+      idx = numpy.searchsorted(bvalues, avalues, side='right')
+
+      # Accumulate the probability of each value in this distribution
+      # occurring together with a larger value in the other distribution.
+      return numpy.dot(aprobs, bcdf[-1] - bcdf[idx])
 
    def __eq__(self, other):
       ''' Return the probability that a random sample from this
           distribution is equal to a random sample from the other
           distribution. '''
-      # First, make sure other can be compared properly.  
-      if not self.validateDistribution(other):
-          raise TypeError('Invalid distribution for comparison: %s' %(self.validationError))
-
-      # "cast" into a friendly format
-      other = self.__class__(other)
-
-      # Use slow O(NM) ~ O(N^2) algorithm to compare and calculate.
-      cumsum = 0.0
-      for i in range(0,len(self)):
-         for j in range(0,len(other)):
-            # For each element, compare if the value is equal in this
-            # distribution to the other.  If it is, accumulate the
-            # probability of those two events occurring together.
-            if numpy.abs(self[0,i] - other[0,j]) <= self.error:
-               cumsum += (self[1,i]*other[1,j])
-
-      # The probability that this distribution is less than the other
-      # has been calculated.  Return it.
-      return cumsum
+      # First, make sure other can be compared properly.
+      other = self.castOperand(other, 'comparison')
+
+      # Sort both supports and accumulate the other distribution.  The
+      # values of the other distribution within error of a value in this
+      # distribution form a contiguous run of the sorted support, so the
+      # probability of that run is a difference of cumulative sums.
+      avalues, aprobs = self.getSortedDistribution()
+      bvalues, bprobs = other.getSortedDistribution()
+      bcdf = numpy.concatenate(([0.0], numpy.cumsum(bprobs)))
+      lo = numpy.searchsorted(bvalues, avalues - self.error, side='left')
+      hi = numpy.searchsorted(bvalues, avalues + self.error, side='right')
+
+      # Accumulate the probability of each value in this distribution
+      # occurring together with an equal value in the other distribution.
+      return numpy.dot(aprobs, bcdf[hi] - bcdf[lo])
 
    def __le__(self, other):
       ''' Return the probability that a random sample from this
@@ -226,11 +658,11 @@ class PMF:
       # less than is already implemented, so use it instead.
 
       # First, have to make sure other will use the proper < function.
-      if not self.validateDistribution(other):
-          raise TypeError('Invalid distribution for comparison: %s' %(self.validationError))
-      other = self.__class__(other)
+      # Call it directly, since the < operator would try the reflected
+      # __gt__ of this object first when it is of a subclass of other.
+      other = self.castOperand(other, 'comparison')
 
-      return (other < self)
+      return other.__lt__(self)
 
    def __ge__(self, other):
       ''' Return the probability that a random sample from this
@@ -241,42 +673,193 @@ class PMF:
       # of less than or equal to.
       return ( (self > other) + (self == other) )
 
+   def __add__(self, other):
+      ''' Adding a constant shifts the support of the distribution.
+          Distributions are added by subclasses such as XdY. '''
+      if not isScalar(other):
+         return NotImplemented
+      return self.shift(other)
+
+   def __radd__(self, other):
+      ''' Reverse add acts just as normal add. '''
+      return self.__add__(other)
+
+   def __sub__(self, other):
+      ''' Subtraction adds the negation of other. '''
+      return self + (-other)
+
+   def __rsub__(self, other):
+      ''' Reverse subtraction adds other to the negation of this
+          distribution. '''
+      return (-self) + other
+
+   def __mul__(self, other):
+      ''' Multiplying by a constant scales the support of the
+          distribution. '''
+      if not isScalar(other):
+         return NotImplemented
+      return self.scale(other)
+
+   def __rmul__(self, other):
+      ''' Reverse multiply acts just as normal multiply. '''
+      return self.__mul__(other)
+
+   def __neg__(self):
+      ''' Negation reflects the support of the distribution. '''
+      return self.scale(-1)
+
+   def shift(self, c):
+      ''' Returns the distribution of this random variable plus the
+          constant c, as an object of the same class.  Only the support
+          moves, so no convolution is needed.  Lattices shifted by an
+          integer share their probabilities and change only their offset. '''
+      if self.offset is not None and c == numpy.floor(c):
+         pmf = self.fromLattice(self.offset + int(c), self.probs, self.error)
+      else:
+         pmf = self.fromStorage( (None, self.getValues() + c, self.probs), self.error )
+      pmf.dropped = self.dropped
+      pmf.operands = self.operands
+      # Shifting moves only the mean.
+      cumulants = self.knownCumulants()
+      if cumulants is not None:
+         cumulants = cumulants + [c, 0, 0, 0]
+         pmf.getCached('cumulants', lambda: cumulants)
+      return pmf
+
+   def scale(self, k):
+      ''' Returns the distribution of this random variable times the
+          constant k, as an object of the same class.  Only the support
+          is transformed, so no convolution is needed. '''
+      if k == 0:
+         # Every value collapses onto zero.
+         pmf = self.fromLattice(0, numpy.array([numpy.sum(self.probs)]), self.error)
+      elif self.offset is not None and k == 1:
+         pmf = self.fromLattice(self.offset, self.probs, self.error)
+      elif self.offset is not None and k == -1:
+         # A reflected lattice is a lattice with its probabilities reversed.
+         offset = -(self.offset + len(self.probs) - 1)
+         pmf = self.fromLattice(offset, self.probs[::-1], self.error)
+      else:
+         pmf = self.fromStorage( (None, self.getValues() * k, self.probs), self.error )
+      pmf.dropped = self.dropped
+      pmf.operands = self.operands
+      # Cumulant n scales by k**n.
+      cumulants = self.knownCumulants()
+      if cumulants is not None:
+         cumulants = cumulants * float(k) ** numpy.arange(1,5)
+         pmf.getCached('cumulants', lambda: cumulants)
+      return pmf
+
    def __hash__(self):
       ''' Returns hash code value for this object. (Cannot perform, raises error)'''
       raise TypeError('PMF objects are unhashable')
 
-   def getSample(self):
-      ''' Returns a random sample from the distribution. '''
-      # Current method:
-      # Sample from a denser uniform distribution and map it to the CDF of
-      # this PMF with a 1:1 outcome.
-
-      # Determine how many values are required of the uniform distribution
-      # to be more dense.
-      # Find the minimum difference between probabilities and square it.
-      absmin = numpy.min(self[1,:])
-      relmin = numpy.min(numpy.diff(self[1,:]))
-      # For uniform distributions, relmin will be 0.  In this case, use
-      # the absmin.  Otherwise use the minimum of the two.
-      if relmin == 0:
-         realmin = absmin
+   def getCached(self, name, build):
+      ''' Returns a quantity derived from the distribution, such as its
+          CDF, stored under name.  build() is called to compute it the
+          first time, and again whenever the distribution is replaced. '''
+      cache = self.getCache()
+      if name not in cache:
+         cache[name] = build()
+      return cache[name]
+
+   def peekCached(self, name):
+      ''' Returns the quantity stored under name by getCached() if it is
+          there and current, or None. '''
+      return self.getCache().get(name)
+
+   def getCache(self):
+      ''' Returns the dictionary of quantities derived from the current
+          distribution, emptied first if the distribution was replaced. '''
+      try:
+         cache = self.cache
+      except AttributeError:
+         cache = self.cache = {}
+      # The cache belongs to the storage it was computed from.  Shifted
+      # copies may share probabilities but differ in offset.
+      storage = cache.get('storage')
+      if storage is None or storage[0] != self.offset or \
+            storage[1] is not self.values or storage[2] is not self.probs:
+         cache.clear()
+         cache['storage'] = self.getStorage()
+      return cache
+
+   def getCDF(self):
+      ''' Returns the cumulative sum of the probabilities in the order the
+          values are stored.  The result is cached with the distribution. '''
+      return self.getCached('cdf', lambda: numpy.cumsum(self.getDistribution(1)))
+
+   def getSample(self, n=None, rng=None):
+      ''' Returns a random sample from the distribution.  If n is given,
+          returns an array of n independent samples instead.  rng may be a
+          seeded numpy.random.Generator or numpy.random.RandomState to make
+          the draws reproducible; numpy.random is used by default. '''
+      uniform = uniformSampler(rng)
+
+      # Sample the uniform distribution on [0,total) and map each draw back
+      # through the CDF of this PMF.  The total may fall short of 1 for
+      # truncated distributions.  Searching to the right skips values of
+      # zero probability.
+      myCDF = self.getCDF()
+      if n is None:
+         unisample = uniform() * myCDF[-1]
       else:
-         realmin = min([absmin, relmin])
-      elements = numpy.ceil((1.0/realmin)**2)
-
-      # Sample from uniform distribution in integer range of (0,elements]
-      # where each integer has a probability of 1/elements.
-      unisample = numpy.random.randint(0,elements)+1
-      # Convert sample to the CDF probability of that sample being drawn.
-      unisample = unisample / elements
-      # unisample now lies on (0,1].
-      # Now consider a CDF for this distribution.  unisample represents
-      # the output, map it back to the input.
-      myCDF = numpy.cumsum(self[1,:])
-      minidx = numpy.min(numpy.nonzero(myCDF >= unisample))
-      # minidx is the index of the smallest probability that is greater than
-      # the unisample.  The corresponding value is the desired value.
-      return self[0,minidx]
+         unisample = uniform(n) * myCDF[-1]
+      idx = numpy.searchsorted(myCDF, unisample, side='right')
+      return self.getDistribution(0)[idx]
+
+   def getAliasTable(self):
+      ''' Returns the Walker alias table (threshold, alias) for the
+          distribution.  It is built with Vose's method on first use and
+          cached with the distribution. '''
+      return self.getCached('alias', self.buildAliasTable)
+
+   def buildAliasTable(self):
+      ''' Builds a Walker alias table using Vose's method.  Column i is
+          kept with probability threshold[i] and otherwise replaced by
+          column alias[i]. '''
+      probs = self.getDistribution(1)
+      N = len(probs)
+      # Scale so that the average column holds exactly 1.
+      scaled = list(probs * N / numpy.sum(probs))
+      threshold = numpy.ones(N)
+      alias = numpy.arange(N)
+
+      small = [i for i in range(0,N) if scaled[i] < 1.0]
+      large = [i for i in range(0,N) if scaled[i] >= 1.0]
+      while small and large:
+         # Fill the remainder of a small column from a large one.
+         s = small.pop()
+         l = large.pop()
+         threshold[s] = scaled[s]
+         alias[s] = l
+         scaled[l] = scaled[l] + scaled[s] - 1.0
+         if scaled[l] < 1.0:
+            small.append(l)
+         else:
+            large.append(l)
+      # Anything left over is 1 up to round-off and keeps its threshold of 1.
+      return threshold, alias
+
+   def getAliasSample(self, n=None, rng=None):
+      ''' Returns a random sample from the distribution in constant time
+          per draw using the alias table.  n and rng behave as they do
+          for getSample(). '''
+      uniform = uniformSampler(rng)
+      threshold, alias = self.getAliasTable()
+      N = len(threshold)
+
+      # Pick a column uniformly, then keep it or take its alias.
+      column = numpy.minimum(numpy.floor(uniform(n) * N).astype(int), N-1)
+      keep = uniform(n) < threshold[column]
+      idx = numpy.where(keep, column, alias[column])
+      return self.getDistribution(0)[idx]
+
+   def iterSamples(self, chunk=65536, rng=None):
+      ''' Endless generator of arrays holding chunk samples each, drawn
+          with the alias table.  Useful for streaming simulations. '''
+      while True:
+         yield self.getAliasSample(chunk, rng)
 
 
 # Example usage
@@ -307,14 +890,10 @@ if __name__ == "__main__":
 
    # Draw from the distribution and tally results.
    trials = 500
-   tally = numpy.array([0,0,0,0])
-   for i in range(0,trials):
-      drawvalue = test2.getSample()
-      # drawvalue is 1 to 4 inclusive
-      # corresponding index in tally is 0 to 3 inclusive
-      index = int(drawvalue - 1)
-      # increment the appropriate index
-      tally[index] = tally[index] + 1
+   draws = test2.getSample(trials)
+   # draws are 1 to 4 inclusive
+   # corresponding index in tally is 0 to 3 inclusive
+   tally = numpy.bincount(draws.astype(int) - 1, minlength=4)
    # Calculate percentage for each draw
    tally = tally / float(trials)
    print "tally should be approximately 0.25 for each value: "
@@ -332,11 +911,9 @@ if __name__ == "__main__":
 
    # Draw from the distribution and tally results.
    trials = 1000
-   index = {10.0: 0, 25.0: 1, 50.0: 2, 99.0: 3}
-   tally = numpy.array([0,0,0,0])
-   for i in range(0,trials):
-      drawvalue = test3.getSample()
-      tally[index[drawvalue]] = tally[index[drawvalue]] + 1
+   values = [10.0, 25.0, 50.0, 99.0]
+   draws = test3.getSample(trials)
+   tally = numpy.array([numpy.sum(draws == value) for value in values])
    # Calculate percentage for each draw
    tally = tally / float(trials)
    print "tally should be (10, 0.25), (25, 0.125), (50, 0.325), (99, 0.3): "
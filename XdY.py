@@ -10,6 +10,8 @@ for the result of rolling and adding X dice with Y faces.
 '''
 
 from PMF import *
+from cache import pools, DistributionCache
+from extramath import *
 
 class XdY(PMF,FiniteSequence):
    ''' Represents a discrete probability mass function
@@ -19,6 +21,30 @@ class XdY(PMF,FiniteSequence):
        statistics, and some more advanced probability distribution
        arithmetic. '''
 
+   # Generated pools are shared through the process-wide cache.
+   poolcache = pools
+
+   # Name of the convolution backend used for addition.  See
+   # extramath.convolvers.  None picks direct or FFT convolution by size.
+   convolution = None
+
+   # How pools built from [X, Y] are computed.  'exact' adds up the dice,
+   # 'approximate' takes the Edgeworth expansion of their cumulants, and
+   # 'auto' approximates pools of at least approximatedice dice whose
+   # approximationBound() is within a tenth of error.
+   approximation = 'auto'
+   approximatedice = 1000
+
+   # Bound on the CDF deviation of this pool from the exact one, for
+   # approximated pools.
+   approximationerror = 0.0
+
+   # Pool size at which approximations are measured against exact pools,
+   # and the measured deviations and their rates of decrease keyed on
+   # (class, Y, X, error), in a small least recently used cache.
+   referencedice = 100
+   calibration = DistributionCache(64*1024)
+
    def __init__(self, description, error=None):
       ''' Instantiate a discrete PMF.  Description is either [X, Y] or a
           distribution.
@@ -33,16 +59,36 @@ class XdY(PMF,FiniteSequence):
       ''' Updates the internal distribution using the internal error and
           internal description. '''
       description = self.description
-      try:
-         # Assume [X, Y] is provided:
-         if numpy.matrix(description).size == 2:
-            distribution = self.genDistribution(description[0],description[1])
+      if description is None:
+         # Built from a trusted distribution.  Keep its storage, but
+         # validate it against the current error.
+         if not self.validateDistribution(self.getDistribution()):
+            raise TypeError('Invalid distribution: %s' %(self.validationError,))
+         return
+      if isPoolDescription(description):
+         X, Y = description
+         if X < 1 or Y < 1:
+            raise ValueError('Cannot roll %d dice with %d faces' %(X, Y))
+         # Generated distributions are already validated.  Errors in
+         # generating them, such as dice without faces, reach the caller.
+         if self.useApproximation(X, Y):
+            # Approximations are cheap, so they are not cached.
+            pmf = self.genApproximation(X, Y, self.error)
+            self.setStorage(pmf.getStorage())
+            self.approximationerror = self.approximationBound(X, Y, self.error)
          else:
-            distribution = description
-      except:
-         # [X, Y] is not provided.  Assume it is a distribution.
-         distribution = description
-      
+            self.setStorage(self.genCachedStorage(X, Y))
+            self.approximationerror = 0.0
+            if self.poolLimits(X, Y)[1] < numpy.inf:
+               # Finite pools are stored whole, so their analytic
+               # cumulants are those of the stored arrays.  Truncated
+               # and approximated pools take theirs from the arrays, so
+               # that EV(), moment() and getStatistics() agree.
+               self.getCached('cumulants', lambda: self.poolCumulants(X, Y))
+         return
+
+      # [X, Y] is not provided.  Assume it is a distribution.
+      distribution = description
       if not self.validateDistribution(distribution):
           raise TypeError('Invalid distribution: %s.  Input: %s' %(self.validationError, distribution))
 
@@ -51,17 +97,181 @@ class XdY(PMF,FiniteSequence):
    def genDistribution(self, X, Y):
       ''' Generate the distribution for XdY using PMF intermediates. '''
 
-      # Must generate the base function of 1dY with uniform distribution.
-      values = range(1,Y+1)
-      probs = numpy.ones(Y) * 1.0/Y
-      basepmf = self.__class__([values,probs],self.error)
+      # Must generate the base function of 1dY.
+      basepmf = self.genDie(Y, X, self.error)
 
       # Add the dice distributions together X times.
-      pmf = basepmf
-      for i in range(1,X):
-         pmf = pmf + basepmf
+      return self.genPool(basepmf, X, Y)
+
+   @classmethod
+   def genDie(cls, Y, X=1, error=None):
+      ''' Returns the distribution of one die with Y faces, accurate
+          enough for pools of up to X dice within error.  For XdY this is
+          the uniform distribution over 1..Y. '''
+      probs = numpy.ones(Y) * 1.0/Y
+      return cls.fromLattice(1,probs,error)
+
+   @classmethod
+   def dieTruncation(cls, Y, X=1, error=None):
+      ''' Returns how far genDie(Y, X, error) truncates the die, so that
+          pools of different X built from the same die can be told apart.
+          XdY dice are never truncated, so this is None. '''
+      return None
+
+   @staticmethod
+   def dieCumulants(Y):
+      ''' Returns the first four cumulants of one die with Y faces.  For
+          XdY the die is uniform over 1..Y. '''
+      return uniformCumulants(Y)
+
+   @classmethod
+   def poolCumulants(cls, X, Y):
+      ''' Returns the first four cumulants of the pool of X dice with Y
+          faces in O(1), without building the distribution.  The dice are
+          independent, so their cumulants add. '''
+      return X * cls.dieCumulants(Y)
+
+   @classmethod
+   def poolLimits(cls, X, Y):
+      ''' Returns the lowest and highest totals of X dice with Y faces. '''
+      return X, X*Y
+
+   def useApproximation(self, X, Y):
+      ''' Returns True if the pool of X dice with Y faces should be
+          approximated rather than built, as set by approximation. '''
+      if self.approximation == 'approximate':
+         return True
+      if self.approximation != 'auto' or X < self.approximatedice:
+         return False
+      return self.approximationBound(X, Y, self.error) <= self.error / 10.0
+
+   @classmethod
+   def genApproximation(cls, X, Y, error=None):
+      ''' Returns the Edgeworth approximation of the pool of X dice with Y
+          faces, from its cumulants, over the totals within a few standard
+          deviations of the mean.  Its cost grows with the standard
+          deviation, the square root of X, rather than with X. '''
+      if error is None:
+         error = cls.error
+      cumulants = cls.poolCumulants(X, Y)
+      mean, sd = cumulants[0], numpy.sqrt(cumulants[1])
+      # Normal tails beyond width standard deviations hold far less than
+      # a tenth of error.
+      width = numpy.sqrt(2.0 * numpy.log(10.0 / error)) + 2.0
+      low, high = cls.poolLimits(X, Y)
+      lo = int(max(low, numpy.floor(mean - width*sd)))
+      hi = int(min(high, numpy.ceil(mean + width*sd)))
 
-      return pmf
+      # Each total takes the probability between the half integers around
+      # it.  Spreading a continuous distribution over unit cells adds 1/12
+      # to its variance and takes 1/120 from its fourth cumulant
+      # (Sheppard's corrections), so those are taken back first.
+      continuous = cumulants + [0.0, -1.0/12, 0.0, 1.0/120]
+      cdf = edgeworthCDF(numpy.arange(lo, hi+2) - 0.5, continuous)
+      probs = numpy.maximum(numpy.diff(cdf), 0.0)
+      # The expansion may overshoot a total of 1 slightly.
+      total = numpy.sum(probs)
+      if total > 1.0:
+         probs /= total
+      return cls.fromLattice(lo, probs, error)
+
+   @classmethod
+   def measureApproximation(cls, X, Y, error=None):
+      ''' Builds the pool of X dice with Y faces both exactly and by
+          genApproximation(), and returns the largest difference between
+          their CDFs. '''
+      if error is None:
+         error = cls.error
+      pool = cls.fromLattice(0, numpy.ones(1), error)
+      exact = cls.fromStorage(pool.genCachedStorage(X, Y), error)
+      approximate = cls.genApproximation(X, Y, error)
+      values = exact.getDistribution(0)
+      return numpy.max(numpy.abs(exact.getCDFAt(values) - approximate.getCDFAt(values)))
+
+   @classmethod
+   def approximationBound(cls, X, Y, error=None):
+      ''' Returns an estimated bound on the largest CDF deviation of the
+          approximation of X dice with Y faces from the exact pool.  The
+          deviation is measured once at referencedice dice and at half as
+          many, and extrapolated to X at the rate it fell between them,
+          but no faster than X**-1.5, with a safety factor of 2.  Past
+          referencedice the deviation is assumed to keep falling at that
+          rate, so the bound is an extrapolation and is not guaranteed. '''
+      if error is None:
+         error = cls.error
+      reference = min(X, cls.referencedice)
+      if reference < 2:
+         return cls.measureApproximation(X, Y, error)
+      key = (cls, Y, reference, error)
+      measured = cls.calibration.get(key)
+      if measured is None:
+         deviation = cls.measureApproximation(reference, Y, error)
+         half = cls.measureApproximation(reference // 2, Y, error)
+         rate = numpy.log(half / deviation) / numpy.log(reference / (reference // 2.0))
+         measured = numpy.array([deviation, min(1.5, max(0.0, rate))])
+         cls.calibration.store(key, measured)
+      deviation, rate = measured
+      return 2.0 * deviation * (float(reference) / X) ** rate
+
+   def getApproximationError(self):
+      ''' Returns the bound on the CDF deviation of this pool from the
+          exact one.  It is 0 unless the pool was approximated. '''
+      return self.approximationerror
+
+   @classmethod
+   def family(cls, Y, X_max, error=None):
+      ''' Returns the pools of 1 to X_max dice with Y faces as one 2-D
+          array.  Row 0 holds the values of a common support and row X
+          holds the probabilities of X dice over it.  The pools are built
+          in one cumulative pass by extramath.convolvePowers, each from
+          the one before or from powers of one transform of the die.
+          See familyMoment() and PMF.fromFamily() to use the rows. '''
+      offset, probs = cls.genDie(Y, X_max, error).getLattice()
+      powers = convolvePowers(probs, X_max)
+      # X dice start at X*offset, so row X is shifted X-1 offsets to the
+      # right of the first.
+      width = powers.shape[1] + (X_max-1)*offset
+      table = numpy.zeros( (X_max+1, width) )
+      table[0,:] = numpy.arange(width) + offset
+      for X in range(1,X_max+1):
+         shift = (X-1)*offset
+         table[X,shift:shift+powers.shape[1]] = powers[X-1,:]
+      return table
+
+   def genPool(self, basepmf, X, Y=None):
+      ''' Returns the distribution of the sum of X independent copies of
+          basepmf.  The copies are combined by repeated doubling, so only
+          O(log X) additions are needed rather than X-1.  If Y is given and
+          poolcache holds a smaller pool of this class with Y faces, built
+          from the same truncation of the die, the remaining copies are
+          added onto it. '''
+      pool = None
+      if Y is not None and self.poolcache is not None:
+         cached = self.poolcache.largest(self.__class__, X, Y, self.error)
+         # A pool of fewer dice may hold a coarser truncation of the die
+         # than X dice need.  It is not reused, so that the pool does not
+         # depend on what was cached before.
+         if cached is not None and \
+               self.dieTruncation(Y, cached[0], self.error) != \
+               self.dieTruncation(Y, X, self.error):
+            cached = None
+         if cached is not None:
+            pool = self.fromStorage(cached[1], self.error)
+            X = X - cached[0]
+
+      power = basepmf
+      while X > 0:
+         # power holds the sum of 2**k copies.  Fold it into the pool
+         # whenever bit k of X is set.
+         if X & 1:
+            if pool is None:
+               pool = power
+            else:
+               pool = pool.addDistribution(power)
+         X = X >> 1
+         if X > 0:
+            power = power.addDistribution(power)
+      return pool
 
    def setError(self, error):
       ''' Sets the internal maximal error value as a singleton
@@ -75,53 +285,67 @@ class XdY(PMF,FiniteSequence):
           does not support adding. '''
       return self + other
 
+   def isSparseSum(self, other):
+      ''' Returns True if the sum with other is best taken by sparse
+          convolution.  That is the case when either support is not
+          integer, or when the fill ratio of the sum is below
+          extramath.sparsefill, so that a dense support would be mostly
+          gaps.  Two lattices are always summed densely. '''
+      if self.offset is not None and other.offset is not None:
+         return False
+      avalues = self.getSortedDistribution()[0]
+      bvalues = other.getSortedDistribution()[0]
+      if numpy.any(avalues != numpy.floor(avalues)) or \
+            numpy.any(bvalues != numpy.floor(bvalues)):
+         return True
+      return issparse(avalues, bvalues)
+
    def __add__(self, other):
       ''' The probability distribution of the addition of two
           independent random variables is the convolution of the
           probability distribution functions of the random variables. '''
-      # First, make sure other can be compared properly.  
-      if not self.validateDistribution(other):
-          raise TypeError('Invalid distribution for addition: %s' %(self.validationError))
-
-      # Find appropriate error value.  Choose maximum if possible.
-      try:
-         if self.error > other.error:
-            error = self.error
-         else: 
-            error = other.error
-      except:
-         error = self.error
-
-      # "cast" into a friendly format.
-      other = self.__class__(other,error)
-
-      # Setup values and probabilities to Convolve the PMFs.
-      inputAvalue = self.getDistribution(0)
-      inputBvalue = other.getDistribution(0)
-      inputAprob = self.getDistribution(1)
-      inputBprob = other.getDistribution(1)
-
-      leftside = numpy.min(inputBvalue) - numpy.min(inputAvalue)
-      if leftside > 0:
-         # B begins further "right" than A.  Leftpad B with zeros.
-         inputBprob = numpy.concatenate((numpy.zeros(leftside),inputBprob),1)
-      if leftside < 0:
-         # B begins further "left" than A.  Leftpad A with zeros.
-         inputAprob = numpy.concatenate((numpy.zeros(-1*leftside),inputAprob),1)
-
-      # Convolve the distributions.
-      outputprob = numpy.convolve(inputAprob, inputBprob)
-      # Either A or B may be left padded.  The number of zeros padded
-      # to the input of convolution will be the number of zeros padded
-      # to the output.  Skip the padding, but keep the rest.
-      outputprob = outputprob[numpy.abs(leftside):]
-
-      # Find the values for the associated convolution.
-      minoutputvalue = numpy.min(inputAvalue) + numpy.min(inputBvalue)
-      maxoutputvalue = minoutputvalue + len(self) + len(other) - 2
-      outputvalue = range(int(minoutputvalue),int(maxoutputvalue)+1)
-
-      return self.__class__(numpy.array([outputvalue, outputprob]),error)
+      if isScalar(other):
+         # Constants only shift the support.
+         return self.shift(other)
+
+      # First, make sure other can be added properly.
+      other = self.castOperand(other, 'addition')
+
+      pmf = self.addDistribution(other)
+
+      # Cumulants of independent variables add, so known ones carry over.
+      acumulants, bcumulants = self.knownCumulants(), other.knownCumulants()
+      if acumulants is not None and bcumulants is not None:
+         cumulants = acumulants + bcumulants
+         pmf.getCached('cumulants', lambda: cumulants)
+
+      # Drop the negligible tails of the sum so later operations do not
+      # pay for them.  Pruned sums recompute their cumulants.
+      return pmf.pruneTails(self.dropped + other.dropped,
+                            self.operands + other.operands)
+
+   def addDistribution(self, other):
+      ''' Returns the exact distribution of the sum of this random
+          variable and other, a PMF, by convolution. '''
+      error = self.combinedError(other)
+
+      if self.isSparseSum(other):
+         # Sum only the values present, rather than filling the gaps.
+         values, outputprob = sparseconvolve(self.getDistribution(0),
+                                             self.getDistribution(1),
+                                             other.getDistribution(0),
+                                             other.getDistribution(1))
+         return self.fromSupport(values, outputprob, error)
+
+      # Convolve the probabilities of the two integer lattices.  The
+      # offsets of their first values add, so the supports need no
+      # padding to line up.
+      aoffset, aprobs = self.getLattice()
+      boffset, bprobs = other.getLattice()
+      outputprob = convolve(aprobs, bprobs, self.convolution)
+
+      # The convolution of valid distributions is valid.
+      return self.fromLattice(aoffset + boffset, outputprob, error)
 
 
 # Some example code
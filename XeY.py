@@ -26,35 +26,67 @@ class XeY(XdY,InfiniteSequence):
        statistics, and some more advanced probability distribution
        arithmetic. '''
 
-   def genDistribution(self, X, Y):
-      ''' Generate the distribution for XeY using PMF intermediates. '''
-      # Must generate the base function of 1eY with uniform distribution.
-      values = numpy.array(range(1,Y+1))
-      probs = numpy.ones(Y) * 1.0/Y
-      probs[Y-1] = 0.0
-
-      # Temporarily make the error large enough to encompass
-      # enough explosions to be valid after convolving.
-      baseerror = self.error
-      self.error = self.error / (10 ** (X-1))
-
-      # The distribution runs out to infinity. Use the error value to
-      # truncate the distribution.  Calculate the distribution until
-      # it satisfies the error criteria.
-      count = 0
-      basevalues = values
-      baseprobs = probs
-      while not self.validateDistribution(numpy.array([values,probs])):
-         count += 1
-         values = numpy.concatenate((values, basevalues + count*Y),1)
-         probs = numpy.concatenate((probs, baseprobs ** (count+1)),1)
-
-      # Set error back to its original value.
-      self.error = baseerror
-      # Add the dice distributions together X times.
-      basepmf = self.__class__(numpy.array([values,probs]),self.error)
-      pmf = basepmf
-      for i in range(1,X):
-         pmf = pmf + basepmf
-
-      return pmf
+   @classmethod
+   def genDie(cls, Y, X=1, error=None):
+      ''' Returns the distribution of one exploding die with Y faces,
+          truncated so that pools of up to X dice stay within error. '''
+      if error is None:
+         error = cls.error
+      # A single exploding die stops on face v after k explosions with
+      # probability (1/Y)**(k+1), showing v + k*Y.  It never stops on the
+      # max face.  Truncating after K rounds leaves out (1/Y)**K of the
+      # probability.  The pool of X dice leaves out at most X times that,
+      # so each die is held to a tenth of error/X, leaving room for
+      # arithmetic on the pool.
+      rounds = cls.dieTruncation(Y, X, error)
+
+      # Build every round at once: row k holds faces 1..Y after k
+      # explosions, which run on consecutively from 1.
+      count = numpy.arange(rounds)
+      probs = numpy.ones((rounds,Y)) * ((1.0/Y) ** (count+1))[:,numpy.newaxis]
+      probs[:,Y-1] = 0.0
+      return cls.fromLattice(1,probs.ravel(),error)
+
+   @classmethod
+   def dieTruncation(cls, Y, X=1, error=None):
+      ''' Returns the rounds of explosions genDie(Y, X, error) keeps. '''
+      if error is None:
+         error = cls.error
+      return cls.explosionRounds(Y, error / (10.0 * X))
+
+   @staticmethod
+   def dieCumulants(Y):
+      ''' Returns the first four cumulants of one exploding die with Y
+          faces, untruncated.  The die shows K*Y + U where the explosions
+          K are geometric with P(K >= k) = (1/Y)**k and the stopping face
+          U is independent and uniform over 1..Y-1, so their cumulants
+          add.  They give poolStatistics(); XeY objects hold a truncated
+          distribution and take their cumulants from it. '''
+      if Y < 2:
+         raise ValueError('Exploding dice need at least two faces, not %s' %(Y))
+      # Cumulants of the number of explosions, continuing with q = 1/Y.
+      q = 1.0 / Y
+      p = 1.0 - q
+      explosions = numpy.array([q/p, q/p**2, q*(1+q)/p**3, q*(1+4*q+q*q)/p**4])
+      return explosions * float(Y) ** numpy.arange(1,5) + uniformCumulants(Y-1)
+
+   @classmethod
+   def poolLimits(cls, X, Y):
+      ''' Returns the lowest and highest totals of X exploding dice with Y
+          faces.  There is no highest. '''
+      return X, numpy.inf
+
+   @staticmethod
+   def explosionRounds(Y, tolerance):
+      ''' Returns the fewest rounds K of explosions, at least 1, that leave
+          out no more than tolerance of the probability of one die with Y
+          faces.  The left out probability is (1/Y)**K. '''
+      if Y < 2:
+         raise ValueError('Exploding dice need at least two faces, not %s' %(Y))
+      rounds = max(1, int(numpy.ceil(numpy.log(1.0/tolerance) / numpy.log(Y))))
+      # Guard against round-off in the logarithms.
+      while (1.0/Y) ** rounds > tolerance:
+         rounds += 1
+      while rounds > 1 and (1.0/Y) ** (rounds-1) <= tolerance:
+         rounds -= 1
+      return rounds
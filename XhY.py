@@ -11,6 +11,7 @@ outcome is to be 6.
 '''
 
 from PMF import *
+from cache import pools
 from extramath import *
 
 class XhY(PMF,FiniteSequence):
@@ -21,6 +22,9 @@ class XhY(PMF,FiniteSequence):
        statistics, and some more advanced probability distribution
        arithmetic. '''
 
+   # Generated pools are shared through the process-wide cache.
+   poolcache = pools
+
    def __init__(self, description, error=None):
       ''' Instantiate a discrete PMF.  Description is either [X, Y] or a
           distribution.
@@ -35,16 +39,24 @@ class XhY(PMF,FiniteSequence):
       ''' Updates the internal distribution using the internal error and
           internal description. '''
       description = self.description
-      try:
-         # Assume [X, Y] is provided:
-         if numpy.matrix(description).size == 2:
-            distribution = self.genDistribution(description[0],description[1])
-         else:
-            distribution = description
-      except:
-         # [X, Y] is not provided.  Assume it is a distribution.
-         distribution = description
-      
+      if description is None:
+         # Built from a trusted distribution.  Keep its storage, but
+         # validate it against the current error.
+         if not self.validateDistribution(self.getDistribution()):
+            raise TypeError('Invalid distribution: %s' %(self.validationError,))
+         return
+      if isPoolDescription(description):
+         X, Y = description
+         if X < 1 or Y < 1:
+            raise ValueError('Cannot roll %d dice with %d faces' %(X, Y))
+         # Generated distributions are already validated.  Errors in
+         # generating them, such as dice without faces, reach the caller.
+         self.setStorage(self.genCachedStorage(X, Y))
+         self.getCached('cumulants', lambda: self.poolCumulants(X, Y))
+         return
+
+      # [X, Y] is not provided.  Assume it is a distribution.
+      distribution = description
       if not self.validateDistribution(distribution):
           raise TypeError('Invalid distribution: %s.  Input: %s' %(self.validationError, distribution))
 
@@ -52,17 +64,40 @@ class XhY(PMF,FiniteSequence):
 
    def genDistribution(self, X, Y):
       ''' Generate the distribution for XhY using PMF intermediates. '''
-      # Must generate the base function of 1hY with uniform distribution.
-      values = range(1,Y+1)
-      probs = numpy.zeros(Y)
-      # Run a summation for each output value to determine its probability.
-      for Z in values:
-         acc = 0
-         for i in range(1,X+1):
-            acc += combination(X,i) * (1.0/Y)**i * ((Z-1.0)/Y)**(X-i)
-         probs[Z-1] = acc
-      pmf = self.__class__([values,probs],self.error)
-      return pmf
+      return self.fromLattice(1,self.genProbabilities(X, Y),self.error)
+
+   @staticmethod
+   def genProbabilities(X, Y):
+      ''' Returns the probabilities of the highest of X dice with Y faces
+          showing 1..Y.  X may be a column of dice counts, giving one row
+          of probabilities for each. '''
+      # The highest of X dice is at most z exactly when every die is, so
+      # its CDF is F(z)**X where F(z) = z/Y is the CDF of one die.  Then
+      # P(z) = F(z)**X - F(z-1)**X.  Factor out F(z)**X so the difference
+      # is computed by expm1 without cancellation, even for large X.
+      values = numpy.arange(1,Y+1)
+      with numpy.errstate(divide='ignore'):
+         return (values*1.0/Y)**X * -numpy.expm1(X * numpy.log1p(-1.0/values))
+
+   @classmethod
+   def poolCumulants(cls, X, Y):
+      ''' Returns the first four cumulants of the highest of X dice with
+          Y faces, from the closed form in O(Y) rather than building the
+          distribution. '''
+      return computeCumulants(numpy.arange(1,Y+1), cls.genProbabilities(X, Y))
+
+   @classmethod
+   def family(cls, Y, X_max, error=None):
+      ''' Returns the highest of 1 to X_max dice with Y faces as one 2-D
+          array.  Row 0 holds the values 1..Y and row X holds the
+          probabilities for X dice.  Every row comes from one vectorized
+          evaluation of the closed form.  See familyMoment() and
+          PMF.fromFamily() to use the rows. '''
+      X = numpy.arange(1,X_max+1)[:,numpy.newaxis]
+      table = numpy.empty( (X_max+1, Y) )
+      table[0,:] = numpy.arange(1,Y+1)
+      table[1:,:] = cls.genProbabilities(X, Y)
+      return table
 
    def setError(self, error):
       ''' Sets the internal maximal error value as a singleton
@@ -77,40 +112,44 @@ class XhY(PMF,FiniteSequence):
 
    def __or__(self, other):
       ''' The probability distribution of the take highest operation
-          over two independent random variables is an O(nm) comparison. '''
-      # First, make sure other can be compared properly.
-      if not self.validateDistribution(other):
-         raise TypeError('Invalid distribution for take-highest: %s' %(self.validation))
-
-      # Find appropriate error value.  Choose maximum if possible.
-      try:
-         if self.error > other.error:
-            error = self.error
-         else:
-            error = other.error
-      except:
-         error = self.error
-
-      # "cast" into friendly format.
-      other = self.__class__(other,error)
-
-      # Establish output domain.
-      minmin = int(min([min(self.distribution[0,:]), min(other.distribution[0,:])]))
-      maxmax = int(max([max(self.distribution[0,:]), max(other.distribution[0,:])]))
-      odomain = numpy.array(range(minmin,maxmax+1))
-
-      # Find output range by accumulating probabilities.
-      orange = numpy.zeros(maxmax-minmin+1)
-      for i in range(0,len(self)):
-         for j in range(0,len(other)):
-            # Determine probability of this event occuring
-            prob = self.distribution[1,i] * other.distribution[1,j]
-
-            # Determine largest of showing value
-            value = max([self.distribution[0,i], other.distribution[0,j]])
-            idx = value - minmin
-
-            # Update probability for selected value
-            orange[idx] += prob
-
-      return self.__class__(numpy.array([[odomain],[orange]]),error)
+          over two independent random variables.  The highest is at most v
+          exactly when both are, so its CDF is the product of their CDFs. '''
+      other = self.castOperand(other, 'take-highest')
+      values, acdf, bcdf = self.alignCDFs(other)
+      pmf = self.fromCDF(values, acdf * bcdf, self.combinedError(other))
+      return pmf.pruneTails(self.dropped + other.dropped,
+                            self.operands + other.operands)
+
+   def __rand__(self,other):
+      ''' This is the same as and, but implies other does not support and. '''
+      return self & other
+
+   def __and__(self, other):
+      ''' The probability distribution of the take lowest operation
+          over two independent random variables.  The lowest is above v
+          exactly when both are, so its survival function is the product
+          of their survival functions. '''
+      other = self.castOperand(other, 'take-lowest')
+      values, acdf, bcdf = self.alignCDFs(other)
+      # Truncated distributions may total slightly less than 1.
+      atotal, btotal = acdf[-1], bcdf[-1]
+      cdf = atotal*btotal - (atotal - acdf) * (btotal - bcdf)
+      pmf = self.fromCDF(values, cdf, self.combinedError(other))
+      return pmf.pruneTails(self.dropped + other.dropped,
+                            self.operands + other.operands)
+
+   def alignCDFs(self, other):
+      ''' Returns the merged, sorted support of this distribution and
+          other, followed by the CDF of each evaluated over it.  The
+          supports need not be integer or contiguous. '''
+      values = numpy.union1d(self.getDistribution(0), other.getDistribution(0))
+      return values, self.getCDFAt(values), other.getCDFAt(values)
+
+   @classmethod
+   def fromCDF(cls, values, cdf, error):
+      ''' Builds a distribution of this class from a CDF evaluated at
+          the sorted values. '''
+      probs = numpy.diff(numpy.concatenate(([0.0], cdf)))
+      # Round-off can leave tiny negative differences.
+      probs = numpy.maximum(probs, 0.0)
+      return cls.fromTrusted(numpy.array([values,probs]),error)
@@ -0,0 +1,164 @@
+'''
+Bryan Bonvallet
+2014
+
+XkY is borrowed from roll-and-keep systems, where 10k5 means roll ten
+dice and keep the five highest.  'k' represents keep.  Throw X dice of
+Y sides, keep the K highest and add them up, so 4d6 drop lowest is
+XkY( (4,6,3) ).  XlY keeps the K lowest instead.
+
+Enumerating the Y**X rolls is hopeless past a handful of dice.  The
+distribution is built by a dynamic program over the faces from the
+highest down, tracking how many dice have been kept and their sum, in
+O(K**3 Y**2 + X**2 Y) operations rather than Y**X.
+'''
+
+from XdY import *
+
+class XkY(XdY):
+   ''' Represents a discrete probability mass function
+       of adding up the K highest of X dice with Y faces.
+
+       Allows direct sampling from the distribution, calculation of
+       statistics, and some more advanced probability distribution
+       arithmetic.  Kept pools add to other pools as XdY does. '''
+
+   def __init__(self, description, error=None):
+      ''' Instantiate a discrete PMF.  Description is either [X, Y, K] or
+          a distribution.
+          X, Y and K are integers.  X represents the number of dice, Y
+          represents the number of faces on each die and K the number of
+          dice kept, from 1 to X. '''
+      if error is not None:
+         self.error = error
+      self.description = description
+      self.setDistribution()
+
+   def setDistribution(self):
+      ''' Updates the internal distribution using the internal error and
+          internal description. '''
+      description = self.description
+      if description is None:
+         # Built from a trusted distribution.  Keep its storage, but
+         # validate it against the current error.
+         if not self.validateDistribution(self.getDistribution()):
+            raise TypeError('Invalid distribution: %s' %(self.validationError,))
+         return
+      if isPoolDescription(description, 3):
+         X, Y, K = description
+         if not 1 <= K <= X or Y < 1:
+            raise ValueError('Cannot keep %d of %d dice with %d faces' %(K, X, Y))
+         # Generated distributions are already validated.
+         self.setStorage(self.genCachedStorage(X, Y, K))
+         return
+
+      if not self.validateDistribution(description):
+          raise TypeError('Invalid distribution: %s.  Input: %s' %(self.validationError, description))
+
+      self.distribution = self.castToDistribution(description)
+
+   def genDistribution(self, X, Y, K):
+      ''' Generate the distribution for XkY from the dynamic program. '''
+      return self.fromLattice(K,self.genProbabilities(X, Y, K),self.error)
+
+   @staticmethod
+   def genProbabilities(X, Y, K):
+      ''' Returns the probabilities of the sum of the K highest of X dice
+          with Y faces being K..K*Y. '''
+      # Faces are visited from Y down to 1.  Before face f, state[n,s] is
+      # the probability that n < K dice showed faces above f, summing to
+      # s.  The other X-n dice are uniform over 1..f, so the number c of
+      # them showing f is binomial with p = 1/f.  Once n+c reaches K the
+      # sum is settled at s + f*(K-n) and moves to done, so later dice
+      # only matter while fewer than K are kept.  At f = 1 every die left
+      # shows 1, which settles the rest.
+      width = K*Y + 1
+      state = numpy.zeros( (K, width) )
+      state[0,0] = 1.0
+      done = numpy.zeros(width)
+      remaining = X - numpy.arange(K)
+      for f in range(Y,0,-1):
+         p = 1.0 / f
+         # binomial[m,c] is the probability that c of m dice show f.
+         binomial = numpy.zeros( (X+1, X+1) )
+         binomial[0,0] = 1.0
+         for m in range(1,X+1):
+            binomial[m,:] = binomial[m-1,:] * (1.0 - p)
+            binomial[m,1:] += binomial[m-1,:-1] * p
+
+         settled = numpy.zeros( (K, width) )
+         for n in range(0,K):
+            # At least K-n more dice show f.
+            shift = f*(K-n)
+            done[shift:] += state[n,:width-shift] * numpy.sum(binomial[remaining[n],K-n:])
+         for c in range(0,K):
+            # Exactly c more dice show f, from every n that stays below K.
+            rows = numpy.arange(0,K-c)
+            settled[c:,f*c:] += state[rows,:width-f*c] * binomial[remaining[rows],c][:,numpy.newaxis]
+         state = settled
+      return done[K:]
+
+   @classmethod
+   def poolCumulants(cls, X, Y, K):
+      ''' Returns the first four cumulants of the sum of K kept of X dice
+          with Y faces, from the dynamic program. '''
+      return computeCumulants(numpy.arange(K,K*Y+1), cls.genProbabilities(X, Y, K))
+
+   @classmethod
+   def poolStatistics(cls, X, Y, K):
+      ''' Returns (mean, variance, skewness, kurtosis) of the sum of K kept of
+          X dice with Y faces. '''
+      return cumulantStatistics(cls.poolCumulants(X, Y, K))
+
+   @classmethod
+   def poolLimits(cls, X, Y, K):
+      ''' Returns the lowest and highest totals of K of X dice with Y
+          faces. '''
+      return K, K*Y
+
+   @classmethod
+   def family(cls, Y, X_max, K, error=None):
+      ''' Returns the sums of the K highest of 1 to X_max dice with Y faces
+          as one 2-D array.  Row 0 holds the values 1..K*Y and row X holds
+          the probabilities for X dice, keeping all of them while X is
+          below K.  See familyMoment() and PMF.fromFamily() to use the
+          rows. '''
+      table = numpy.zeros( (X_max+1, K*Y) )
+      table[0,:] = numpy.arange(1,K*Y+1)
+      for X in range(1,X_max+1):
+         keep = min(X, K)
+         table[X,keep-1:keep*Y] = cls.genProbabilities(X, Y, keep)
+      return table
+
+class XlY(XkY):
+   ''' Represents a discrete probability mass function
+       of adding up the K lowest of X dice with Y faces. '''
+
+   @staticmethod
+   def genProbabilities(X, Y, K):
+      ''' Returns the probabilities of the sum of the K lowest of X dice
+          with Y faces being K..K*Y. '''
+      # Face v of a die is face Y+1-v read the other way round, which
+      # turns the K lowest into the K highest.  A sum s of the K highest
+      # is a sum K*(Y+1) - s of the K lowest, reversing the lattice.
+      return XkY.genProbabilities(X, Y, K)[::-1]
+
+
+# Some example code
+if __name__ == "__main__":
+   print "Roll four six-sided dice and drop the lowest: "
+   stat = XkY( (4,6,3) )
+   print str(stat)
+   print "Expected value: %f" % (stat.EV(),)
+
+   print "Roll ten ten-sided dice and keep five (10k5): "
+   print str(XkY( (10,10,5) ))
+
+   print "Probability that 4d6 drop lowest beats 3d6: "
+   print str(stat > XdY( (3,6) ))
+
+   print "Six stats rolled by 4d6 drop lowest add up to: "
+   print str(stat + stat + stat + stat + stat + stat)
+
+   print "Keep the two lowest of five six-sided dice: "
+   print str(XlY( (5,6,2) ))
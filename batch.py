@@ -0,0 +1,149 @@
+'''
+Bryan Bonvallet
+2014
+
+Parallel evaluation of large batches of dice pools and comparisons.
+
+Tables such as every XdY((X, Y)) for X up to 200 and Y up to 100 are made
+of independent jobs.  runPools() spreads the pools over worker processes
+and comparePools() splits a comparison matrix into blocks of rows.
+
+   from XdY import XdY
+   from batch import runPools, comparePools
+   pmfs = runPools([(XdY, (X, 6)) for X in range(1,101)], workers=4)
+   matrix = comparePools(pmfs, '>', workers=4)
+
+Workers do not send their arrays back by pickling.  Each saves its result
+as a .npy file in a scratch directory on shared memory (/dev/shm where the
+system has it) and the parent maps the file, so arrays pass through the
+page cache without being copied.  Results come back in the order of the
+jobs whichever worker finishes first.
+'''
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from PMF import compareTable, familyTable
+
+def scratchDirectory():
+   ''' Returns a new temporary directory, on shared memory if possible. '''
+   root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+   return tempfile.mkdtemp(prefix='diestatistician', dir=root)
+
+def loadArray(path):
+   ''' Returns the array saved at path.  Where files may be removed while
+       mapped, it is mapped read-only rather than read. '''
+   return numpy.load(path, mmap_mode='r' if os.name == 'posix' else None)
+
+def mapTasks(function, tasks, workers):
+   ''' Returns function applied to every task, in order, on a pool of
+       workers processes. '''
+   pool = multiprocessing.Pool(workers)
+   try:
+      results = pool.map(function, tasks)
+   except:
+      pool.terminate()
+      raise
+   pool.close()
+   pool.join()
+   return results
+
+def buildStorage(task):
+   ''' Builds the pool of one job in a worker and saves its arrays in the
+       scratch directory.  Returns the offset and error of the pool and
+       whether its values were saved. '''
+   path, cls, description, error = task
+   pmf = cls(description, error)
+   offset, values, probs = pmf.getStorage()
+   numpy.save(path + 'p.npy', probs)
+   if values is not None:
+      numpy.save(path + 'v.npy', values)
+   return offset, values is not None, pmf.error
+
+def runPools(jobs, workers=None):
+   ''' Returns the pools described by jobs, a list of tuples (cls,
+       description) or (cls, description, error) such as (XdY, (3,6)), as
+       a list of objects in the same order.  They are built on workers
+       processes, by default one per CPU.  With one worker they are built
+       in this process. '''
+   if workers is None:
+      workers = multiprocessing.cpu_count()
+   jobs = [tuple(job) + (None,) * (3 - len(job)) for job in jobs]
+   if workers == 1:
+      return [cls(description, error) for cls, description, error in jobs]
+
+   directory = scratchDirectory()
+   try:
+      paths = [os.path.join(directory, str(i)) for i in range(0,len(jobs))]
+      tasks = [(path,) + job for path, job in zip(paths, jobs)]
+      results = mapTasks(buildStorage, tasks, workers)
+
+      pmfs = []
+      for path, job, result in zip(paths, jobs, results):
+         cls, description = job[0], job[1]
+         offset, saved, error = result
+         values = loadArray(path + 'v.npy') if saved else None
+         pmf = cls.fromStorage( (offset, values, loadArray(path + 'p.npy')), error )
+         # Behave as if built from the description in this process.
+         pmf.description = description
+         pmfs.append(pmf)
+   finally:
+      shutil.rmtree(directory, ignore_errors=True)
+   return pmfs
+
+def compareBlock(task):
+   ''' Computes a block of rows of a comparison matrix in a worker, from
+       the family table saved at tablepath into the matrix saved at
+       outpath. '''
+   tablepath, outpath, op, error, tile, start, stop = task
+   table = numpy.load(tablepath, mmap_mode='r')
+   out = numpy.load(outpath, mmap_mode='r+')
+   compareTable(table, op, error, tile, start, stop, out[start:stop])
+   out.flush()
+
+def comparePools(pmfs, op='<', workers=None, tile=256):
+   ''' Returns the comparison matrix of the PMF objects pmfs, as
+       PMF.comparisonMatrix() computes it, with blocks of rows computed on
+       workers processes, by default one per CPU.  Each worker aligns the
+       CDFs of every PMF again, so it holds a few copies of the family
+       table besides its block. '''
+   if workers is None:
+      workers = multiprocessing.cpu_count()
+   table = familyTable(pmfs)
+   error = max([pmf.error for pmf in pmfs])
+   if workers == 1:
+      return compareTable(table, op, error, tile)
+
+   n = len(pmfs)
+   directory = scratchDirectory()
+   try:
+      tablepath = os.path.join(directory, 'table.npy')
+      outpath = os.path.join(directory, 'out.npy')
+      numpy.save(tablepath, table)
+      out = numpy.lib.format.open_memmap(outpath, mode='w+', shape=(n, n))
+      del out
+
+      # A few blocks per worker even out their running times.
+      step = max(1, -(-n // (4*workers)))
+      tasks = [(tablepath, outpath, op, error, tile, start, min(start+step, n))
+               for start in range(0, n, step)]
+      mapTasks(compareBlock, tasks, workers)
+      return loadArray(outpath)
+   finally:
+      shutil.rmtree(directory, ignore_errors=True)
+
+
+# Some example code
+if __name__ == "__main__":
+   from XdY import XdY
+
+   print "Build 1d6 to 20d6 on two processes: "
+   pmfs = runPools([(XdY, (X, 6)) for X in range(1,21)], workers=2)
+   print str(pmfs[2])
+
+   print "Probability that each of the first five beats each other: "
+   print str(comparePools(pmfs[:5], '>', workers=2))
@@ -0,0 +1,56 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks adding and multiplying XdY pools by constants through affine
+transforms of the support, against the zero padded convolution with a
+one-point distribution they replaced.
+'''
+
+import numpy
+
+from benchutil import timeit, report
+from XdY import XdY
+from extramath import convolve
+
+def paddedadd(lhs, c):
+   ''' Constant addition as it was before affine transforms: cast c to a
+       one-point distribution, left-pad whichever probabilities start
+       lower with zeros and convolve. '''
+   aprob = lhs.getDistribution(1)
+   bprob = numpy.array([1.0])
+   leftside = c - lhs[0,0]
+   if leftside > 0:
+      aprob = numpy.concatenate((numpy.zeros(int(leftside)), aprob))
+   else:
+      bprob = numpy.concatenate((numpy.zeros(int(-leftside)), bprob))
+   outputprob = convolve(aprob, bprob)
+   minvalue = min(lhs[0,0], c)
+   outputvalue = numpy.arange(len(outputprob)) + 2*minvalue
+   return XdY.fromTrusted(numpy.array([outputvalue, outputprob]), lhs.error)
+
+def time_shift(c):
+   XdY( (2,6) ) + c
+time_shift.params = [3, 1000, 1000000]
+
+def time_scale(k):
+   XdY( (2,6) ) * k
+time_scale.params = [-1, 10]
+
+if __name__ == "__main__":
+   rows = []
+   pool = XdY( (2,6) )
+   for c in time_shift.params:
+      rows.append( ('2d6+%d' % (c,), timeit(paddedadd, pool, c),
+                    timeit(pool.__add__, c)) )
+   big = XdY( (1000,6) )
+   for c in time_shift.params:
+      rows.append( ('1000d6+%d' % (c,), timeit(paddedadd, big, c),
+                    timeit(big.__add__, c)) )
+   report('Seconds to add a constant to a pool', rows,
+          ('sum', 'padded', 'affine'))
+   rows = []
+   for k in time_scale.params:
+      rows.append( ('1000d6*%d' % (k,), timeit(big.__mul__, k)) )
+   report('Seconds to multiply a pool by a constant', rows,
+          ('product', 'affine'))
@@ -0,0 +1,45 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building huge pools exactly against their Edgeworth
+approximation, with the measured and bounded CDF deviation between them.
+'''
+
+from benchutil import timeit, report
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+
+def exact(cls, X, Y):
+   ''' Build the pool of X dice with Y faces by adding up the dice. '''
+   pools.clear()
+   pmf = cls.fromLattice(0, [1.0])
+   return pmf.genDistribution(X, Y)
+
+def time_exact(cls, X, Y):
+   exact(cls, X, Y)
+time_exact.params = ([XdY, XeY], [100, 1000, 10000], [6, 20])
+
+def time_approximation(cls, X, Y):
+   cls.genApproximation(X, Y)
+time_approximation.params = time_exact.params
+
+# Deviations are only measured up to this many dice.
+maxmeasured = 3000
+
+if __name__ == "__main__":
+   rows = []
+   for cls in (XdY, XeY):
+      for Y in (6, 20):
+         for X in (30, 100, 300, 1000, 3000, 10000, 50000):
+            deviation = '-'
+            if X <= maxmeasured:
+               deviation = cls.measureApproximation(X, Y)
+            rows.append( ('%s %dx%d' % (cls.__name__, X, Y),
+                          timeit(exact, cls, X, Y, repeat=1),
+                          timeit(cls.genApproximation, X, Y),
+                          deviation, cls.approximationBound(X, Y)) )
+   report('Seconds to build a pool exactly and approximately', rows,
+          ('pool', 'exact', 'approximate', 'deviation', 'bound'))
+   print('Pools are approximated from %d dice when the bound is within a tenth of error' % (XdY.approximatedice,))
@@ -0,0 +1,44 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building a table of dice pools and their comparison matrix on
+several processes against doing so serially.
+'''
+
+import multiprocessing
+
+from benchutil import timeit, report
+from batch import runPools, comparePools
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+# Every (X, Y) pair of the table, for each class.
+X_max = 60
+Ys = range(4, 21, 2)
+
+def buildJobs(cls):
+   ''' Lists the jobs for every pool of cls in the table. '''
+   return [(cls, (X, Y)) for Y in Ys for X in range(1,X_max+1)]
+
+def time_pools(cls, workers):
+   pools.clear()
+   runPools(buildJobs(cls), workers)
+time_pools.params = ([XdY, XeY, XhY], [1, 2, 4])
+
+if __name__ == "__main__":
+   counts = sorted(set([1, 2, 4, multiprocessing.cpu_count()]))
+   rows = []
+   for cls in (XdY, XeY, XhY):
+      jobs = buildJobs(cls)
+      times = [timeit(runPools, jobs, workers, setup=pools.clear)
+               for workers in counts]
+      rows.append( ['%s x%d' % (cls.__name__, len(jobs))] + times )
+   pmfs = runPools(buildJobs(XdY), 1)
+   times = [timeit(comparePools, pmfs, '>', workers) for workers in counts]
+   rows.append( ['> %dx%d' % (len(pmfs), len(pmfs))] + times )
+   report('Seconds to build tables of pools and compare them', rows,
+          ['jobs'] + ['%d workers' % (workers,) for workers in counts])
+   print('NumPy may already run the comparison products on several threads')
@@ -0,0 +1,43 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks repeated construction of common pools with and without the
+process-wide pool cache.
+'''
+
+from benchutil import timeit, report, exact
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+# Pools built over and over by a typical service.
+common = [ (XdY, (3,6)), (XeY, (6,6)), (XhY, (4,20)) ]
+
+# Number of constructions per timing.
+repeats = 1000
+
+def build(cls, description):
+   with exact():
+      for i in range(0,repeats):
+         cls(description)
+
+def time_cached(index):
+   cls, description = common[index]
+   build(cls, description)
+time_cached.params = range(0,len(common))
+
+if __name__ == "__main__":
+   rows = []
+   for cls, description in common:
+      cached = timeit(build, cls, description)
+      cls.poolcache = None
+      try:
+         uncached = timeit(build, cls, description)
+      finally:
+         cls.poolcache = pools
+      rows.append( ('%s%s' % (cls.__name__, description), cached, uncached) )
+   report('Seconds to build a pool %d times' % (repeats,), rows,
+          ('pool', 'cached', 'uncached'))
+   print(pools.statistics())
@@ -0,0 +1,46 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks direct, FFT and automatically chosen convolution for
+XdY addition.
+'''
+
+from benchutil import timeit, report
+from XdY import XdY
+from XeY import XeY
+
+def add(lhs, rhs, method):
+   ''' Add two pools using the named convolution backend. '''
+   XdY.convolution = method
+   try:
+      return lhs + rhs
+   finally:
+      XdY.convolution = None
+
+# Pairs of pools to add, as (X, Y) descriptions.
+pairs = [ ((3,6), (2,6)),
+          ((20,10), (10,6)),
+          ((200,20), (100,10)),
+          ((1000,20), (500,20)),
+          ((5000,20), (2000,10)), ]
+
+def time_add(pair):
+   lhs, rhs = XdY(pair[0]), XdY(pair[1])
+   lhs + rhs
+time_add.params = pairs
+
+if __name__ == "__main__":
+   rows = []
+   for lhs, rhs in pairs:
+      a, b = XdY(lhs), XdY(rhs)
+      direct = timeit(add, a, b, 'direct')
+      fft = timeit(add, a, b, 'fft')
+      auto = timeit(add, a, b, None)
+      rows.append( ('%dd%d+%dd%d' % (lhs + rhs), len(a), len(b), direct, fft, auto) )
+   # Exploding pools have longer supports than their XdY counterparts.
+   a, b = XdY( (200,20) ), XeY( (100,10) )
+   rows.append( ('200d20+100e10', len(a), len(b), timeit(add, a, b, 'direct'),
+                 timeit(add, a, b, 'fft'), timeit(add, a, b, None)) )
+   report('Seconds to add two pools', rows,
+          ('pools', 'N', 'M', 'direct', 'fft', 'auto'))
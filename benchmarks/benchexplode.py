@@ -0,0 +1,44 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building the single die XeY distribution from the analytic
+number of explosion rounds against growing it one round at a time.
+'''
+
+import numpy
+
+from benchutil import timeit, report
+from cache import pools
+from XeY import XeY
+
+def grow(Y, error):
+   ''' The loop previously used by XeY.genDistribution for one die: add a
+       round of explosions and validate until the error is met. '''
+   pmf = XeY( (1,2) )
+   pmf.error = error
+   values = numpy.arange(1,Y+1)
+   probs = numpy.ones(Y) * 1.0/Y
+   probs[Y-1] = 0.0
+   count = 0
+   basevalues = values
+   baseprobs = probs
+   while not pmf.validateDistribution(numpy.array([values,probs])):
+      count += 1
+      values = numpy.concatenate((values, basevalues + count*Y))
+      probs = numpy.concatenate((probs, baseprobs ** (count+1)))
+   return values, probs
+
+def time_xey(Y):
+   pools.clear()
+   XeY( (1,Y), 1e-12 )
+time_xey.params = [2, 3, 6, 10, 20, 100]
+
+if __name__ == "__main__":
+   rows = []
+   for Y in time_xey.params:
+      analytic = timeit(XeY, (1,Y), 1e-12, setup=pools.clear)
+      loop = timeit(grow, Y, 1e-12)
+      rows.append( (Y, len(XeY( (1,Y), 1e-12 )), analytic, loop) )
+   report('Seconds to build 1eY with error 1e-12', rows,
+          ('Y', 'N', 'analytic', 'round loop'))
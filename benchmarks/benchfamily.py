@@ -0,0 +1,38 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building the pools of 1 to 100 dice of one size as a family
+table, against constructing each pool on its own.
+'''
+
+from benchutil import timeit, report
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+X_max = 100
+
+def separate(cls, Y, shared):
+   ''' Construct every pool on its own.  Unless shared, the pool cache is
+       cleared first so no pool reuses another. '''
+   for X in range(1,X_max+1):
+      if not shared:
+         pools.clear()
+      cls( (X,Y) )
+
+def time_family(cls, Y):
+   cls.family(Y, X_max)
+time_family.params = ([XdY, XeY, XhY], [6, 10, 20])
+
+if __name__ == "__main__":
+   rows = []
+   for cls in time_family.params[0]:
+      for Y in time_family.params[1]:
+         rows.append( ('%s Y=%d' % (cls.__name__, Y),
+                       timeit(separate, cls, Y, False, repeat=1),
+                       timeit(separate, cls, Y, True, setup=pools.clear),
+                       timeit(cls.family, Y, X_max)) )
+   report('Seconds to build the pools of 1 to %d dice' % (X_max,), rows,
+          ('pools', 'separate', 'shared cache', 'family'))
@@ -0,0 +1,57 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks the closed form XhY distribution against the binomial
+summation it replaced.
+'''
+
+import numpy
+
+from benchutil import timeit, report
+from cache import pools
+from extramath import combination
+from XhY import XhY
+
+def summation(X, Y):
+   ''' The O(YX) summation previously used by XhY.genDistribution. '''
+   probs = numpy.zeros(Y)
+   for Z in range(1,Y+1):
+      acc = 0
+      for i in range(1,X+1):
+         acc += combination(X,i) * (1.0/Y)**i * ((Z-1.0)/Y)**(X-i)
+      probs[Z-1] = acc
+   return probs
+
+def time_xhy(pool):
+   pools.clear()
+   XhY(pool)
+time_xhy.params = [(4,20), (50,100), (200,100), (2000,100)]
+
+def time_or(Y):
+   lhs, rhs = XhY( (3,Y) ), XhY( (4,Y) )
+   lhs | rhs
+   lhs & rhs
+time_or.params = [20, 1000, 100000]
+
+if __name__ == "__main__":
+   rows = []
+   for X, Y in time_xhy.params:
+      closed = timeit(XhY, (X,Y), setup=pools.clear)
+      try:
+         slow = timeit(summation, X, Y, repeat=1)
+         total = numpy.sum(summation(X, Y))
+      except OverflowError:
+         # The binomial coefficients overflow a float for large X.
+         slow = 'overflow'
+         total = 'overflow'
+      rows.append( ('%dh%d' % (X,Y), closed, slow, total) )
+   report('Seconds to build XhY', rows,
+          ('pool', 'closed form', 'summation', 'summation total'))
+
+   rows = []
+   for Y in time_or.params:
+      lhs, rhs = XhY( (3,Y) ), XhY( (4,Y) )
+      rows.append( (Y, timeit(lhs.__or__, rhs), timeit(lhs.__and__, rhs)) )
+   report('Seconds to take highest and lowest of 3hY and 4hY', rows,
+          ('Y', 'highest', 'lowest'))
@@ -0,0 +1,34 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building keep-highest pools by dynamic program, up to 50 dice
+of 20 faces, against enumerating every roll where that is feasible.
+'''
+
+import itertools
+
+import numpy
+
+from benchutil import timeit, report
+from cache import pools
+from XkY import XkY
+
+def enumeration(X, Y, K):
+   ''' Sums the K highest of every one of the Y**X rolls. '''
+   rolls = numpy.array(list(itertools.product(range(1,Y+1), repeat=X)))
+   totals = numpy.sort(rolls, axis=1)[:,-K:].sum(axis=1)
+   return numpy.bincount(totals)[K:] * 1.0 / len(rolls)
+
+def time_xky(X, Y, K):
+   pools.clear()
+   XkY( (X,Y,min(K,X)) )
+time_xky.params = ([4, 10, 25, 50], [6, 10, 20], [1, 3, 10])
+
+if __name__ == "__main__":
+   rows = []
+   for X, Y, K in [(4,6,3), (6,6,3), (10,10,5), (25,20,10), (50,20,10), (50,20,25), (50,20,50)]:
+      dp = timeit(time_xky, X, Y, K)
+      brute = timeit(enumeration, X, Y, K, repeat=1) if Y**X <= 10**6 else '-'
+      rows.append( ('%dk%d (d%d)' % (X,K,Y), dp, brute) )
+   report('Seconds to build XkY', rows, ('pool', 'dynamic program', 'enumeration'))
@@ -0,0 +1,61 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks lazy evaluation of dice expressions, which computes common
+subexpressions once and fuses chained additions, against eager
+evaluation.
+'''
+
+from benchutil import timeit, report
+from lazy import lazy
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+def eager_highest():
+   ''' (300d6+200e6) | (300d6+200e6) built eagerly. '''
+   a = XdY( (300,6) ) + XeY( (200,6) )
+   b = XdY( (300,6) ) + XeY( (200,6) )
+   return XhY.fromStorage(a.getStorage()) | b
+
+def lazy_highest():
+   a = lazy(XdY, (300,6)) + lazy(XeY, (200,6))
+   b = lazy(XdY, (300,6)) + lazy(XeY, (200,6))
+   return (a | b).evaluate()
+
+# Chains of pools to add, as (X, Y) descriptions.
+chains = [ ((3,6), (2,8), (1,20)),
+           ((200,20), (100,10), (50,6), (300,4), (80,12)),
+           ((2000,20), (1000,10), (500,6), (3000,4), (800,12), (1,100)), ]
+
+def eager_sum(chain):
+   total = XdY(chain[0])
+   for description in chain[1:]:
+      total = total + XdY(description)
+   return total
+
+def lazy_sum(chain):
+   total = lazy(XdY, chain[0])
+   for description in chain[1:]:
+      total = total + lazy(XdY, description)
+   return total.evaluate()
+
+def time_lazy_highest():
+   lazy_highest()
+
+def time_lazy_sum(chain):
+   lazy_sum(chain)
+time_lazy_sum.params = chains
+
+if __name__ == "__main__":
+   # Pools are cached after the first run, so only the arithmetic on
+   # them is timed.
+   rows = [ ('(300d6+200e6)|..', timeit(eager_highest), timeit(lazy_highest)) ]
+   for chain in chains:
+      name = '+'.join(['%dd%d' % description for description in chain])
+      if len(name) > 15:
+         name = '%d pools' % (len(chain),)
+      rows.append( (name, timeit(eager_sum, chain), timeit(lazy_sum, chain)) )
+   report('Seconds to evaluate dice expressions', rows,
+          ('expression', 'eager', 'lazy'))
@@ -0,0 +1,42 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks the pairwise comparison matrix against calling the comparison
+operator on every pair.
+'''
+
+from benchutil import timeit, report
+from PMF import comparisonMatrix
+from XdY import XdY
+
+def buildPools(n):
+   ''' Build n dice pools of assorted sizes. '''
+   return [XdY( (1 + i % 50, (6, 8, 10, 12)[i % 4]) ) for i in range(0,n)]
+
+def looped(pmfs):
+   ''' Compare every pair with the > operator. '''
+   return [[lhs > rhs for rhs in pmfs] for lhs in pmfs]
+
+def time_matrix(n):
+   comparisonMatrix(buildPools(n), '>')
+time_matrix.params = [100, 500, 2000]
+
+# The looped comparisons are only run up to this many pools; larger counts
+# are extrapolated quadratically from it.
+maxlooped = 100
+
+if __name__ == "__main__":
+   rows = []
+   for n in time_matrix.params:
+      pmfs = buildPools(n)
+      fast = timeit(comparisonMatrix, pmfs, '>')
+      if n <= maxlooped:
+         base = slow = timeit(looped, pmfs, repeat=1)
+         measured = n
+      else:
+         slow = base * (float(n) / measured) ** 2
+      rows.append( (n, fast, slow, slow / fast) )
+   report('P(A > B) for every pair of N dice pools (seconds)', rows,
+          ('N', 'matrix', 'looped', 'speedup'))
+   print('looped times beyond N=%d are quadratic extrapolations' % (maxlooped,))
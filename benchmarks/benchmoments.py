@@ -0,0 +1,32 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks the statistics of large pools from their analytic cumulants
+against building the distribution and taking its moments.
+'''
+
+from benchutil import timeit, report
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+def built(cls, X, Y):
+   ''' Build the pool and take its first four moments. '''
+   pmf = cls( (X,Y) )
+   return [pmf.moment(k) for k in range(1,5)]
+
+def time_statistics(cls, X, Y):
+   cls.poolStatistics(X, Y)
+time_statistics.params = ([XdY, XeY, XhY], [100, 10000], [6, 20])
+
+if __name__ == "__main__":
+   rows = []
+   for cls, X, Y in ( (XdY, 1000, 6), (XdY, 100000, 20), (XeY, 1000, 6),
+                      (XhY, 100000, 20) ):
+      rows.append( ('%s %dx%d' % (cls.__name__, X, Y),
+                    timeit(built, cls, X, Y, setup=pools.clear),
+                    timeit(cls.poolStatistics, X, Y)) )
+   report('Seconds for the moments of one pool', rows,
+          ('pool', 'built', 'analytic'))
@@ -0,0 +1,49 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks evaluating dice notation: compiling and computing a plan,
+looking up a cached one, and the eager left-to-right sum it replaces.
+'''
+
+from benchutil import timeit, report
+from cache import pools
+from notation import evaluate, plans, results
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+expressions = {
+   '3d6+2e8+4h10+5': lambda: XdY( (3,6) ) + XeY( (2,8) ) + XhY( (4,10) ) + 5,
+   '40d6+3d6+20e10+2d6+1': lambda: XdY( (40,6) ) + XdY( (3,6) ) + XeY( (20,10) ) + XdY( (2,6) ) + 1,
+   '100d20+1d4+1d6+1d8': lambda: XdY( (100,20) ) + XdY( (1,4) ) + XdY( (1,6) ) + XdY( (1,8) ),
+}
+
+def clearAll(*params):
+   pools.clear()
+   plans.clear()
+   results.clear()
+
+def time_compiled(text):
+   evaluate(text)
+time_compiled.params = sorted(expressions)
+time_compiled.setup = clearAll
+
+def time_cached(text):
+   evaluate(text)
+time_cached.params = sorted(expressions)
+
+def time_eager(text):
+   expressions[text]()
+time_eager.params = sorted(expressions)
+time_eager.setup = clearAll
+
+if __name__ == "__main__":
+   rows = []
+   for text in sorted(expressions):
+      evaluate(text)
+      rows.append( (text, timeit(time_eager, text, setup=clearAll),
+                    timeit(time_compiled, text, setup=clearAll),
+                    timeit(time_cached, text)) )
+   report('Seconds to evaluate dice notation', rows,
+          ('expression', 'eager', 'compiled', 'cached'))
@@ -0,0 +1,49 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks building XdY pools by repeated doubling against adding one
+die at a time.  Pools are built exactly; benchapprox.py times the
+approximation of large pools.
+'''
+
+from benchutil import timeit, report, exact
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+
+def chain(X, Y):
+   ''' Build XdY by adding X-1 single dice, as genDistribution once did. '''
+   basepmf = XdY( (1,Y) )
+   pmf = basepmf
+   for i in range(1,X):
+      pmf = pmf + basepmf
+   return pmf
+
+def time_xdy(X):
+   pools.clear()
+   with exact():
+      XdY( (X,6) )
+time_xdy.params = [10, 100, 1000, 10000]
+
+def time_xey(X):
+   pools.clear()
+   with exact():
+      XeY( (X,6) )
+time_xey.params = [10, 100, 1000]
+
+# The one at a time chain is only run up to this many dice; it takes
+# tens of seconds at 10000.
+maxchain = 10000
+
+if __name__ == "__main__":
+   rows = []
+   for X in time_xdy.params:
+      with exact():
+         doubling = timeit(XdY, (X,6), repeat=1, setup=pools.clear)
+      if X <= maxchain:
+         single = timeit(chain, X, 6, repeat=1)
+      else:
+         single = 'skipped'
+      rows.append( (X, doubling, single) )
+   report('Seconds to build Xd6', rows, ('X', 'doubling', 'one at a time'))
@@ -0,0 +1,41 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks long chains of XeY additions with and without pruning their
+tails, then comparing the result.
+'''
+
+from benchutil import timeit, report
+from XdY import XdY
+from XeY import XeY
+
+def chain(n, prunefraction):
+   ''' Add n pools of 10e6 onto 50d10, then compare the sum, pruning
+       with prunefraction over all n+1 operands.  Returns the sum. '''
+   XdY.prunefraction = prunefraction
+   XdY.pruneoperands = n+1
+   try:
+      total = XdY( (50,10) )
+      pool = XeY( (10,6) )
+      for i in range(0,n):
+         total = pool + total
+      total > total
+   finally:
+      del XdY.prunefraction
+      del XdY.pruneoperands
+   return total
+
+def time_chain(n, prunefraction):
+   chain(n, prunefraction)
+time_chain.params = ([10, 50, 200], [None, 0.1])
+
+if __name__ == "__main__":
+   rows = []
+   for n in time_chain.params[0]:
+      exact = chain(n, None)
+      pruned = chain(n, 0.1)
+      rows.append( (n, timeit(chain, n, None), timeit(chain, n, 0.1),
+                    len(exact), len(pruned), pruned.getDropped()) )
+   report('Adding N pools of 10e6 onto 50d10 and comparing (seconds)', rows,
+          ('N', 'exact', 'pruned', 'exact length', 'pruned length', 'dropped'))
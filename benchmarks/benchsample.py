@@ -0,0 +1,52 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks drawing samples from a PMF one at a time, in batches through
+the cached CDF and in batches through the alias table.
+'''
+
+import numpy
+
+from benchutil import timeit, report
+from PMF import PMF
+
+# Number of draws taken in each batch.
+draws = 1000000
+
+def skewed(n):
+   ''' Build a PMF over n values with uneven probabilities. '''
+   dist = numpy.zeros( (2,n) )
+   dist[0,:] = numpy.arange(1, 1+n)
+   dist[1,:] = numpy.random.RandomState(n).dirichlet(numpy.ones(n))
+   return PMF(dist)
+
+def time_cdf(n):
+   skewed(n).getSample(draws)
+time_cdf.params = [10, 1000, 100000]
+
+def time_alias(n):
+   skewed(n).getAliasSample(draws)
+time_alias.params = [10, 1000, 100000]
+
+# Single draws are slow, so fewer are taken and scaled up.
+singles = 10000
+
+def loop(pmf):
+   for i in range(0,singles):
+      pmf.getSample()
+
+if __name__ == "__main__":
+   rows = []
+   for n in time_cdf.params:
+      pmf = skewed(n)
+      # Build the cached tables before timing.
+      pmf.getCDF()
+      pmf.getAliasTable()
+      single = timeit(loop, pmf, repeat=1) * (draws / singles)
+      cdf = timeit(pmf.getSample, draws)
+      alias = timeit(pmf.getAliasSample, draws)
+      rows.append( (n, single, cdf, alias) )
+   report('Seconds to draw %d samples from a PMF of N values' % (draws,), rows,
+          ('N', 'getSample()', 'cdf batch', 'alias batch'))
+   print('getSample() times are scaled from %d single draws' % (singles,))
@@ -0,0 +1,34 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks Monte Carlo simulation of dice mechanics, by rule and by the
+number of processes.
+'''
+
+import multiprocessing
+
+from benchutil import timeit, report
+from simulate import simulate, Reroll, Explode, Total, Successes
+
+mechanics = {
+   'sum': ((), Total()),
+   'reroll': ([Reroll([1])], Total()),
+   'explode': ([Explode([9, 10])], Total()),
+   'successes': ([Reroll([1]), Explode([10])], Successes(8, [1])),
+}
+
+def time_simulate(mechanic, workers):
+   stages, reducer = mechanics[mechanic]
+   simulate(10, 10, stages, reducer, precision=0.0, maxtrials=400000,
+            workers=workers, seed=0)
+time_simulate.params = (sorted(mechanics), [1, 2])
+
+if __name__ == "__main__":
+   counts = sorted(set([1, 2, multiprocessing.cpu_count()]))
+   rows = []
+   for mechanic in sorted(mechanics):
+      rows.append( [mechanic] + [timeit(time_simulate, mechanic, workers)
+                                 for workers in counts] )
+   report('Seconds to simulate 400000 rolls of 10d10', rows,
+          ['mechanic'] + ['%d workers' % (workers,) for workers in counts])
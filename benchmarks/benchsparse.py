@@ -0,0 +1,64 @@
+'''
+Bryan Bonvallet
+2014
+
+Benchmarks dense and sparse convolution for XdY addition of pools whose
+supports are mostly gaps, such as scaled dice.
+'''
+
+from benchutil import timeit, report
+import extramath
+from XdY import XdY
+
+def scaled(X, Y, scale):
+   ''' Build XdY with every value multiplied by scale. '''
+   pool = XdY( (X,Y) )
+   dist = pool.getDistribution()
+   dist[0,:] *= scale
+   return XdY(dist)
+
+def add(lhs, rhs, sparsefill):
+   ''' Add two pools with the given sparse fill ratio threshold.  A
+       threshold of 0 forces dense addition, 2 forces sparse addition. '''
+   default = extramath.sparsefill
+   extramath.sparsefill = sparsefill
+   try:
+      return lhs + rhs
+   finally:
+      extramath.sparsefill = default
+
+def nbytes(pmf):
+   ''' Bytes of the arrays stored by pmf. '''
+   offset, values, probs = pmf.getStorage()
+   if values is None:
+      return probs.nbytes
+   return values.nbytes + probs.nbytes
+
+# Pairs of pools to add, as (X, Y, scale) descriptions.
+pairs = [ ((1,6,1), (1,2,100)),
+          ((1,6,1), (1,2,1000)),
+          ((1,10,100), (1,10,100)),
+          ((10,6,1), (3,2,1000)),
+          ((1,20,1000), (1,20,1000)),
+          ((2,100,1000), (2,100,997)), ]
+
+def time_add(pair):
+   lhs, rhs = scaled(*pair[0]), scaled(*pair[1])
+   lhs + rhs
+time_add.params = pairs
+
+if __name__ == "__main__":
+   rows = []
+   for lhs, rhs in pairs:
+      a, b = scaled(*lhs), scaled(*rhs)
+      dense = add(a, b, 0)
+      sparse = add(a, b, 2)
+      # Share of the dense support holding no sum of the two pools.
+      gaps = 1 - len(sparse) / float(len(dense))
+      rows.append( ('%dd%dx%d+%dd%dx%d' % (lhs + rhs), '%.1f%%' % (100*gaps,),
+                    timeit(add, a, b, 0), timeit(add, a, b, 2),
+                    timeit(add, a, b, extramath.sparsefill),
+                    nbytes(dense), nbytes(sparse)) )
+   report('Seconds and stored bytes to add two scaled pools', rows,
+          ('pools', 'gaps', 'dense', 'sparse', 'auto', 'dense bytes',
+           'sparse bytes'))
@@ -0,0 +1,101 @@
+'''
+Bryan Bonvallet
+2014
+
+The core benchmark suite: construction, addition, take-highest,
+comparisons, moments and sampling for every distribution class, over pool
+sizes, die sizes and error values.  Run it, and every other benchmark,
+with runbench.py to record and compare results.
+'''
+
+import numpy
+
+from benchutil import timeit, report, exact
+from cache import pools
+from PMF import PMF
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+classes = [XdY, XeY, XhY]
+sizes = [10, 100]
+faces = [6, 20]
+errors = [1e-5, 1e-8]
+
+# Operands built once per parameters, so only the operation is timed.
+operands = {}
+
+def operand(cls, X, Y, error):
+   ''' Returns the pool of cls with X dice of Y faces, built once. '''
+   key = (cls, X, Y, error)
+   if key not in operands:
+      operands[key] = cls( (X,Y), error )
+   return operands[key]
+
+def fresh(cls, X, Y, error):
+   ''' Returns a new object sharing the arrays of operand(), so nothing
+       derived from the distribution is cached yet. '''
+   return cls.fromStorage(operand(cls, X, Y, error).getStorage(), error)
+
+# Fresh objects made by setup before each timing, by benchmark.
+prepared = {}
+
+def clearPools(*params):
+   pools.clear()
+
+def time_construct(cls, X, Y, error):
+   with exact():
+      cls( (X,Y), error )
+time_construct.params = (classes, sizes, faces, errors)
+time_construct.setup = clearPools
+
+def time_add(cls, X, Y, error):
+   operand(cls, X, Y, error) + operand(cls, X, Y, error)
+time_add.params = ([XdY, XeY], sizes, faces, errors)
+
+def time_highest(cls, X, Y, error):
+   operand(XhY, X, Y, error) | operand(cls, X, Y, error)
+time_highest.params = (classes, sizes, faces, errors)
+
+comparisons = {'<': PMF.__lt__, '==': PMF.__eq__, '>': PMF.__gt__}
+
+def prepareCompare(op, cls, X, Y, error):
+   prepared['compare'] = (fresh(cls, X, Y, error), fresh(cls, X+1, Y, error))
+
+def time_compare(op, cls, X, Y, error):
+   lhs, rhs = prepared['compare']
+   comparisons[op](lhs, rhs)
+time_compare.params = (sorted(comparisons), classes, sizes, faces, errors)
+time_compare.setup = prepareCompare
+
+def prepareMoment(cls, X, Y, error):
+   prepared['moment'] = fresh(cls, X, Y, error)
+
+def time_moment(cls, X, Y, error):
+   pmf = prepared['moment']
+   pmf.EV()
+   pmf.moment(2)
+time_moment.params = (classes, sizes, faces, errors)
+time_moment.setup = prepareMoment
+
+def prepareSample(method, cls, X, Y, error):
+   prepared['sample'] = fresh(cls, X, Y, error)
+
+def time_sample(method, cls, X, Y, error):
+   getattr(prepared['sample'], method)(10000)
+time_sample.params = (['getSample', 'getAliasSample'], classes, sizes, faces, [1e-5])
+time_sample.setup = prepareSample
+
+if __name__ == "__main__":
+   rows = []
+   for cls in classes:
+      for X in sizes:
+         rows.append( ('%s %dx6' % (cls.__name__, X),
+                       timeit(time_construct, cls, X, 6, 1e-5, setup=pools.clear),
+                       timeit(time_highest, cls, X, 6, 1e-5),
+                       timeit(time_compare, '<', cls, X, 6, 1e-5,
+                              setup=lambda: prepareCompare('<', cls, X, 6, 1e-5)),
+                       timeit(time_moment, cls, X, 6, 1e-5,
+                              setup=lambda: prepareMoment(cls, X, 6, 1e-5))) )
+   report('Seconds per operation', rows,
+          ('pool', 'construct', 'highest', 'compare', 'moment'))
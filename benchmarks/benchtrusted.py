@@ -0,0 +1,82 @@
+'''
+Bryan Bonvallet
+2014
+
+Counts the validations, casts, numpy.matrix round trips and bytes of
+arrays copied by casts in one XdY addition, and times it, for the
+trusted result path against the validating constructor path it replaced.
+'''
+
+import numpy
+
+from benchutil import timeit, report
+from PMF import PMF
+from XdY import XdY
+from extramath import convolve
+
+def legacyadd(lhs, rhs):
+   ''' Addition as it was before results were built as trusted: validate
+       and re-wrap the operand, then build the result through the
+       constructor. '''
+   if not lhs.validateDistribution(rhs):
+      raise TypeError('Invalid distribution for addition')
+   rhs = lhs.__class__(rhs, lhs.error)
+   aprob = lhs.getDistribution(1)
+   bprob = rhs.getDistribution(1)
+   outputprob = convolve(aprob, bprob)
+   minoutputvalue = lhs[0,0] + rhs[0,0]
+   outputvalue = numpy.arange(len(outputprob)) + minoutputvalue
+   return lhs.__class__(numpy.array([outputvalue, outputprob]), lhs.error)
+
+class Counter:
+   ''' Counts calls to the PMF validation and cast methods and to
+       numpy.matrix while it is installed, along with the bytes of the
+       arrays they return. '''
+
+   def __init__(self):
+      self.counts = {'validateDistribution': 0, 'castToDistribution': 0,
+                     'numpy.matrix': 0, 'bytes': 0}
+
+   def wrap(self, name, func):
+      def counted(*args, **kwargs):
+         self.counts[name] += 1
+         out = func(*args, **kwargs)
+         if isinstance(out, numpy.ndarray):
+            self.counts['bytes'] += out.nbytes
+         return out
+      return counted
+
+   def run(self, func, *args):
+      ''' Call func(*args) with counting installed. '''
+      validate = PMF.validateDistribution
+      cast = PMF.castToDistribution
+      matrix = numpy.matrix
+      PMF.validateDistribution = self.wrap('validateDistribution', validate)
+      PMF.castToDistribution = self.wrap('castToDistribution', cast)
+      numpy.matrix = self.wrap('numpy.matrix', matrix)
+      try:
+         func(*args)
+      finally:
+         PMF.validateDistribution = validate
+         PMF.castToDistribution = cast
+         numpy.matrix = matrix
+      return self.counts
+
+def time_add(X):
+   lhs, rhs = XdY( (X,6) ), XdY( (X,8) )
+   lhs + rhs
+time_add.params = [1, 10, 100]
+
+if __name__ == "__main__":
+   rows = []
+   for X in time_add.params:
+      lhs, rhs = XdY( (X,6) ), XdY( (X,8) )
+      for name, func in ( ('legacy', legacyadd), ('trusted', XdY.__add__) ):
+         counts = Counter().run(func, lhs, rhs)
+         rows.append( ('%dd6+%dd8' % (X,X), name,
+                       counts['validateDistribution'],
+                       counts['castToDistribution'], counts['numpy.matrix'],
+                       counts['bytes'], timeit(func, lhs, rhs)) )
+   report('Work done by one addition', rows,
+          ('pools', 'path', 'validations', 'casts', 'matrix', 'bytes',
+           'seconds'))
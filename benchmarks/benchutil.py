@@ -0,0 +1,60 @@
+'''
+Bryan Bonvallet
+2014
+
+This file contains helper functions shared by the benchmarks.
+Benchmarks may be run directly, e.g. python benchmarks/benchcompare.py,
+or all together against a stored baseline with benchmarks/runbench.py.
+'''
+
+import contextlib
+import os
+import sys
+import time
+
+# Allow the benchmarks to import the modules they measure.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def timeit(func, *args, **kwargs):
+   ''' Return the best wall time in seconds of calling func(*args) several
+       times.  The keyword repeat sets how many times (default 3).  The
+       keyword setup is an untimed function called before each call. '''
+   repeat = kwargs.pop('repeat', 3)
+   setup = kwargs.pop('setup', None)
+   best = None
+   for i in range(0,repeat):
+      if setup is not None:
+         setup()
+      start = time.time()
+      func(*args)
+      elapsed = time.time() - start
+      if best is None or elapsed < best:
+         best = elapsed
+   return best
+
+def report(title, rows, header):
+   ''' Print a table of benchmark results.  rows is a list of tuples
+       matching the column names in header. '''
+   print(title)
+   print(''.join(['%16s' % (name,) for name in header]))
+   for row in rows:
+      cells = []
+      for cell in row:
+         if isinstance(cell, float):
+            cells.append('%16.6g' % (cell,))
+         else:
+            cells.append('%16s' % (cell,))
+      print(''.join(cells))
+
+@contextlib.contextmanager
+def exact():
+   ''' Context manager that builds pools from [X, Y] exactly for its
+       duration, whatever XdY.approximation is set to, so benchmarks of
+       exact construction do not time the approximation instead. '''
+   from XdY import XdY
+   saved = XdY.approximation
+   XdY.approximation = 'exact'
+   try:
+      yield
+   finally:
+      XdY.approximation = saved
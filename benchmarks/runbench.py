@@ -0,0 +1,159 @@
+'''
+Bryan Bonvallet
+2014
+
+Runs the benchmarks, records their results as JSON and compares them with
+a stored baseline.
+
+Every function named time_* in the benchmark modules is a benchmark, as
+in asv.  Its params attribute lists the values of its one parameter, or
+is a tuple of such lists for several parameters, every combination of
+which is run.  An optional setup attribute is called with the same
+parameters before each timing, untimed.
+
+   python benchmarks/runbench.py --output baseline.json
+   ... change the code ...
+   python benchmarks/runbench.py --baseline baseline.json --threshold 0.2
+
+Each benchmark is run once to warm up and then timed as the best of
+--repeat runs, with numpy.random seeded first so sampling is
+reproducible.  The exit status is 1 when any benchmark is slower than the
+baseline by more than the threshold, a fraction of its baseline time.
+'''
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import platform
+import re
+import sys
+
+import numpy
+
+from benchutil import timeit, report
+
+def benchmarkModules():
+   ''' Returns the names of the benchmark modules beside this one. '''
+   here = os.path.dirname(os.path.abspath(__file__))
+   names = [os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(os.path.join(here, 'bench*.py'))]
+   return sorted([name for name in names if name != 'benchutil'])
+
+def paramName(value):
+   ''' Returns the name of a benchmark parameter. '''
+   if isinstance(value, type):
+      return value.__name__
+   return str(value)
+
+def expandParams(func):
+   ''' Returns the list of argument tuples func is run with. '''
+   params = getattr(func, 'params', None)
+   if params is None:
+      return [()]
+   if isinstance(params, tuple):
+      return list(itertools.product(*params))
+   return [(value,) for value in params]
+
+def collect(modules, pattern=None):
+   ''' Returns (name, func, args) for every benchmark in the named modules
+       whose name matches the regular expression pattern. '''
+   benchmarks = []
+   for modulename in modules:
+      module = __import__(modulename)
+      for attr in sorted(dir(module)):
+         func = getattr(module, attr)
+         if not attr.startswith('time_') or not callable(func):
+            continue
+         for args in expandParams(func):
+            name = '%s.%s(%s)' % (modulename, attr,
+                                  ', '.join([paramName(arg) for arg in args]))
+            if pattern is None or re.search(pattern, name):
+               benchmarks.append( (name, func, args) )
+   return benchmarks
+
+def run(benchmarks, repeat=3, verbose=False):
+   ''' Times the benchmarks and returns their best times by name. '''
+   results = {}
+   for name, func, args in benchmarks:
+      setup = getattr(func, 'setup', None)
+      numpy.random.seed(0)
+      if setup is not None:
+         setup(*args)
+      func(*args)
+      results[name] = timeit(func, *args, repeat=repeat,
+                             setup=None if setup is None else lambda: setup(*args))
+      if verbose:
+         print('%-70s %12.6g' % (name, results[name]))
+   return results
+
+def environment():
+   ''' Returns a description of the machine the results come from. '''
+   return {'python': platform.python_version(),
+           'numpy': numpy.__version__,
+           'machine': platform.machine(),
+           'platform': platform.platform()}
+
+def compare(results, baseline, threshold):
+   ''' Returns rows (name, baseline, result, ratio, status) for every
+       benchmark in both results and baseline, and the number of them
+       that regressed by more than threshold. '''
+   rows = []
+   regressions = 0
+   for name in sorted(results):
+      if name not in baseline:
+         continue
+      ratio = results[name] / baseline[name] if baseline[name] > 0 else float('inf')
+      if ratio > 1.0 + threshold:
+         status = 'slower'
+         regressions += 1
+      elif ratio < 1.0 / (1.0 + threshold):
+         status = 'faster'
+      else:
+         status = ''
+      rows.append( (name, baseline[name], results[name], ratio, status) )
+   return rows, regressions
+
+def main(argv=None):
+   parser = argparse.ArgumentParser(description='Run the DieStatistician benchmarks.')
+   parser.add_argument('modules', nargs='*', default=None,
+                       help='benchmark modules to run (default: all)')
+   parser.add_argument('-k', dest='pattern', default=None,
+                       help='only run benchmarks whose name matches this regular expression')
+   parser.add_argument('--repeat', type=int, default=3,
+                       help='timed runs per benchmark, of which the best is kept')
+   parser.add_argument('--output', default=None,
+                       help='write the results as JSON to this file')
+   parser.add_argument('--baseline', default=None,
+                       help='compare with the results stored in this JSON file')
+   parser.add_argument('--threshold', type=float, default=0.25,
+                       help='slowdown, as a fraction of the baseline, counted as a regression')
+   parser.add_argument('-v', '--verbose', action='store_true',
+                       help='print each result as it is measured')
+   args = parser.parse_args(argv)
+
+   benchmarks = collect(args.modules or benchmarkModules(), args.pattern)
+   results = run(benchmarks, args.repeat, args.verbose)
+   if args.output:
+      with open(args.output, 'w') as out:
+         json.dump({'environment': environment(), 'results': results}, out,
+                   indent=1, sort_keys=True)
+
+   if not args.baseline:
+      report('Best of %d runs (seconds)' % (args.repeat,),
+             sorted(results.items()), ('benchmark', 'time'))
+      return 0
+   with open(args.baseline) as stored:
+      baseline = json.load(stored)
+   if baseline.get('environment') != environment():
+      print('warning: the baseline comes from a different environment')
+   rows, regressions = compare(results, baseline['results'], args.threshold)
+   report('Against %s (seconds)' % (args.baseline,), rows,
+          ('benchmark', 'baseline', 'result', 'ratio', ''))
+   print('%d of %d benchmarks regressed by more than %g%%' %
+         (regressions, len(rows), 100 * args.threshold))
+   return 1 if regressions else 0
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -0,0 +1,114 @@
+'''
+Bryan Bonvallet
+2014
+
+This module stores a memory bounded cache of dice pool distributions.
+
+Building a pool such as XdY((3,6)) recomputes the distribution from
+scratch.  The distributions depend only on the class, the number of dice
+X, the number of faces Y and the error, so they are shared through a
+process-wide cache, pools, keyed on (class, X, Y, error).  The least
+recently used pools are evicted once the cache exceeds its memory budget.
+'''
+
+import numpy
+from collections import OrderedDict
+
+def arrays(distribution):
+   ''' Returns the arrays making up a distribution stored in the cache,
+       which is either an array or a tuple holding arrays. '''
+   if isinstance(distribution, tuple):
+      return [item for item in distribution if isinstance(item, numpy.ndarray)]
+   return [distribution]
+
+def nbytes(distribution):
+   ''' Returns the total bytes of the arrays making up a distribution. '''
+   return sum([array.nbytes for array in arrays(distribution)])
+
+class DistributionCache:
+   ''' Least recently used cache of distributions, bounded by the total
+       bytes of the arrays they hold.  A distribution is an array or a
+       tuple holding arrays, such as the stored form from
+       PMF.getStorage().  Stored arrays are made read-only since they are
+       shared by every object built from them. '''
+
+   def __init__(self, budget=64*1024*1024):
+      ''' Instantiate an empty cache holding at most budget bytes. '''
+      self.budget = budget
+      self.entries = OrderedDict()
+      self.size = 0
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+
+   def get(self, key):
+      ''' Returns the distribution stored under key, or None.  A hit marks
+          the entry as most recently used. '''
+      try:
+         distribution = self.entries.pop(key)
+      except KeyError:
+         self.misses += 1
+         return None
+      self.entries[key] = distribution
+      self.hits += 1
+      return distribution
+
+   def store(self, key, distribution):
+      ''' Stores the distribution under key with read-only arrays, then
+          evicts least recently used entries until the cache fits its
+          budget.  Distributions larger than the budget are not stored. '''
+      size = nbytes(distribution)
+      if size > self.budget:
+         return
+      if key in self.entries:
+         self.size -= nbytes(self.entries.pop(key))
+      for array in arrays(distribution):
+         array.flags.writeable = False
+      self.entries[key] = distribution
+      self.size += size
+      self.evict()
+
+   def evict(self):
+      ''' Removes least recently used entries until the cache fits. '''
+      while self.size > self.budget:
+         key, distribution = self.entries.popitem(last=False)
+         self.size -= nbytes(distribution)
+         self.evictions += 1
+
+   def largest(self, cls, X, Y, error):
+      ''' Returns (X', distribution) for the cached pool of cls with the
+          most dice X' < X, for the same Y and error.  Returns None if no
+          such pool is cached. '''
+      best = None
+      for key in self.entries:
+         if key[0] is cls and key[2] == Y and key[3] == error and key[1] < X:
+            if best is None or key[1] > best:
+               best = key[1]
+      if best is None:
+         return None
+      return best, self.get( (cls, best, Y, error) )
+
+   def setBudget(self, budget):
+      ''' Sets the memory budget in bytes, evicting entries if needed. '''
+      self.budget = budget
+      self.evict()
+
+   def clear(self):
+      ''' Removes every entry and resets the statistics. '''
+      self.entries.clear()
+      self.size = 0
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+
+   def statistics(self):
+      ''' Returns a dictionary of cache statistics. '''
+      return {'hits': self.hits,
+              'misses': self.misses,
+              'evictions': self.evictions,
+              'entries': len(self.entries),
+              'bytes': self.size,
+              'budget': self.budget}
+
+# The cache shared by every dice pool class.
+pools = DistributionCache()
@@ -5,6 +5,10 @@ Bryan Bonvallet
 This file contains extra math functions needed for Die Statistician.
 '''
 
+import math
+import time
+import numpy
+
 def factorial(x):
    ''' Find the value of x!  Might operate strangely on non-integers. '''
    acc = 1
@@ -20,3 +24,202 @@ def permutation(n,r):
 def combination(n,k):
    ''' Calculate the combination of n C k. '''
    return permutation(n,k) / factorial(k)
+
+def uniformCumulants(n):
+   ''' Return the first four cumulants of the uniform distribution over
+       1..n as an array. '''
+   n2 = float(n) * n
+   return numpy.array([(n + 1) / 2.0, (n2 - 1) / 12.0, 0.0,
+                       -(n2 - 1) * (n2 + 1) / 120.0])
+
+# math.erfc over arrays.
+erfc = numpy.vectorize(math.erfc, otypes=[float])
+
+def normalCDF(z):
+   ''' Return the standard normal CDF at each of z. '''
+   return 0.5 * erfc(-numpy.asarray(z) / numpy.sqrt(2.0))
+
+def edgeworthCDF(x, cumulants):
+   ''' Return the CDF at each of x of a distribution with the first four
+       cumulants given, by the Edgeworth expansion to second order in the
+       skewness and kurtosis.  Sums of many independent variables approach
+       it with an error falling as their count to the -3/2. '''
+   mean, variance, k3, k4 = cumulants
+   sd = numpy.sqrt(variance)
+   skewness = k3 / sd**3
+   kurtosis = k4 / variance**2
+   z = (numpy.asarray(x) - mean) / sd
+   z2 = z * z
+   density = numpy.exp(-z2 / 2.0) / numpy.sqrt(2.0 * numpy.pi)
+   correction = skewness / 6.0 * (z2 - 1.0) + \
+                kurtosis / 24.0 * z * (z2 - 3.0) + \
+                skewness**2 / 72.0 * z * (z2*z2 - 10.0*z2 + 15.0)
+   return normalCDF(z) - density * correction
+
+# Relative cost of one FFT operation to one multiply-add of the direct
+# convolution.  convolve() switches to the FFT once N*M direct operations
+# cost more than fftcrossover * L*log2(L), where L is the padded FFT length.
+# calibrateConvolution() measures this for the running machine.
+fftcrossover = 16.0
+
+def fftlength(n):
+   ''' Return the power of two FFT length needed to hold n values. '''
+   return 1 << int(numpy.ceil(numpy.log2(max(n,1))))
+
+def directconvolve(a, b):
+   ''' Convolve two probability vectors directly in O(NM). '''
+   return numpy.convolve(a, b)
+
+def fftconvolve(a, b):
+   ''' Convolve two probability vectors with a real FFT in O(L log L).
+       Round-off may leave tiny negative values or values above one; these
+       are clipped and the result rescaled so it keeps the total
+       probability of sum(a)*sum(b). '''
+   n = len(a) + len(b) - 1
+   size = fftlength(n)
+   out = numpy.fft.irfft(numpy.fft.rfft(a, size) * numpy.fft.rfft(b, size), size)[:n]
+   out = numpy.clip(out, 0.0, 1.0)
+   total = numpy.sum(out)
+   if total > 0:
+      out *= numpy.sum(a) * numpy.sum(b) / total
+   return out
+
+# Convolution backends by name.  Further backends may be registered here.
+convolvers = {'direct': directconvolve, 'fft': fftconvolve}
+
+def convolve(a, b, method=None):
+   ''' Convolve two probability vectors.  method names an entry of
+       convolvers; if None, the cheaper of direct and FFT convolution is
+       chosen from the lengths of a and b. '''
+   if method is None:
+      size = fftlength(len(a) + len(b) - 1)
+      if len(a) * len(b) > fftcrossover * size * numpy.log2(size):
+         method = 'fft'
+      else:
+         method = 'direct'
+   return convolvers[method](a, b)
+
+# Fill ratio below which sums are taken by sparse convolution.  The fill
+# ratio of a sum is the number of value pairs N*M over the span of the
+# dense integer support it would otherwise need, and bounds the fraction
+# of that support which is not a gap.
+sparsefill = 0.5
+
+def fillratio(avalues, bvalues):
+   ''' Return the fill ratio of the sum of two distributions with the
+       sorted integer values avalues and bvalues. '''
+   span = (avalues[-1] - avalues[0]) + (bvalues[-1] - bvalues[0]) + 1
+   return len(avalues) * len(bvalues) / float(span)
+
+def issparse(avalues, bvalues):
+   ''' Return True if the sum of two distributions with the sorted
+       integer values avalues and bvalues should be taken by sparse
+       convolution, its fill ratio being below sparsefill. '''
+   return fillratio(avalues, bvalues) < sparsefill
+
+def sparseconvolve(avalues, aprobs, bvalues, bprobs):
+   ''' Convolve two distributions given as value and probability arrays.
+       Every pair of values is summed and equal sums are aggregated, in
+       O(NM log NM) regardless of the gaps between values.  The values
+       need not be integers.  Returns the sorted distinct sums and their
+       probabilities. '''
+   sums = numpy.add.outer(avalues, bvalues).ravel()
+   probs = numpy.outer(aprobs, bprobs).ravel()
+   values, inverse = numpy.unique(sums, return_inverse=True)
+   return values, numpy.bincount(inverse, weights=probs)
+
+def multiconvolve(vectors, method=None):
+   ''' Convolve any number of probability vectors.  With method 'fft'
+       each vector is transformed once at the length of the whole result,
+       the transforms are multiplied and a single inverse transform is
+       taken.  With method 'pairwise' the vectors are convolved pairwise
+       with convolve(), smallest first, so the longest vectors meet last;
+       'direct' does the same with direct convolution only.  If method is
+       None, the cheaper of fused and pairwise is chosen. '''
+   vectors = sorted(vectors, key=len)
+   if len(vectors) == 1:
+      return vectors[0]
+   n = sum([len(vector) for vector in vectors]) - len(vectors) + 1
+   size = fftlength(n)
+   if method is None:
+      # One transform costs about a third of an FFT convolution.
+      fused = fftcrossover * size * numpy.log2(size) * (len(vectors) + 1) / 3.0
+      pairwise = 0.0
+      length = len(vectors[0])
+      for vector in vectors[1:]:
+         step = fftlength(length + len(vector) - 1)
+         pairwise += min(length * len(vector),
+                         fftcrossover * step * numpy.log2(step))
+         length += len(vector) - 1
+      method = 'fft' if fused < pairwise else 'pairwise'
+   if method != 'fft':
+      out = vectors[0]
+      for vector in vectors[1:]:
+         out = convolve(out, vector, None if method == 'pairwise' else method)
+      return out
+   product = numpy.ones(size // 2 + 1, dtype=complex)
+   for vector in vectors:
+      product *= numpy.fft.rfft(vector, size)
+   out = numpy.fft.irfft(product, size)[:n]
+   # As in fftconvolve(), clip round-off and keep the total probability.
+   out = numpy.clip(out, 0.0, 1.0)
+   total = numpy.sum(out)
+   if total > 0:
+      out *= numpy.prod([numpy.sum(vector) for vector in vectors]) / total
+   return out
+
+def convolvePowers(a, n, method=None):
+   ''' Return the convolutions of a with itself 1 to n times, as the rows
+       of an n by n*(len(a)-1)+1 array.  Row k-1 holds a convolved k
+       times, starting at column 0 and padded with zeros.  With method
+       'fft' a is transformed once and each row is one inverse transform
+       of a power of it; with 'direct' each row convolves the one before
+       with a.  If method is None, the cheaper is chosen. '''
+   m = len(a)
+   width = n*(m-1) + 1
+   size = fftlength(width)
+   if method is None:
+      direct = sum([(k*(m-1) + 1) * m for k in range(0,n)])
+      fft = fftcrossover * size * numpy.log2(size) * n / 3.0
+      method = 'fft' if fft < direct else 'direct'
+   rows = numpy.zeros( (n, width) )
+   if method == 'fft':
+      transform = numpy.fft.rfft(a, size)
+      power = numpy.ones(size // 2 + 1, dtype=complex)
+      total = 1.0
+      for k in range(1,n+1):
+         power *= transform
+         total *= numpy.sum(a)
+         length = k*(m-1) + 1
+         row = numpy.clip(numpy.fft.irfft(power, size)[:length], 0.0, 1.0)
+         # As in fftconvolve(), keep the total probability.
+         rows[k-1,:length] = row * (total / numpy.sum(row))
+   else:
+      row = a
+      rows[0,:m] = a
+      for k in range(2,n+1):
+         row = numpy.convolve(row, a)
+         rows[k-1,:len(row)] = row
+   return rows
+
+def calibrateConvolution(lengths=(64, 256, 1024, 4096), repeat=3):
+   ''' Measure direct and FFT convolution on this machine and set
+       fftcrossover accordingly.  Returns the new fftcrossover. '''
+   global fftcrossover
+   ratios = []
+   for n in lengths:
+      a = numpy.ones(n) / n
+      b = numpy.ones(4*n) / (4*n)
+      size = fftlength(5*n - 1)
+      direct = min([timed(directconvolve, a, b) for i in range(0,repeat)])
+      fft = min([timed(fftconvolve, a, b) for i in range(0,repeat)])
+      # Cost per operation of each method, relative to each other.
+      ratios.append( (fft / (size * numpy.log2(size))) / (direct / (4.0*n*n)) )
+   fftcrossover = float(numpy.median(ratios))
+   return fftcrossover
+
+def timed(func, *args):
+   ''' Return the wall time in seconds of calling func(*args) once. '''
+   start = time.time()
+   func(*args)
+   return time.time() - start
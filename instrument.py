@@ -0,0 +1,177 @@
+'''
+Bryan Bonvallet
+2014
+
+Opt-in instrumentation of the hot paths of PMF, XdY, XeY, XhY and XkY,
+and of the lazy expressions in lazy.py.
+
+While recording, each instrumented method counts its calls, their
+cumulative wall time and the support size and array bytes of what it
+returns, per operation and class.  Times include nested operations, so
+XdY.__add__ includes the XdY.addDistribution convolution it calls.
+Lazy expressions are counted as Sum.build, Highest.build and
+Lowest.build, with the one-shot lazy.multiconvolve and lazy.alignCDFs
+they call.
+
+   from instrument import recording
+   with recording() as counters:
+      XdY( (100,6) ) + XeY( (10,6) )
+   counters.snapshot()
+   counters.toJSON()
+
+Instrumentation works by replacing the methods with timed wrappers while
+enabled and restoring the originals when disabled, so it costs nothing
+at all when it is off.
+'''
+
+import contextlib
+import json
+import time
+
+import numpy
+
+import lazy
+from cache import nbytes
+from PMF import PMF
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+from XkY import XkY
+
+# Methods instrumented on each class, or functions on each module.
+# Subclasses that inherit methods are counted under their own names.
+targets = [
+   (PMF, ['validateDistribution', 'castToDistribution', 'castOperand',
+          '__lt__', '__eq__', 'getCDFAt', 'getSample', 'getAliasSample',
+          'buildAliasTable', 'pruneTails', 'getCumulants', 'shift', 'scale']),
+   (XdY, ['__add__', 'addDistribution', 'genDistribution', 'genDie',
+          'genPool', 'genApproximation', 'family']),
+   (XeY, ['genDie']),
+   (XhY, ['genDistribution', '__or__', '__and__', 'fromCDF', 'family']),
+   (XkY, ['genDistribution', 'family']),
+   (lazy, ['multiconvolve', 'alignCDFs']),
+   (lazy.Sum, ['build']),
+   (lazy.Highest, ['build']),
+   (lazy.Lowest, ['build']),
+]
+
+class Counters(object):
+   ''' Counts of the calls, wall time, support sizes and bytes returned
+       by each operation, keyed on 'Class.method'. '''
+
+   def __init__(self):
+      self.operations = {}
+
+   def record(self, name, seconds, result):
+      ''' Adds one call of the operation name, taking seconds and
+          returning result. '''
+      try:
+         counts = self.operations[name]
+      except KeyError:
+         counts = self.operations[name] = {'calls': 0, 'seconds': 0.0,
+                                           'values': 0, 'bytes': 0}
+      counts['calls'] += 1
+      counts['seconds'] += seconds
+      values, size = measure(result)
+      counts['values'] += values
+      counts['bytes'] += size
+
+   def snapshot(self):
+      ''' Returns a copy of the counts as a dictionary of dictionaries. '''
+      return dict([(name, dict(counts)) for name, counts in self.operations.items()])
+
+   def toJSON(self):
+      ''' Returns the counts as a JSON string. '''
+      return json.dumps(self.snapshot(), indent=1, sort_keys=True)
+
+   def reset(self):
+      ''' Forgets every count. '''
+      self.operations.clear()
+
+# The counters instrumented methods record into.
+counters = Counters()
+
+def measure(result):
+   ''' Returns the support size and array bytes of the result of an
+       operation, which are 0 for results that are not distributions or
+       arrays. '''
+   if isinstance(result, PMF):
+      return len(result), nbytes(result.getStorage())
+   if isinstance(result, numpy.ndarray):
+      return result.shape[-1] if result.ndim else 1, result.nbytes
+   return 0, 0
+
+def timed(func, owner, attr):
+   ''' Returns func wrapped to record each call in counters.  The
+       operation is named after the class of the first argument, or after
+       owner, a class or module, when there is none. '''
+   def wrapper(*args, **kwargs):
+      start = time.time()
+      result = func(*args, **kwargs)
+      elapsed = time.time() - start
+      if args and isinstance(args[0], type):
+         cls = args[0]
+      elif args and isinstance(args[0], PMF):
+         cls = type(args[0])
+      else:
+         cls = owner
+      counters.record('%s.%s' % (cls.__name__, attr), elapsed, result)
+      return result
+   wrapper.__name__ = func.__name__
+   wrapper.__doc__ = func.__doc__
+   return wrapper
+
+# Original attributes replaced while enabled, keyed on (owner, name).
+originals = {}
+
+def isEnabled():
+   ''' Returns True while the methods are instrumented. '''
+   return bool(originals)
+
+def enable():
+   ''' Replaces the target methods with instrumented wrappers. '''
+   if isEnabled():
+      return
+   for owner, attrs in targets:
+      for attr in attrs:
+         original = owner.__dict__[attr]
+         originals[(owner, attr)] = original
+         if isinstance(original, classmethod):
+            wrapped = classmethod(timed(original.__func__, owner, attr))
+         elif isinstance(original, staticmethod):
+            wrapped = staticmethod(timed(original.__func__, owner, attr))
+         else:
+            wrapped = timed(original, owner, attr)
+         setattr(owner, attr, wrapped)
+
+def disable():
+   ''' Restores the original methods. '''
+   for (owner, attr), original in originals.items():
+      setattr(owner, attr, original)
+   originals.clear()
+
+@contextlib.contextmanager
+def recording(reset=True):
+   ''' Context manager that instruments the methods for its duration and
+       gives the counters, emptied first unless reset is False. '''
+   if reset:
+      counters.reset()
+   wasenabled = isEnabled()
+   enable()
+   try:
+      yield counters
+   finally:
+      if not wasenabled:
+         disable()
+
+def snapshot():
+   ''' Returns the current counts, as Counters.snapshot() does. '''
+   return counters.snapshot()
+
+
+# Some example code
+if __name__ == "__main__":
+   print "Count the work in building 100d6 + 10e6: "
+   with recording() as recorded:
+      XdY( (100,6) ) + XeY( (10,6) )
+   print recorded.toJSON()
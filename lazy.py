@@ -0,0 +1,325 @@
+'''
+Bryan Bonvallet
+2014
+
+Lazy evaluation of dice arithmetic.
+
+Arithmetic on PMF objects is eager: every intermediate distribution is
+built, and a subexpression written twice is computed twice.  Wrapping
+dice with lazy() instead builds a small expression graph from +, -, |, &
+and the comparisons, which is only computed by evaluate().
+
+   from XdY import XdY
+   from XeY import XeY
+   from lazy import lazy
+   a = lazy(XdY, (3,6)) + lazy(XeY, (2,6))
+   (a | a).evaluate()
+
+Each node has a key, and nodes with equal keys have equal distributions.
+Sums, highests and lowests are commutative, so their operands are kept
+in a canonical order and nested ones are flattened.  Evaluation computes
+each distinct key once.  Chained additions are taken as one multi-way
+convolution with extramath.multiconvolve, and chained | or & as one
+product of CDFs over the merged support.
+'''
+
+import numpy
+
+from PMF import PMF, isScalar
+from XdY import XdY
+from XhY import XhY
+from extramath import multiconvolve
+
+def lazy(value, description=None, error=None):
+   ''' Returns an expression for value.  value is either a PMF class
+       such as XdY, to be built from the (X, Y) description and error, a
+       PMF object, a constant or an expression. '''
+   if isinstance(value, Expression):
+      return value
+   if isinstance(value, PMF):
+      return Distribution(value)
+   if isScalar(value):
+      return Constant(value)
+   if isinstance(value, type) and issubclass(value, PMF):
+      return Dice(value, description, error)
+   raise TypeError('Invalid expression: %s' %(value,))
+
+class Expression(object):
+   ''' A node of a lazy dice expression.  Subclasses set key, a hashable
+       tuple identifying the distribution of the node, and compute it in
+       build(). '''
+
+   key = None
+
+   def operands(self):
+      ''' Returns the nodes this node is computed from. '''
+      return ()
+
+   def evaluate(self, memo=None):
+      ''' Computes the expression.  memo maps keys to computed values and
+          may be shared between expressions to reuse their common
+          subexpressions.  Returns a PMF, or a probability for
+          comparisons. '''
+      if memo is None:
+         memo = {}
+      if self.key not in memo:
+         memo[self.key] = self.build(memo)
+      return memo[self.key]
+
+   def build(self, memo):
+      ''' Computes the expression from the memo of computed keys. '''
+      raise NotImplementedError
+
+   def __add__(self, other):
+      return Sum( (self, lazy(other)) )
+
+   def __radd__(self, other):
+      return Sum( (lazy(other), self) )
+
+   def __sub__(self, other):
+      return self + (-lazy(other))
+
+   def __rsub__(self, other):
+      return lazy(other) + (-self)
+
+   def __neg__(self):
+      return Negation(self)
+
+   def __or__(self, other):
+      return Highest( (self, lazy(other)) )
+
+   def __ror__(self, other):
+      return Highest( (lazy(other), self) )
+
+   def __and__(self, other):
+      return Lowest( (self, lazy(other)) )
+
+   def __rand__(self, other):
+      return Lowest( (lazy(other), self) )
+
+   def __lt__(self, other):
+      return Comparison('<', self, lazy(other))
+
+   def __le__(self, other):
+      return Comparison('<=', self, lazy(other))
+
+   def __gt__(self, other):
+      return Comparison('>', self, lazy(other))
+
+   def __ge__(self, other):
+      return Comparison('>=', self, lazy(other))
+
+   def __eq__(self, other):
+      return Comparison('==', self, lazy(other))
+
+   def __ne__(self, other):
+      return Comparison('!=', self, lazy(other))
+
+   def __hash__(self):
+      ''' Returns hash code value for this object. (Cannot perform, raises error)'''
+      raise TypeError('Expression objects are unhashable; use their key')
+
+   def __str__(self):
+      return str(self.key)
+
+class Dice(Expression):
+   ''' A pool of dice built from a PMF class and an (X, Y) description. '''
+
+   def __init__(self, cls, description, error=None):
+      if error is None:
+         error = cls.error
+      self.cls = cls
+      self.description = tuple([int(value) for value in description])
+      self.error = error
+      self.key = (cls.__name__, self.description, error)
+
+   def build(self, memo):
+      return self.cls(self.description, self.error)
+
+class Distribution(Expression):
+   ''' An existing PMF object.  Objects are only equal to themselves. '''
+
+   def __init__(self, pmf):
+      self.pmf = pmf
+      self.key = ('pmf', id(pmf))
+
+   def build(self, memo):
+      return self.pmf
+
+class Constant(Expression):
+   ''' A constant value. '''
+
+   def __init__(self, value):
+      self.value = value
+      self.key = ('constant', value)
+
+   def build(self, memo):
+      return PMF.fromLattice(0, numpy.array([1.0])) + self.value
+
+   def __neg__(self):
+      return Constant(-self.value)
+
+class Negation(Expression):
+   ''' The negation of an expression. '''
+
+   def __init__(self, operand):
+      self.operand = operand
+      self.key = ('-', operand.key)
+
+   def operands(self):
+      return (self.operand,)
+
+   def build(self, memo):
+      return -self.operand.evaluate(memo)
+
+class Combination(Expression):
+   ''' A commutative and associative operation over several expressions.
+       Operands of the same operation are flattened into this one, and
+       the operands are kept sorted by key. '''
+
+   # Symbol of the operation, used in keys.
+   symbol = None
+
+   def __init__(self, terms):
+      flat = []
+      for term in terms:
+         if isinstance(term, self.__class__):
+            flat.extend(term.terms)
+         else:
+            flat.append(term)
+      self.terms = tuple(sorted(flat, key=lambda term: term.key))
+      self.key = (self.symbol,) + tuple([term.key for term in self.terms])
+
+   def operands(self):
+      return self.terms
+
+   def distinct(self, memo):
+      ''' Returns the computed distinct operands and, as an array, how
+          many times each appears. '''
+      pmfs = []
+      counts = []
+      for i, term in enumerate(self.terms):
+         # Operands are sorted by key, so repeats are adjacent.
+         if i > 0 and term.key == self.terms[i-1].key:
+            counts[-1] += 1
+         else:
+            pmfs.append(term.evaluate(memo))
+            counts.append(1)
+      return pmfs, numpy.array(counts)[:,numpy.newaxis]
+
+class Sum(Combination):
+   ''' The sum of several expressions. '''
+
+   symbol = '+'
+
+   def build(self, memo):
+      shift = 0
+      lattices = []
+      others = []
+      for term in self.terms:
+         if isinstance(term, Constant):
+            shift += term.value
+            continue
+         pmf = term.evaluate(memo)
+         if pmf.getStorage()[0] is not None:
+            lattices.append(pmf)
+         else:
+            others.append(pmf)
+      errors = [pmf.error for pmf in lattices + others]
+      error = max(errors) if errors else PMF.error
+
+      # Every lattice is convolved at once.  Their offsets add.
+      pmfs = []
+      if lattices:
+         offset = sum([pmf.getStorage()[0] for pmf in lattices])
+         probs = multiconvolve([pmf.getStorage()[2] for pmf in lattices])
+         pmfs.append(XdY.fromLattice(offset, probs, error))
+
+      # Gappy supports are added pairwise, smallest first.
+      pmfs.extend(others)
+      pmfs.sort(key=len)
+      total = pmfs[0] if pmfs else PMF.fromLattice(0, numpy.array([1.0]), error)
+      if not isinstance(total, XdY):
+         total = XdY.fromStorage(total.getStorage(), error)
+      for pmf in pmfs[1:]:
+         total = total + pmf
+      return total + shift
+
+class Highest(Combination):
+   ''' The highest of several expressions.  The highest is at most v
+       exactly when all of them are, so its CDF is the product of theirs. '''
+
+   symbol = '|'
+
+   def build(self, memo):
+      # Repeated operands are independent copies, raising the CDF to a
+      # power rather than being computed again.
+      pmfs, counts = self.distinct(memo)
+      values, cdfs, error = alignCDFs(pmfs)
+      return XhY.fromCDF(values, numpy.prod(cdfs ** counts, axis=0), error)
+
+class Lowest(Combination):
+   ''' The lowest of several expressions.  The lowest is above v exactly
+       when all of them are, so its survival function is the product of
+       theirs. '''
+
+   symbol = '&'
+
+   def build(self, memo):
+      pmfs, counts = self.distinct(memo)
+      values, cdfs, error = alignCDFs(pmfs)
+      # Truncated distributions may total slightly less than 1.
+      totals = cdfs[:,-1:]
+      cdf = numpy.prod(totals ** counts, axis=0) - \
+            numpy.prod((totals - cdfs) ** counts, axis=0)
+      return XhY.fromCDF(values, cdf, error)
+
+def alignCDFs(pmfs):
+   ''' Returns the merged, sorted support of the PMF objects pmfs, an
+       array of their CDFs over it with one row each, and their largest
+       error. '''
+   values = numpy.unique(pmfs[0].getDistribution(0))
+   for pmf in pmfs[1:]:
+      values = numpy.union1d(values, pmf.getDistribution(0))
+   cdfs = numpy.array([pmf.getCDFAt(values) for pmf in pmfs])
+   return values, cdfs, max([pmf.error for pmf in pmfs])
+
+class Comparison(Expression):
+   ''' The probability that a comparison between two expressions holds. '''
+
+   def __init__(self, operator, lhs, rhs):
+      self.operator = operator
+      self.lhs = lhs
+      self.rhs = rhs
+      self.key = (operator, lhs.key, rhs.key)
+
+   def operands(self):
+      return (self.lhs, self.rhs)
+
+   def build(self, memo):
+      lhs = self.lhs.evaluate(memo)
+      rhs = self.rhs.evaluate(memo)
+      return comparisons[self.operator](lhs, rhs)
+
+# Comparison operators by symbol, applied to PMF objects.
+comparisons = {'<': PMF.__lt__, '<=': PMF.__le__,
+               '>': PMF.__gt__, '>=': PMF.__ge__,
+               '==': PMF.__eq__, '!=': PMF.__ne__}
+
+# Some example code
+if __name__ == "__main__":
+   from XeY import XeY
+
+   print "Build the highest of 3d6+2e6 and another 3d6+2e6 lazily: "
+   a = lazy(XdY, (3,6)) + lazy(XeY, (2,6))
+   b = lazy(XdY, (3,6)) + lazy(XeY, (2,6))
+   expr = a | b
+   print str(expr)
+
+   print "Evaluate it, building 3d6+2e6 only once: "
+   memo = {}
+   print str(expr.evaluate(memo))
+   print "Distinct nodes computed: %d" % (len(memo),)
+
+   print "Probability that it beats 4d6+3: "
+   print (expr > lazy(XdY, (4,6)) + 3).evaluate(memo)
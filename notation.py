@@ -0,0 +1,212 @@
+'''
+Bryan Bonvallet
+2014
+
+Compiles dice notation such as "3d6+2e8+4h10+5" into distributions.
+
+A term is a pool of X dice with Y faces written XdY, XeY or XhY, as in
+the classes of the same names, or XdYkK and XdYlK to keep the K highest
+or lowest as XkY and XlY do.  X may be left out for one die.  Terms and
+integer constants are added or subtracted.
+
+   from notation import evaluate
+   evaluate("3d6+2e8+4h10+5")
+   evaluate("4d6k3 - 1d4")
+
+compileExpression() turns the text into a Plan.  Pools of XdY or XeY
+dice with the same faces and sign are merged into one pool, as 3d6+2d6
+is 5d6, and constants are folded into one shift.  When evaluated, the
+plan adds the pools smallest first, always adding the two smallest
+distributions it has, so the largest supports meet in the last
+convolution.  Plans are cached by text without whitespace and by their
+normalized form, and evaluated distributions by normalized form and
+error, both in bounded least recently used caches, so repeating an
+expression, however it is spelled, costs a dictionary lookup.
+'''
+
+import heapq
+import re
+from collections import OrderedDict
+
+import numpy
+
+from cache import DistributionCache
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+from XkY import XkY, XlY
+
+# Pool classes by the letter of their term, in normalized order.
+letters = ['d', 'e', 'h']
+classes = {'d': XdY, 'e': XeY, 'h': XhY}
+keepers = {'k': XkY, 'l': XlY}
+
+# Pools whose sums are pools of the same class.
+mergeable = set(['d', 'e'])
+
+# One signed term: dice with optional keep, or an integer constant.
+term = re.compile(r'\s*([+-]?)\s*(?:(\d*)([deh])(\d+)(?:([kl])(\d+))?|(\d+))\s*')
+
+def parseExpression(text):
+   ''' Returns the terms of the dice notation text as a list of tuples
+       (sign, letter, X, Y, keep, K) and the sum of its constants.  keep is
+       'k', 'l' or None, when K is also None. '''
+   terms = []
+   constant = 0
+   position = 0
+   while position < len(text) or position == 0:
+      match = term.match(text, position)
+      if match is None or match.end() == position or \
+            (position > 0 and not match.group(1)):
+         raise ValueError('Invalid dice expression: %s at %d' %(text, position))
+      sign, X, letter, Y, keep, K, value = match.groups()
+      sign = -1 if sign == '-' else 1
+      if value is not None:
+         constant += sign * int(value)
+      else:
+         X = int(X) if X else 1
+         Y = int(Y)
+         if keep is not None:
+            if letter != 'd':
+               raise ValueError('Only d pools keep dice: %s' %(match.group().strip()))
+            K = int(K)
+         if X < 1 or Y < 1:
+            raise ValueError('Invalid dice term: %s' %(match.group().strip()))
+         terms.append( (sign, letter, X, Y, keep, K) )
+      position = match.end()
+   return terms, constant
+
+def formatTerm(sign, letter, X, Y, keep, K):
+   ''' Returns the normalized notation of one term, with its sign. '''
+   text = '%s%d%s%d' % ('-' if sign < 0 else '+', X, letter, Y)
+   if keep is not None:
+      text += '%s%d' % (keep, K)
+   return text
+
+class Plan(object):
+   ''' A compiled dice expression: the pools it adds up, with identical
+       mergeable pools merged, and one constant.  key is its normalized
+       notation. '''
+
+   def __init__(self, terms, constant):
+      merged = {}
+      others = []
+      for sign, letter, X, Y, keep, K in terms:
+         if letter in mergeable and keep is None:
+            merged[(sign, letter, Y)] = merged.get((sign, letter, Y), 0) + X
+         else:
+            others.append( (sign, letter, X, Y, keep, K) )
+      terms = [(sign, letter, X, Y, None, None)
+               for (sign, letter, Y), X in merged.items()] + others
+      # Positive terms first, then by class, faces and dice.
+      self.terms = sorted(terms, key=lambda t: (-t[0], letters.index(t[1]),
+                                                t[3], t[2], t[4], t[5]))
+      self.constant = constant
+
+      key = ''.join([formatTerm(*t) for t in self.terms])
+      if constant or not self.terms:
+         key += '%+d' % (constant,)
+      self.key = key[1:] if key.startswith('+') else key
+
+   def genPool(self, sign, letter, X, Y, keep, K, error):
+      ''' Builds the distribution of one term as an XdY object, so that
+          it adds to the others. '''
+      if keep is not None:
+         pmf = keepers[keep]( (X,Y,K), error )
+      else:
+         pmf = classes[letter]( (X,Y), error )
+      if not isinstance(pmf, XdY):
+         pmf = XdY.fromStorage(pmf.getStorage(), error)
+      return pmf if sign > 0 else -pmf
+
+   def evaluate(self, error=None):
+      ''' Computes the distribution of the expression with the given
+          error, by default that of XdY.  Identical terms are built once.
+          The two smallest distributions are added until one is left. '''
+      if error is None:
+         error = XdY.error
+      built = {}
+      heap = []
+      for i, t in enumerate(self.terms):
+         if t not in built:
+            built[t] = self.genPool(*(t + (error,)))
+         heap.append( (len(built[t]), i, built[t]) )
+      if not heap:
+         return XdY.fromLattice(self.constant, numpy.array([1.0]), error)
+
+      heapq.heapify(heap)
+      count = len(heap)
+      while len(heap) > 1:
+         alen, ai, a = heapq.heappop(heap)
+         blen, bi, b = heapq.heappop(heap)
+         total = a + b
+         heapq.heappush(heap, (len(total), count, total))
+         count += 1
+      return heap[0][2] + self.constant
+
+   def __str__(self):
+      return self.key
+
+# Plans by their text without whitespace and by their normalized form,
+# least recently used first.  At most planlimit entries are kept.
+plans = OrderedDict()
+planlimit = 1024
+
+# Evaluated distributions, keyed on ('expression', normalized form, error).
+results = DistributionCache()
+
+def lookupPlan(key):
+   ''' Returns the plan cached under key, marking it most recently used,
+       or None. '''
+   try:
+      plan = plans.pop(key)
+   except KeyError:
+      return None
+   plans[key] = plan
+   return plan
+
+def compileExpression(text):
+   ''' Returns the Plan of the dice notation text, compiled once. '''
+   spelling = ''.join(text.split())
+   plan = lookupPlan(spelling)
+   if plan is not None:
+      return plan
+   plan = Plan(*parseExpression(spelling))
+   # Every spelling of an expression shares one plan.
+   plan = lookupPlan(plan.key) or plan
+   plans[plan.key] = plan
+   plans[spelling] = plan
+   while len(plans) > planlimit:
+      plans.popitem(last=False)
+   return plan
+
+def evaluate(text, error=None):
+   ''' Returns the distribution of the dice notation text as an XdY
+       object.  The distribution is computed once per normalized
+       expression and error, and later calls share its arrays. '''
+   if error is None:
+      error = XdY.error
+   plan = compileExpression(text)
+   key = ('expression', plan.key, error)
+   storage = results.get(key)
+   if storage is None:
+      storage = plan.evaluate(error).getStorage()
+      results.store(key, storage)
+   return XdY.fromStorage(storage, error)
+
+
+# Some example code
+if __name__ == "__main__":
+   print "Compile 3d6 + 2e8 + 4h10 + 2d6 + 5 - 2: "
+   plan = compileExpression("3d6 + 2e8 + 4h10 + 2d6 + 5 - 2")
+   print str(plan)
+
+   print "Its distribution: "
+   print str(evaluate("3d6 + 2e8 + 4h10 + 2d6 + 5 - 2"))
+
+   print "The same expression spelled differently is a cache hit: "
+   evaluate("4h10+5d6+3+2e8")
+   print str(results.statistics())
+
+   print "Probability that 4d6 drop lowest beats 3d6+1: "
+   print str(evaluate("4d6k3") > evaluate("3d6+1"))
@@ -12,7 +12,7 @@ maintains a calculation to represent a discrete, infinite sequence.
 These classes expect to be subclassed with PMF classes.
 '''
 
-class FiniteSequence():
+class FiniteSequence(object):
    ''' Contains features common to finite sequences.
        Currently, this controls how to print out the sequence. '''
 
@@ -20,7 +20,7 @@ class FiniteSequence():
       ''' Convert to string by printing the contained distribution. '''
       return str(self.getDistribution())
 
-class InfiniteSequence():
+class InfiniteSequence(object):
    ''' Contains features common to infinite sequences.
        Currently, this controls how to print out the sequence. '''
 
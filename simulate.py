@@ -0,0 +1,204 @@
+'''
+Bryan Bonvallet
+2014
+
+Monte Carlo simulation of dice mechanics without a closed form.
+
+XdY, XeY and XhY build their distributions exactly.  Mechanics such as
+rerolling 1s, exploding on some faces only or counting successes with
+botches are simulated instead: X dice with Y faces are rolled for many
+trials at once as a NumPy array, passed through a list of rule stages
+and reduced to one outcome per trial.
+
+   from simulate import simulate, Reroll, Explode, Successes
+   pmf = simulate(5, 10, [Reroll([1]), Explode([10])], Successes(8, [1]))
+   pmf.getConfidence()
+
+Stages are objects called as stage(rolls, Y, rng) that return the rolls,
+an array with one row per trial and one column per die, changed as the
+rule says.  Reducers are called as reducer(rolls) and return the integer
+outcome of each trial.  Both must be picklable to run on several
+processes.
+
+Rolls are simulated in chunks of about chunk dice until the confidence
+interval of every outcome is narrower than precision either side.  Chunk
+i draws from its own stream, seeded with (seed, i), so a seed reproduces
+the same result for the same number of workers.
+'''
+
+import multiprocessing
+
+import numpy
+
+from XdY import XdY
+
+class Reroll(object):
+   ''' Rerolls dice showing any of faces, once, or until they show none
+       of them when once is False. '''
+
+   def __init__(self, faces, once=True, limit=100):
+      self.faces = list(faces)
+      self.rounds = 1 if once else limit
+
+   def __call__(self, rolls, Y, rng):
+      flat = rolls.reshape(-1)
+      idx = numpy.flatnonzero(numpy.in1d(flat, self.faces))
+      for i in range(0,self.rounds):
+         if len(idx) == 0:
+            break
+         flat[idx] = rng.randint(1, Y+1, size=len(idx))
+         idx = idx[numpy.in1d(flat[idx], self.faces)]
+      # reshape() copies rolls that are not contiguous.
+      return flat.reshape(rolls.shape)
+
+class Explode(object):
+   ''' Rolls again and adds to dice showing any of faces, by default the
+       highest face, for at most limit rounds. '''
+
+   def __init__(self, faces=None, limit=100):
+      self.faces = None if faces is None else list(faces)
+      self.limit = limit
+
+   def __call__(self, rolls, Y, rng):
+      faces = [Y] if self.faces is None else self.faces
+      flat = rolls.reshape(-1)
+      idx = numpy.flatnonzero(numpy.in1d(flat, faces))
+      for i in range(0,self.limit):
+         if len(idx) == 0:
+            break
+         extra = rng.randint(1, Y+1, size=len(idx))
+         flat[idx] += extra
+         idx = idx[numpy.in1d(extra, faces)]
+      return flat.reshape(rolls.shape)
+
+class Total(object):
+   ''' Reduces each trial to the sum of its dice. '''
+
+   def __call__(self, rolls):
+      return rolls.sum(axis=1)
+
+class KeepHighest(object):
+   ''' Reduces each trial to the sum of its k highest dice. '''
+
+   def __init__(self, k):
+      self.k = k
+
+   def __call__(self, rolls):
+      return numpy.sort(rolls, axis=1)[:,-self.k:].sum(axis=1)
+
+class Successes(object):
+   ''' Reduces each trial to the number of dice at or above threshold,
+       less one for each die showing any of botches. '''
+
+   def __init__(self, threshold, botches=()):
+      self.threshold = threshold
+      self.botches = list(botches)
+
+   def __call__(self, rolls):
+      successes = (rolls >= self.threshold).sum(axis=1)
+      if self.botches:
+         successes -= numpy.in1d(rolls, self.botches).reshape(rolls.shape).sum(axis=1)
+      return successes
+
+class Simulated(XdY):
+   ''' An empirical distribution from simulate(), with the number of
+       trials behind it and a confidence interval for each probability.
+       It adds and compares like any other XdY. '''
+
+   trials = 0
+   lower = None
+   upper = None
+
+   def getConfidence(self):
+      ''' Returns the lower and upper bounds of the confidence interval of
+          the probability of each value, as two arrays. '''
+      return self.lower, self.upper
+
+def wilsonInterval(counts, trials, z):
+   ''' Returns the lower and upper Wilson score interval bounds of the
+       probabilities estimated by counts out of trials, with z standard
+       deviations either side. '''
+   p = counts * 1.0 / trials
+   z2 = z * z
+   centre = (p + z2 / (2.0 * trials)) / (1.0 + z2 / trials)
+   half = z * numpy.sqrt(p * (1.0 - p) / trials + z2 / (4.0 * trials * trials)) / (1.0 + z2 / trials)
+   return centre - half, centre + half
+
+def simulateChunk(task):
+   ''' Simulates one chunk of trials and returns the outcomes seen and
+       how often each was seen. '''
+   X, Y, stages, reducer, trials, seed, index = task
+   rng = numpy.random.RandomState([seed, index])
+   rolls = rng.randint(1, Y+1, size=(trials, X))
+   for stage in stages:
+      rolls = stage(rolls, Y, rng)
+   outcomes = numpy.asarray(reducer(rolls), dtype=int)
+   offset = outcomes.min()
+   return offset, numpy.bincount(outcomes - offset)
+
+def simulate(X, Y, stages=(), reducer=None, precision=1e-3, z=1.96,
+             chunk=1<<20, maxtrials=10**8, workers=1, seed=None, error=None):
+   ''' Returns the empirical distribution of a mechanic on X dice with Y
+       faces as a Simulated object, from rolls passed through stages and
+       reduced to one outcome per trial by reducer (Total() by default).
+       Chunks of about chunk dice are simulated, workers at a time on as
+       many processes, until every confidence interval is within
+       precision of its probability, or maxtrials trials are done.  z
+       sets the width of the intervals in standard deviations. '''
+   if maxtrials < 1:
+      raise ValueError('At least one trial is needed, not %s' %(maxtrials))
+   if reducer is None:
+      reducer = Total()
+   if seed is None:
+      seed = numpy.random.randint(0, 2**31)
+   trials = max(1, chunk // X)
+
+   pool = multiprocessing.Pool(workers) if workers > 1 else None
+   offset, counts = 0, numpy.zeros(0, dtype=int)
+   total, index = 0, 0
+   try:
+      while total < maxtrials:
+         tasks = [(X, Y, stages, reducer, trials, seed, index + i)
+                  for i in range(0,workers)]
+         if pool is None:
+            results = [simulateChunk(task) for task in tasks]
+         else:
+            results = pool.map(simulateChunk, tasks)
+         index += workers
+         total += trials * workers
+
+         # Merge the chunks onto a common range of outcomes.
+         for first, seen in results:
+            if len(counts) == 0:
+               offset, counts = first, seen.copy()
+               continue
+            lo = min(offset, first)
+            hi = max(offset + len(counts), first + len(seen))
+            merged = numpy.zeros(hi - lo, dtype=int)
+            merged[offset-lo:offset-lo+len(counts)] += counts
+            merged[first-lo:first-lo+len(seen)] += seen
+            offset, counts = lo, merged
+
+         lower, upper = wilsonInterval(counts, total, z)
+         probs = counts * 1.0 / total
+         if numpy.max(numpy.maximum(probs - lower, upper - probs)) <= precision:
+            break
+   finally:
+      if pool is not None:
+         pool.close()
+         pool.join()
+
+   pmf = Simulated.fromLattice(int(offset), probs, error)
+   pmf.trials = total
+   pmf.lower, pmf.upper = lower, upper
+   return pmf
+
+
+# Some example code
+if __name__ == "__main__":
+   print "Five ten-sided dice, rerolling 1s once and exploding on 10s, "
+   print "counting 8 and up as successes and 1s as botches: "
+   pmf = simulate(5, 10, [Reroll([1]), Explode([10])], Successes(8, [1]), precision=1e-3)
+   print str(pmf)
+   print "from %d trials, with 95%% confidence intervals: " % (pmf.trials,)
+   print str(numpy.array(pmf.getConfidence()))
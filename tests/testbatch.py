@@ -0,0 +1,48 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functions in batch.py.
+'''
+
+import numpy
+import unittest
+
+from batch import runPools, comparePools
+from PMF import comparisonMatrix
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+class TestBatch(unittest.TestCase):
+
+    def _jobs(self):
+        return [(XdY, (3,6)), (XeY, (2,6)), (XhY, (4,10)), (XdY, (1,20), 1e-3)]
+
+    def test_run_pools(self):
+        # Parallel pools match the ones built here, in job order.
+        jobs = self._jobs()
+        for workers in (1, 2):
+            pmfs = runPools(jobs, workers)
+            self.assertEqual(len(pmfs), len(jobs))
+            for pmf, job in zip(pmfs, jobs):
+                pool = job[0](*job[1:])
+                self.assertTrue(isinstance(pmf, job[0]))
+                self.assertEqual(pmf.description, job[1])
+                self.assertEqual(pmf.getError(), pool.getError())
+                self.assertTrue(numpy.allclose(pmf.getDistribution(),
+                                               pool.getDistribution()))
+        # Shared arrays support arithmetic and comparisons.
+        pmfs = runPools(jobs[:2], 2)
+        self.assertAlmostEqual((pmfs[0] + pmfs[1]).EV(),
+                               (XdY((3,6)) + XeY((2,6))).EV())
+        self.assertAlmostEqual(pmfs[0] > pmfs[1], XdY((3,6)) > XeY((2,6)))
+
+    def test_compare_pools(self):
+        # Parallel blocks make up the same matrix.
+        pmfs = [XdY( (x, 6) ) for x in range(1,12)] + [XhY( (3,20) )]
+        for op in ('<', '==', '>='):
+            expected = comparisonMatrix(pmfs, op)
+            for workers in (1, 3):
+                matrix = comparePools(pmfs, op, workers, tile=2)
+                self.assertTrue(numpy.allclose(matrix, expected))
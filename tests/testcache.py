@@ -0,0 +1,98 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functions in cache.py.
+'''
+
+import numpy
+import unittest
+
+from cache import DistributionCache, pools
+from XdY import XdY
+from XhY import XhY
+
+class TestCache(unittest.TestCase):
+
+    def _array(self, n):
+        # Build a uniform distribution array of n values.
+        dist = numpy.zeros( (2,n) )
+        dist[0,:] = numpy.arange(n)
+        dist[1,:] = 1.0 / n
+        return dist
+
+    def test_get_store(self):
+        # Stored arrays come back read-only and are counted.
+        cache = DistributionCache()
+        self.assertTrue(cache.get('a') is None)
+        dist = self._array(5)
+        cache.store('a', dist)
+        self.assertTrue(cache.get('a') is dist)
+        self.assertFalse(dist.flags.writeable)
+        stats = cache.statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['bytes'], dist.nbytes)
+
+    def test_lru_eviction(self):
+        # The least recently used entry is evicted to fit the budget.
+        size = self._array(10).nbytes
+        cache = DistributionCache(3*size)
+        for key in 'abc':
+            cache.store(key, self._array(10))
+        # Use 'a' so that 'b' becomes the least recently used.
+        cache.get('a')
+        cache.store('d', self._array(10))
+        self.assertTrue(cache.get('b') is None)
+        for key in 'acd':
+            self.assertFalse(cache.get(key) is None)
+        self.assertEqual(cache.statistics()['evictions'], 1)
+
+        # Shrinking the budget evicts, and oversized arrays are skipped.
+        cache.setBudget(size)
+        self.assertEqual(cache.statistics()['entries'], 1)
+        cache.store('e', self._array(100))
+        self.assertTrue(cache.get('e') is None)
+
+    def test_tuples(self):
+        # Tuples holding arrays are sized by their arrays.
+        cache = DistributionCache()
+        probs = numpy.ones(8) / 8.
+        cache.store('a', (3, None, probs))
+        self.assertEqual(cache.statistics()['bytes'], probs.nbytes)
+        self.assertFalse(probs.flags.writeable)
+
+    def test_largest(self):
+        # The largest smaller pool of the same kind is found.
+        cache = DistributionCache()
+        for x in (2, 5, 9):
+            cache.store( (XdY, x, 6, 1e-5), self._array(x) )
+        cache.store( (XdY, 7, 8, 1e-5), self._array(7) )
+        cache.store( (XhY, 8, 6, 1e-5), self._array(8) )
+        x, dist = cache.largest(XdY, 8, 6, 1e-5)
+        self.assertEqual(x, 5)
+        self.assertEqual(dist.shape, (2,5))
+        self.assertTrue(cache.largest(XdY, 2, 6, 1e-5) is None)
+
+    def test_pools(self):
+        # Dice pools are shared through the process-wide cache.
+        pools.clear()
+        a = XdY( (3,6) )
+        b = XdY( (3,6) )
+        self.assertTrue(a.getDistribution(1) is b.getDistribution(1))
+        stats = pools.statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertRaises(ValueError, a.getDistribution(1).__setitem__,
+                          0, 0.5)
+
+    def test_pool_reuse(self):
+        # Larger pools built from cached smaller pools are unchanged.
+        pools.clear()
+        fresh = XdY( (10,6) ).getDistribution()
+        pools.clear()
+        XdY( (8,6) )
+        reused = XdY( (10,6) ).getDistribution()
+        self.assertEqual(pools.statistics()['hits'], 1)
+        self.assertTrue(numpy.allclose(fresh, reused))
@@ -5,6 +5,7 @@ Bryan Bonvallet
 This file tests the functions in extramath.py.
 '''
 
+import numpy
 import unittest
 import extramath
 
@@ -39,3 +40,72 @@ class TestExtras(unittest.TestCase):
                   ( 8,  5, 56), )
         for x,y,z in known:
             self.assertEqual(extramath.combination(x,y), z)
+
+    def _random_probs(self, n):
+        # Build a random probability vector of length n.
+        return numpy.random.dirichlet(numpy.ones(n))
+
+    def test_fftconvolve(self):
+        # FFT convolution matches direct convolution.
+        for n,m in ( (1,1), (6,6), (10,300), (1000,999), ):
+            a = self._random_probs(n)
+            b = self._random_probs(m)
+            direct = extramath.directconvolve(a, b)
+            fft = extramath.fftconvolve(a, b)
+            self.assertEqual(len(direct), len(fft))
+            self.assertTrue(numpy.allclose(direct, fft, atol=1e-12))
+
+    def test_fftconvolve_roundoff(self):
+        # Round-off is clipped and the total probability is kept.
+        a = numpy.zeros(2000)
+        a[0] = 1e-3
+        a[-1] = 1 - 1e-3
+        out = extramath.fftconvolve(a, a)
+        self.assertTrue(numpy.all(out >= 0.0))
+        self.assertTrue(numpy.all(out <= 1.0))
+        self.assertAlmostEqual(numpy.sum(out), 1.0, places=12)
+
+    def test_convolve_method(self):
+        # Methods may be forced by name or picked by size.
+        a = self._random_probs(5)
+        b = self._random_probs(5000)
+        for method in (None, 'direct', 'fft'):
+            out = extramath.convolve(a, b, method)
+            self.assertTrue(numpy.allclose(out, numpy.convolve(a, b)))
+        self.assertRaises(KeyError, extramath.convolve, a, b, 'bogus')
+
+    def test_sparseconvolve(self):
+        # Sparse convolution matches dense convolution over the gaps.
+        avalues = numpy.array([0., 10., 30.])
+        bvalues = numpy.array([5., 6., 25.])
+        aprobs = self._random_probs(3)
+        bprobs = self._random_probs(3)
+        values, probs = extramath.sparseconvolve(avalues, aprobs, bvalues, bprobs)
+        a = numpy.zeros(31)
+        a[avalues.astype(int)] = aprobs
+        b = numpy.zeros(21)
+        b[(bvalues - 5).astype(int)] = bprobs
+        dense = numpy.convolve(a, b)
+        self.assertTrue(numpy.all(numpy.diff(values) > 0))
+        self.assertTrue(numpy.allclose(probs, dense[(values - 5).astype(int)]))
+        self.assertAlmostEqual(numpy.sum(probs), 1.0, places=12)
+        # 10+25 and 30+5 are aggregated.
+        self.assertEqual(len(values), 8)
+
+    def test_fillratio(self):
+        # Two dense supports fill their sum, gappy ones do not.
+        a = numpy.arange(1., 7.)
+        self.assertTrue(extramath.fillratio(a, a) >= 1)
+        b = numpy.arange(1., 11.) * 100
+        self.assertAlmostEqual(extramath.fillratio(b, b), 100/1801.)
+
+    def test_multiconvolve(self):
+        # Fused and pairwise convolution of several vectors agree.
+        vectors = [self._random_probs(n) for n in (300, 6, 40, 1)]
+        expected = numpy.convolve(numpy.convolve(vectors[0], vectors[1]),
+                                  numpy.convolve(vectors[2], vectors[3]))
+        for method in (None, 'fft', 'pairwise', 'direct'):
+            out = extramath.multiconvolve(vectors, method)
+            self.assertEqual(len(out), len(expected))
+            self.assertTrue(numpy.allclose(out, expected, atol=1e-12))
+        self.assertTrue(extramath.multiconvolve(vectors[:1]) is vectors[0])
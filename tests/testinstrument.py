@@ -0,0 +1,66 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functions in instrument.py.
+'''
+
+import json
+import unittest
+
+import instrument
+import lazy
+from cache import pools
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+class TestInstrument(unittest.TestCase):
+
+    def tearDown(self):
+        instrument.disable()
+
+    def test_recording(self):
+        # Operations are counted per class with their sizes.
+        pools.clear()
+        with instrument.recording() as counters:
+            total = XdY( (10,6) ) + XeY( (2,6) )
+            total > 30
+            XhY( (3,6) ) | XhY( (2,8) )
+        counts = counters.snapshot()
+        self.assertEqual(counts['XdY.genDistribution']['calls'], 1)
+        self.assertEqual(counts['XeY.genDie']['calls'], 1)
+        self.assertEqual(counts['XdY.__add__']['calls'], 1)
+        self.assertEqual(counts['XdY.__add__']['values'], len(total))
+        self.assertTrue(counts['XdY.__add__']['bytes'] >= 8 * len(total))
+        self.assertTrue(counts['XdY.addDistribution']['calls'] > 1)
+        self.assertEqual(counts['XhY.__or__']['calls'], 1)
+        self.assertTrue(counts['XdY.castOperand']['calls'] >= 2)
+        self.assertEqual(json.loads(counters.toJSON()), counts)
+
+    def test_disabled(self):
+        # The original methods are restored and nothing is counted.
+        original = XdY.__dict__['addDistribution']
+        genDie = XeY.__dict__['genDie']
+        with instrument.recording():
+            self.assertTrue(instrument.isEnabled())
+            self.assertFalse(XdY.__dict__['addDistribution'] is original)
+        self.assertFalse(instrument.isEnabled())
+        self.assertTrue(XdY.__dict__['addDistribution'] is original)
+        self.assertTrue(XeY.__dict__['genDie'] is genDie)
+        instrument.counters.reset()
+        XdY( (3,6) ) + XdY( (2,6) )
+        self.assertEqual(instrument.snapshot(), {})
+
+    def test_lazy(self):
+        # Lazy expressions report the one-shot work they do.
+        a3d6 = lazy.lazy(XdY, (3,6))
+        with instrument.recording() as counters:
+            ((a3d6 + a3d6 + a3d6) | (a3d6 & a3d6)).evaluate()
+        counts = counters.snapshot()
+        self.assertEqual(counts['lazy.multiconvolve']['calls'], 1)
+        self.assertEqual(counts['Sum.build']['calls'], 1)
+        self.assertEqual(counts['Highest.build']['calls'], 1)
+        self.assertEqual(counts['Lowest.build']['calls'], 1)
+        self.assertEqual(counts['lazy.alignCDFs']['calls'], 2)
+        self.assertTrue(counts['Highest.build']['values'] > 0)
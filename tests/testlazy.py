@@ -0,0 +1,73 @@
+'''
+Bryan Bonvallet
+2014
+
+This contains test functions for lazy expressions.
+'''
+
+import numpy
+import unittest
+
+from lazy import lazy
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+class testlazy(unittest.TestCase):
+    # Runs through some test cases to check expected behavior.
+
+    def _same(self, lhs, rhs):
+        self.assertEqual(len(lhs), len(rhs))
+        self.assertTrue(numpy.allclose(lhs.getDistribution(),
+                                       rhs.getDistribution(),
+                                       atol=XdY.error))
+
+    def test_sum(self):
+        # Lazy sums match eager sums, constants included.
+        expr = lazy(XdY, (3,6)) + lazy(XeY, (2,6)) + lazy(XdY, (1,20)) + 3
+        eager = XdY( (3,6) ) + XeY( (2,6) ) + XdY( (1,20) ) + 3
+        self._same(expr.evaluate(), eager)
+        expr = 10 - lazy(XdY, (2,6))
+        self._same(expr.evaluate(), 10 - XdY( (2,6) ))
+
+    def test_highest_lowest(self):
+        # Chained | and & match pairwise eager operations.
+        a, b, c = XhY( (2,6) ), XhY( (1,8) ), XhY( (3,4) )
+        la, lb, lc = lazy(XhY, (2,6)), lazy(XhY, (1,8)), lazy(XhY, (3,4))
+        self._same((la | lb | lc).evaluate(), a | b | c)
+        self._same((la & lb & lc).evaluate(), a & b & c)
+        self._same((la & la & lb).evaluate(), a & a & b)
+        self._same((lazy(a) | lazy(XdY, (2,6))).evaluate(), a | XdY( (2,6) ))
+
+    def test_comparison(self):
+        # Comparisons evaluate to probabilities.
+        expr = lazy(XdY, (1,20)) < 11
+        self.assertAlmostEqual(expr.evaluate(), 0.5)
+        expr = lazy(XdY, (2,6)) >= lazy(XdY, (2,6))
+        self.assertAlmostEqual(expr.evaluate(), XdY( (2,6) ) >= XdY( (2,6) ))
+
+    def test_common_subexpressions(self):
+        # Identical subexpressions are computed once, in any order.
+        a = lazy(XdY, (3,6)) + lazy(XeY, (2,6))
+        b = lazy(XeY, (2,6)) + lazy(XdY, (3,6))
+        self.assertEqual(a.key, b.key)
+        memo = {}
+        result = (a | b).evaluate(memo)
+        # 3d6, 2e6, their sum and the highest.
+        self.assertEqual(len(memo), 4)
+        eager = XhY.fromCDF(*self._highest(XdY( (3,6) ) + XeY( (2,6) )))
+        self._same(result, eager)
+
+    def _highest(self, pmf):
+        values = pmf.getDistribution(0)
+        return values, pmf.getCDFAt(values) ** 2, pmf.error
+
+    def test_flatten(self):
+        # Nested sums are flattened into one canonical sum.
+        a, b, c = lazy(XdY, (1,4)), lazy(XdY, (1,6)), lazy(XdY, (1,8))
+        self.assertEqual(((a + b) + c).key, (c + (b + a)).key)
+        self.assertEqual(len(((a + b) + c).operands()), 3)
+        self.assertNotEqual((a + b).key, (a | b).key)
+
+    def test_bad_expression(self):
+        self.assertRaises(TypeError, lazy, 'bogus')
@@ -0,0 +1,82 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functions in notation.py.
+'''
+
+import numpy
+import unittest
+
+import notation
+from notation import parseExpression, compileExpression, evaluate, plans, results
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+from XkY import XkY, XlY
+
+class TestNotation(unittest.TestCase):
+
+    def setUp(self):
+        plans.clear()
+        results.clear()
+
+    def _same(self, lhs, rhs):
+        self.assertTrue(numpy.allclose(lhs.getDistribution(),
+                                       rhs.getDistribution(),
+                                       atol=XdY.error))
+
+    def test_parse(self):
+        terms, constant = parseExpression(' 3d6 + 2e8+4h10 - d4 + 5 - 2 ')
+        self.assertEqual(terms, [(1, 'd', 3, 6, None, None), (1, 'e', 2, 8, None, None),
+                                 (1, 'h', 4, 10, None, None), (-1, 'd', 1, 4, None, None)])
+        self.assertEqual(constant, 3)
+        terms, constant = parseExpression('4d6k3+2d20l1')
+        self.assertEqual(terms, [(1, 'd', 4, 6, 'k', 3), (1, 'd', 2, 20, 'l', 1)])
+        for text in ['', '3d', '3d6+', '3d6 4', '3x6', '0d6', '2e6k1', '3d6++2']:
+            self.assertRaises(ValueError, parseExpression, text)
+
+    def test_compile(self):
+        # Identical pools merge and constants fold, in a normal form.
+        plan = compileExpression('5 + 4h10 + 2d6 + 2e8 + 3d6 - 2')
+        self.assertEqual(plan.key, '5d6+2e8+4h10+3')
+        self.assertEqual(compileExpression('-d4+d4').key, '1d4-1d4')
+        self.assertEqual(compileExpression('4h10+4h10').key, '4h10+4h10')
+        self.assertEqual(compileExpression('2-1').key, '1')
+        # Every spelling shares one plan.
+        self.assertTrue(compileExpression('3+2e8+5d6+4h10') is plan)
+        self.assertTrue(compileExpression(' 3 + 2e8+5d6 +4h10 ') is plan)
+
+    def test_plan_limit(self):
+        # Distinct spellings do not grow the plans past the limit.
+        limit = notation.planlimit
+        notation.planlimit = 10
+        try:
+            for i in range(0,100):
+                compileExpression('1d6 + %d' % (i,))
+                compileExpression('%d+1d6' % (i,))
+            self.assertTrue(len(plans) <= 10)
+            self.assertTrue(compileExpression('1d6+99') is plans['1d6+99'])
+        finally:
+            notation.planlimit = limit
+
+    def test_evaluate(self):
+        pmf = evaluate('3d6+2e8+4h10+5')
+        eager = XdY( (3,6) ) + XeY( (2,8) ) + XhY( (4,10) ) + 5
+        self._same(pmf, eager)
+        self._same(evaluate('4d6k3-1d4'), XkY( (4,6,3) ) - XdY( (1,4) ))
+        self._same(evaluate('3d6l2'), XlY( (3,6,2) ))
+        self._same(evaluate('2h6+2h6'), XdY.fromStorage(XhY( (2,6) ).getStorage()) + XhY( (2,6) ))
+        self.assertEqual(evaluate('7').getDistribution(0)[0], 7)
+        self.assertAlmostEqual(evaluate('1d20') < 11, 0.5)
+
+    def test_cache(self):
+        # Repeated expressions are looked up rather than computed.
+        a = evaluate('3d6+2d6')
+        self.assertEqual(results.statistics()['misses'], 1)
+        b = evaluate(' 5d6 ')
+        self.assertEqual(results.statistics()['hits'], 1)
+        self.assertTrue(a.getStorage()[2] is b.getStorage()[2])
+        # A different error is a different distribution.
+        evaluate('5d6', 1e-3)
+        self.assertEqual(results.statistics()['misses'], 2)
@@ -7,6 +7,7 @@ This file tests functionality of PMF.py.
 
 import numpy
 
+from PMF import comparisonMatrix
 from testbase import FinitePMF
 from testbase import InfinitePMF
 from testbase import TestSeriesPMF
@@ -28,3 +29,249 @@ class TestPMF(TestSeriesPMF):
                     ):
             self.assertRaises(TypeError, FinitePMF, dist)
             self.assertRaises(TypeError, InfinitePMF, dist)
+
+    def _pairwise(self, lhs, rhs, test):
+        # Accumulate the probability of test() over every pair of values.
+        cumsum = 0.0
+        for i in range(0,len(lhs)):
+            for j in range(0,len(rhs)):
+                if test(lhs[0,i], rhs[0,j]):
+                    cumsum += lhs[1,i]*rhs[1,j]
+        return cumsum
+
+    def test_comparisons(self):
+        # Compare operators against pairwise accumulation of probability.
+        lhs = self._build_finite_obj(15)
+        # Unsorted, non-integer values that partially overlap lhs.
+        dist = numpy.zeros( (2,12) )
+        dist[0,:] = numpy.random.permutation(numpy.arange(12)) * 1.5
+        dist[1,:] = numpy.random.dirichlet(numpy.ones(12))
+        rhs = FinitePMF(dist)
+
+        error = lhs.getError()
+        self.assertAlmostEqual(lhs < rhs,
+            self._pairwise(lhs, rhs, lambda a,b: a < b))
+        self.assertAlmostEqual(lhs > rhs,
+            self._pairwise(lhs, rhs, lambda a,b: a > b))
+        self.assertAlmostEqual(lhs == rhs,
+            self._pairwise(lhs, rhs, lambda a,b: abs(a-b) <= error))
+        self.assertAlmostEqual(lhs <= rhs,
+            self._pairwise(lhs, rhs, lambda a,b: a <= b))
+        self.assertAlmostEqual(lhs >= rhs,
+            self._pairwise(lhs, rhs, lambda a,b: a >= b))
+        self.assertAlmostEqual(lhs != rhs,
+            self._pairwise(lhs, rhs, lambda a,b: abs(a-b) > error))
+
+    def test_equality_error(self):
+        # Values within error of one another compare as equal.
+        obj = self._build_finite_obj(10)
+        error = obj.getError()
+        self.assertAlmostEqual(obj == 3 + error/2., 0.1)
+        self.assertAlmostEqual(obj == 3 + error*2., 0.0)
+
+    def test_sample(self):
+        # A single sample is one of the values of the distribution.
+        obj = self._build_finite_obj()
+        self.assertTrue(obj.getSample() in obj[0,:])
+
+    def test_sample_batch(self):
+        # Batches are arrays of values drawn with the right frequencies.
+        dist = numpy.array([ [1, 2, 3, 4], [0.5, 0.0, 0.25, 0.25] ])
+        obj = FinitePMF(dist)
+        draws = obj.getSample(20000)
+        self.assertEqual(draws.shape, (20000,))
+        self.assertFalse(numpy.any(draws == 2))
+        self.assertAlmostEqual(numpy.mean(draws == 1), 0.5, delta=0.02)
+        self.assertAlmostEqual(numpy.mean(draws == 4), 0.25, delta=0.02)
+
+    def test_sample_rng(self):
+        # Seeded generators reproduce the same draws.
+        obj = self._build_finite_obj()
+        first = obj.getSample(100, numpy.random.RandomState(42))
+        second = obj.getSample(100, numpy.random.RandomState(42))
+        self.assertTrue(numpy.all(first == second))
+
+    def test_cdf_cache(self):
+        # The cached CDF follows the distribution when it is replaced.
+        obj = self._build_finite_obj(4)
+        self.assertAlmostEqual(obj.getCDF()[0], 0.25)
+        obj.distribution = numpy.array([ [1, 2], [0.5, 0.5] ])
+        self.assertAlmostEqual(obj.getCDF()[0], 0.5)
+        self.assertEqual(len(obj.getCDF()), 2)
+
+    def test_moment_cache(self):
+        # Cached moments and cumulants follow the distribution.
+        obj = self._build_finite_obj(4)
+        self.assertAlmostEqual(obj.EV(), 2.5)
+        self.assertAlmostEqual(obj.getStatistics()[1], 1.25)
+        obj.distribution = numpy.array([ [1, 3], [0.5, 0.5] ])
+        self.assertAlmostEqual(obj.EV(), 2.0)
+        self.assertAlmostEqual(obj.moment(2), 5.0)
+        mean, variance, skewness, kurtosis = obj.getStatistics()
+        self.assertAlmostEqual(variance, 1.0)
+        self.assertAlmostEqual(skewness, 0.0)
+        self.assertAlmostEqual(kurtosis, -2.0)
+
+    def test_alias_table(self):
+        # The alias table reassembles the original probabilities.
+        dist = numpy.zeros( (2,20) )
+        dist[0,:] = numpy.arange(20)
+        dist[1,:] = numpy.random.dirichlet(numpy.ones(20))
+        obj = FinitePMF(dist)
+        threshold, alias = obj.getAliasTable()
+        N = len(threshold)
+        probs = threshold.copy()
+        for i in range(0,N):
+            probs[alias[i]] += 1.0 - threshold[i]
+        for i in range(0,N):
+            self.assertAlmostEqual(probs[i] / N, dist[1,i])
+
+    def test_alias_sample(self):
+        # Alias draws have the right frequencies and never draw zero
+        # probability values.
+        dist = numpy.array([ [1, 2, 3, 4], [0.5, 0.0, 0.25, 0.25] ])
+        obj = FinitePMF(dist)
+        self.assertTrue(obj.getAliasSample() in dist[0,:])
+        draws = obj.getAliasSample(20000, numpy.random.RandomState(7))
+        self.assertFalse(numpy.any(draws == 2))
+        self.assertAlmostEqual(numpy.mean(draws == 1), 0.5, delta=0.02)
+        self.assertAlmostEqual(numpy.mean(draws == 3), 0.25, delta=0.02)
+
+    def test_iter_samples(self):
+        # The stream yields chunks of the requested size.
+        obj = self._build_finite_obj()
+        stream = obj.iterSamples(chunk=50)
+        for i in range(0,3):
+            chunk = next(stream)
+            self.assertEqual(chunk.shape, (50,))
+
+    def test_from_trusted(self):
+        # Trusted construction adopts the array without validation.
+        dist = self._build_finite_obj(6).getDistribution()
+        obj = FinitePMF.fromTrusted(dist, 1e-3)
+        self.assertTrue(isinstance(obj, FinitePMF))
+        self.assertTrue(numpy.all(obj.getDistribution() == dist))
+        self.assertEqual(obj.getError(), 1e-3)
+
+    def test_from_lattice(self):
+        # Lattice construction adopts the probabilities without copies.
+        probs = numpy.ones(4) / 4.
+        obj = FinitePMF.fromLattice(-2, probs)
+        self.assertTrue(obj.getDistribution(1) is probs)
+        self.assertTrue(numpy.all(obj[0,:] == [-2, -1, 0, 1]))
+        self.assertEqual(len(obj), 4)
+
+    def test_lattice_storage(self):
+        # Consecutive integer values are stored as an offset.
+        obj = self._build_finite_obj(10)
+        offset, values, probs = obj.getStorage()
+        self.assertEqual(offset, 1)
+        self.assertTrue(values is None)
+        self.assertEqual(probs.shape, (10,))
+        self.assertTrue(numpy.all(obj.getDistribution(0) == numpy.arange(1,11)))
+
+        # Other values are stored as they are.
+        dist = numpy.array([ [0.5, 2, 3], [0.25, 0.25, 0.5] ])
+        obj = FinitePMF(dist)
+        offset, values, probs = obj.getStorage()
+        self.assertTrue(offset is None)
+        self.assertTrue(numpy.all(values == dist[0,:]))
+        self.assertTrue(numpy.all(obj.getDistribution() == dist))
+
+    def test_get_lattice(self):
+        # Integer values with gaps are filled in with zero probability.
+        dist = numpy.array([ [4, 1, 2], [0.25, 0.25, 0.5] ])
+        offset, probs = FinitePMF(dist).getLattice()
+        self.assertEqual(offset, 1)
+        self.assertTrue(numpy.all(probs == [0.25, 0.5, 0, 0.25]))
+        dist = numpy.array([ [0.5, 2], [0.5, 0.5] ])
+        self.assertRaises(TypeError, FinitePMF(dist).getLattice)
+
+    def test_shift(self):
+        # Adding constants moves the support and keeps the probabilities.
+        obj = self._build_finite_obj(6)
+        for shifted, first in ( (obj + 1000, 1001), (3 + obj, 4),
+                                (obj - 1, 0), (obj + 0.5, 1.5) ):
+            self.assertTrue(isinstance(shifted, FinitePMF))
+            self.assertEqual(len(shifted), 6)
+            self.assertEqual(shifted[0,0], first)
+            self.assertEqual(shifted[0,5], first + 5)
+            self.assertTrue(numpy.all(shifted[1,:] == obj[1,:]))
+        self.assertTrue((obj + 1000).getDistribution(1) is obj.getDistribution(1))
+        self.assertAlmostEqual((obj + 1000).EV(), obj.EV() + 1000)
+        self.assertAlmostEqual((obj + 1000) > 1003, obj > 3)
+
+    def test_scale(self):
+        # Multiplying by constants scales the support.
+        obj = self._build_finite_obj(6)
+        for scaled, k in ( (obj * 10, 10), (3 * obj, 3), (-obj, -1),
+                           (obj * -2, -2), (obj * 0.5, 0.5) ):
+            self.assertTrue(isinstance(scaled, FinitePMF))
+            self.assertEqual(len(scaled), 6)
+            self.assertAlmostEqual(scaled.EV(), k * obj.EV())
+            self.assertAlmostEqual(scaled == 2*k, obj == 2)
+        neg = -obj
+        self.assertEqual(neg.getStorage()[0], -6)
+        self.assertEqual(neg[1,0], obj[1,5])
+        self.assertAlmostEqual((10 - obj).EV(), 10 - obj.EV())
+        zero = obj * 0
+        self.assertEqual(len(zero), 1)
+        self.assertAlmostEqual(zero == 0, 1.0)
+
+    def test_bad_arithmetic(self):
+        # Distributions are not added or multiplied by the base class.
+        obj = self._build_finite_obj(6)
+        self.assertRaises(TypeError, lambda: obj + obj)
+        self.assertRaises(TypeError, lambda: obj * obj)
+
+    def test_cast_operand(self):
+        # PMF operands are used as is, other operands are validated.
+        obj = self._build_finite_obj()
+        other = self._build_infinite_obj()
+        self.assertTrue(obj.castOperand(other, 'test') is other)
+        cast = obj.castOperand(3, 'test')
+        self.assertEqual(cast[0,0], 3)
+        self.assertEqual(cast[1,0], 1.0)
+        self.assertRaises(TypeError, obj.castOperand, numpy.zeros( (2,3) ), 'test')
+
+    def test_comparison_matrix(self):
+        # Every entry matches the operator applied to that pair.
+        pmfs = [self._build_finite_obj(n) for n in (2, 4, 7)]
+        dist = numpy.zeros( (2,5) )
+        dist[0,:] = numpy.arange(5) * 1.5 + 0.5
+        dist[1,:] = numpy.random.dirichlet(numpy.ones(5))
+        pmfs.append(FinitePMF(dist))
+        pmfs.append(pmfs[1] + 3)
+        for op, test in ( ('<', lambda a,b: a < b), ('<=', lambda a,b: a <= b),
+                          ('>', lambda a,b: a > b), ('>=', lambda a,b: a >= b),
+                          ('==', lambda a,b: a == b), ('!=', lambda a,b: a != b) ):
+            # A small tile exercises the blocks.
+            matrix = comparisonMatrix(pmfs, op, tile=2)
+            self.assertEqual(matrix.shape, (5, 5))
+            for i in range(0,5):
+                for j in range(0,5):
+                    self.assertAlmostEqual(matrix[i,j], test(pmfs[i], pmfs[j]))
+        self.assertRaises(ValueError, comparisonMatrix, pmfs, '<>')
+
+    def test_prune_tails(self):
+        # Each tail keeps what holds more than a quarter of the budget.
+        probs = numpy.array([1e-4, 1e-3, 0.3, 0.3, 0.3988, 1e-4, 1e-4])
+        obj = FinitePMF.fromLattice(1, probs.copy(), 1e-2)
+        self.assertTrue(obj.pruneTails() is obj)
+        self.assertEqual(len(obj), 7)
+        obj.prunefraction = 0.1
+        obj.pruneoperands = 2
+        obj.pruneTails(2e-4)
+        self.assertEqual(obj.getStorage()[0], 2)
+        self.assertEqual(len(obj), 4)
+        self.assertAlmostEqual(obj.getDropped(), 2e-4 + 3e-4)
+
+        # Values are trimmed alike, and nothing once the bound is spent.
+        obj = FinitePMF.fromSupport(numpy.arange(7) * 0.5, probs.copy(), 1e-2)
+        obj.prunefraction = 0.1
+        obj.pruneoperands = 2
+        obj.pruneTails()
+        self.assertTrue(numpy.all(obj[0,:] == [0.5, 1, 1.5, 2]))
+        obj.pruneTails(1e-3)
+        self.assertEqual(len(obj), 4)
+        self.assertEqual(obj.getDropped(), 1e-3)
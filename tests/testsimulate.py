@@ -0,0 +1,82 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functions in simulate.py.
+'''
+
+import numpy
+import unittest
+
+from simulate import simulate, Simulated, Reroll, Explode, KeepHighest, Successes
+from XdY import XdY
+from XeY import XeY
+from XhY import XhY
+
+class TestSimulate(unittest.TestCase):
+
+    def _assertWithin(self, pmf, values, probs):
+        # Every exact probability lies within twice its interval.
+        lower, upper = pmf.getConfidence()
+        for value, prob in zip(values, probs):
+            i = list(pmf.getDistribution(0)).index(value)
+            width = upper[i] - lower[i]
+            self.assertTrue(lower[i] - width < prob < upper[i] + width)
+
+    def test_total(self):
+        pmf = simulate(3, 6, precision=0.005, chunk=30000, seed=1)
+        self.assertTrue(isinstance(pmf, Simulated))
+        exact = XdY( (3,6) )
+        self._assertWithin(pmf, exact.getDistribution(0), exact.getDistribution(1))
+        self.assertEqual(pmf.getDistribution(0)[0], 3)
+        self.assertAlmostEqual(sum(pmf.getDistribution(1)), 1.0)
+        # Intervals are within the precision asked for.
+        lower, upper = pmf.getConfidence()
+        probs = pmf.getDistribution(1)
+        self.assertTrue(numpy.all(upper - probs <= 0.005))
+        self.assertTrue(numpy.all(probs - lower <= 0.005))
+        # Still a distribution like any other.
+        self.assertAlmostEqual((pmf + XdY( (1,6) )).EV(), 14.0, 1)
+
+    def test_seed(self):
+        # A seed reproduces the same rolls, and stopping stops early.
+        a = simulate(2, 6, precision=0.01, chunk=10000, seed=5)
+        b = simulate(2, 6, precision=0.01, chunk=10000, seed=5)
+        self.assertEqual(a.trials, b.trials)
+        self.assertTrue(numpy.all(a.getDistribution(1) == b.getDistribution(1)))
+        self.assertTrue(a.trials < 10**6)
+        c = simulate(2, 6, precision=0.0, chunk=10000, maxtrials=20000, seed=5)
+        self.assertEqual(c.trials, 20000)
+        # Several processes draw independent streams.
+        d = simulate(2, 6, precision=0.01, chunk=10000, workers=2, seed=5)
+        self._assertWithin(d, range(2,13), XdY( (2,6) ).getDistribution(1))
+
+    def test_rules(self):
+        # Rerolling 1s once on a d6.
+        pmf = simulate(1, 6, [Reroll([1])], precision=0.005, chunk=50000, seed=2)
+        self._assertWithin(pmf, range(1,7), [1/36.] + [7/36.] * 5)
+        # Exploding on the top face is XeY.
+        pmf = simulate(1, 6, [Explode()], precision=0.005, chunk=50000, seed=3)
+        exact = XeY( (1,6) )
+        self._assertWithin(pmf, range(1,13), exact.getDistribution(1)[:12])
+        # Keeping the highest die is XhY.
+        pmf = simulate(3, 6, reducer=KeepHighest(1), precision=0.005, chunk=50000, seed=4)
+        self._assertWithin(pmf, range(1,7), XhY( (3,6) ).getDistribution(1))
+        # Successes at 8 and up, less botches on 1s.
+        pmf = simulate(1, 10, reducer=Successes(8, [1]), precision=0.005, chunk=50000, seed=6)
+        self._assertWithin(pmf, [-1, 0, 1], [0.1, 0.6, 0.3])
+
+    def test_noncontiguous(self):
+        # Stages return their changes even for rolls that are not
+        # contiguous, when reshape() copies them.
+        rng = numpy.random.RandomState(7)
+        rolls = numpy.ones( (4, 6), dtype=int )[:,::2]
+        rerolled = Reroll([1], once=False)(rolls, 6, rng)
+        self.assertEqual(rerolled.shape, (4, 3))
+        self.assertTrue(numpy.all(rerolled > 1))
+        rolls = numpy.ones( (4, 6), dtype=int )[:,::2] * 6
+        exploded = Explode()(rolls, 6, rng)
+        self.assertTrue(numpy.all(exploded > 6))
+
+    def test_maxtrials(self):
+        self.assertRaises(ValueError, simulate, 2, 6, maxtrials=0)
@@ -8,6 +8,8 @@ This contains test functions for XdY
 import numpy
 import unittest
 
+import extramath
+from PMF import computeCumulants, familyMoment
 from XdY import XdY
 
 class testxdy(unittest.TestCase):
@@ -33,6 +35,14 @@ class testxdy(unittest.TestCase):
         # It is assumed that error is a certain value.
         self._equals(self._get_error(), XdY( (1,2) ).getError())
 
+    def testaliasinvalidation(self):
+        # Changing the error rebuilds the distribution and its alias table.
+        a2d6 = self._build_xdy(2,6)
+        table = a2d6.getAliasTable()
+        self.assertTrue(table is a2d6.getAliasTable())
+        a2d6.setError(self._get_error() / 10.)
+        self.assertFalse(table is a2d6.getAliasTable())
+
     def testaddition(self):
         # Build 2d6 in two ways and ensure the results are correct.
         # 2d6 directly
@@ -53,6 +63,156 @@ class testxdy(unittest.TestCase):
                 # check 2d6 is correct
                 self._equals(a2d6[i,j], dist[i,j])
 
+    def testpool(self):
+        # Pools built by doubling match pools built one die at a time.
+        b1d6 = self._build_xdy(1,6)
+        for x in (1, 2, 5, 8, 13):
+            pool = self._build_xdy(x,6)
+            chain = b1d6
+            for i in range(1,x):
+                chain = chain + b1d6
+            self.assertEqual(len(pool), len(chain))
+            for i in range(0,2):
+                for j in range(0,len(pool)):
+                    self._equals(pool[i,j], chain[i,j])
+
+    def testfftaddition(self):
+        # Forcing either convolution backend gives the same pool.
+        a20d10 = self._build_xdy(20,10)
+        b30d6 = self._build_xdy(30,6)
+        try:
+            XdY.convolution = 'direct'
+            direct = a20d10 + b30d6
+            XdY.convolution = 'fft'
+            fft = a20d10 + b30d6
+        finally:
+            XdY.convolution = None
+        self.assertEqual(len(direct), len(fft))
+        for i in range(0,2):
+            for j in range(0,len(direct)):
+                self._equals(direct[i,j], fft[i,j])
+
+    def testsparseaddition(self):
+        # Gappy supports are summed without filling the gaps.
+        dist = numpy.array( ((100, 200, 300), (0.25, 0.5, 0.25)) )
+        hundreds = XdY(dist)
+        a1d6 = self._build_xdy(1,6)
+        total = hundreds + hundreds + a1d6
+        self.assertTrue(total.getStorage()[1] is not None)
+        self.assertEqual(len(total), 5*6)
+        self._equals(total.EV(), 403.5)
+        for i in range(0,len(total)):
+            self._equals(total[1,i], ( (1,4,6,4,1)[i//6] / 16.) / 6.)
+
+        # Dense and sparse sums agree.
+        try:
+            sparsefill = extramath.sparsefill
+            extramath.sparsefill = 0
+            dense = hundreds + a1d6
+        finally:
+            extramath.sparsefill = sparsefill
+        self.assertTrue(dense.getStorage()[1] is None)
+        sparse = hundreds + a1d6
+        self.assertEqual(len(dense), 206)
+        for value in sparse[0,:]:
+            self._equals(dense == value, sparse == value)
+
+        # Values need not be integers.
+        halves = XdY(numpy.array( ((0.5, 1.5), (0.5, 0.5)) ))
+        total = halves + a1d6
+        self.assertEqual(len(total), 7)
+        self._equals(total.EV(), 4.5)
+
+    def testconstantaddition(self):
+        # Constants shift the support without a convolution.
+        a2d6 = self._build_xdy(2,6)
+        shifted = a2d6 + 1000
+        self.assertTrue(isinstance(shifted, XdY))
+        self.assertEqual(len(shifted), len(a2d6))
+        self.assertEqual(shifted[0,0], 1002)
+        self.assertTrue(shifted.getDistribution(1) is a2d6.getDistribution(1))
+        self._equals((1000 + a2d6).EV(), 1007)
+        self._equals((a2d6 - a2d6).EV(), 0)
+        self._equals((a2d6 * 2 + self._build_xdy(1,6)).EV(), 17.5)
+
+    def testsinglepoint(self):
+        # Single point distributions are not mistaken for [X, Y].
+        point = XdY(numpy.array([[4.5],[1.0]]))
+        self.assertEqual(point.getDistribution().shape, (2,1))
+        self._equals(point.EV(), 4.5)
+        zero = self._build_xdy(1,6) * 0
+        zero.setError(1e-6)
+        self._equals(zero.EV(), 0)
+        shifted = self._build_xdy(1,6) * 0 + 2.5
+        shifted.setError(1e-6)
+        self._equals(shifted.EV(), 2.5)
+        negative = -XdY(5)
+        negative.setError(1e-6)
+        self._equals(negative.EV(), -5)
+        self.assertRaises(ValueError, XdY, (0,6))
+
+    def testfamily(self):
+        # Every row of the family matches the pool built on its own.
+        table = XdY.family(6, 12)
+        self.assertEqual(table.shape, (13, 72))
+        self.assertTrue(numpy.all(table[0,:] == numpy.arange(1,73)))
+        evs = familyMoment(table)
+        for x in range(1,13):
+            pool = self._build_xdy(x,6)
+            member = XdY.fromFamily(table, x)
+            self.assertEqual(len(member), len(pool))
+            self.assertTrue(numpy.allclose(member.getDistribution(),
+                                           pool.getDistribution()))
+            self._equals(evs[x-1], 3.5*x)
+        self._equals(XdY.fromFamily(table, 2) > XdY.fromFamily(table, 1),
+                     self._build_xdy(2,6) > self._build_xdy(1,6))
+
+    def testcumulants(self):
+        # Analytic cumulants match the distribution and carry through sums.
+        a3d6 = self._build_xdy(3,6)
+        a2d10 = self._build_xdy(2,10)
+        expected = computeCumulants(a3d6[0,:], a3d6[1,:])
+        self.assertTrue(numpy.allclose(a3d6.getCumulants(), expected))
+        total = (a3d6 + a2d10) * 2 - 1
+        self.assertTrue(total.knownCumulants() is not None)
+        expected = computeCumulants(total[0,:], total[1,:])
+        self.assertTrue(numpy.allclose(total.getCumulants(), expected))
+
+        # Huge pools are described without being built.
+        mean, variance, skewness, kurtosis = XdY.poolStatistics(100000, 20)
+        self._equals(mean, 1050000)
+        self._equals(variance, 100000 * 399 / 12.)
+        self._equals(skewness, 0)
+        self._equals(kurtosis, -6 * 401 / (5 * 399. * 100000))
+
+    def testapproximation(self):
+        # Huge pools are approximated within their bound, small ones not.
+        self.assertEqual(self._build_xdy(100,6).getApproximationError(), 0.0)
+        pool = self._build_xdy(5000,6)
+        self.assertTrue(0 < pool.getApproximationError() <= self._get_error() / 10.)
+        self._equals(numpy.sum(pool[1,:]), 1.0)
+        self._equals(pool.EV(), 17500)
+        self._equals(pool > 17500, 0.5 - (pool == 17500) / 2.)
+        deviation = XdY.measureApproximation(300,6)
+        self.assertTrue(deviation <= XdY.approximationBound(300,6))
+
+        # Approximation may be forced or turned off.
+        XdY.approximation = 'approximate'
+        try:
+            self.assertTrue(self._build_xdy(50,6).getApproximationError() > 0)
+        finally:
+            XdY.approximation = 'auto'
+        XdY.approximation = 'exact'
+        try:
+            self.assertEqual(len(self._build_xdy(1500,4)), 4501)
+        finally:
+            XdY.approximation = 'auto'
+
+    def testbadaddition(self):
+        # Operands that are not distributions are rejected.
+        a1d6 = self._build_xdy(1,6)
+        self.assertRaises(TypeError, a1d6.__add__, numpy.zeros( (2,6) ))
+
     def testexpectedvalue(self):
         # Build some XdY cases with known expected value and test the result.
         self._equals(self._build_xdy(1,6).EV(), 3.5)
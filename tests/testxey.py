@@ -0,0 +1,155 @@
+'''
+Bryan Bonvallet
+2014
+
+This contains test functions for XeY
+'''
+
+import numpy
+import unittest
+
+from cache import pools
+from PMF import computeCumulants
+from XeY import XeY
+
+class testxey(unittest.TestCase):
+    # Runs through some test cases to check expected behavior.
+
+    def _get_error(self):
+        return XeY.error
+
+    def _equals(self, lhs, rhs):
+        return self.assertAlmostEqual(lhs, rhs, delta=self._get_error())
+
+    def _build_xey(self, x, y):
+        return XeY( (x,y) )
+
+    def _exploding_ev(self, y):
+        # Expected value of one exploding die: E = (Y+1)/2 + E/Y.
+        return (y+1)/2. * y / (y-1.)
+
+    def testsingledie(self):
+        # One die stops on each face after k explosions with (1/Y)**(k+1).
+        a1e6 = self._build_xey(1,6)
+        for j in range(0,len(a1e6)):
+            value = a1e6[0,j]
+            if value % 6 == 0:
+                self.assertEqual(a1e6[1,j], 0.0)
+            else:
+                self._equals(a1e6[1,j], (1/6.)**(value//6 + 1))
+
+    def testtruncation(self):
+        # Truncation leaves out at most a tenth of error.
+        for x,y in ( (1,2), (1,6), (3,6), (10,10), (100,10), ):
+            pmf = self._build_xey(x,y)
+            missing = 1.0 - numpy.sum(pmf[1,:])
+            self.assertTrue(0 <= missing <= self._get_error() / 10.)
+
+    def testtighterror(self):
+        # Tight errors only need a handful of explosion rounds.
+        pmf = XeY( (1,100), 1e-12 )
+        self.assertEqual(len(pmf), 100*7)
+        self.assertTrue(1.0 - numpy.sum(pmf[1,:]) <= 1e-13)
+
+    def testreproducible(self):
+        # Pools of fewer dice hold a coarser die, so they are not reused
+        # and the pool is the same whatever was cached before.
+        pools.clear()
+        fresh = self._build_xey(20,6)
+        pools.clear()
+        self._build_xey(2,6)
+        reused = self._build_xey(20,6)
+        self.assertEqual(len(reused), len(fresh))
+        self.assertTrue(numpy.array_equal(reused.getDistribution(), fresh.getDistribution()))
+
+    def testexpectedvalue(self):
+        # Pools of exploding dice add up expected values.  The truncated
+        # tail holds large values, so the difference exceeds error.
+        for x,y in ( (1,6), (3,6), (5,10), ):
+            ev = self._build_xey(x,y).EV()
+            self.assertAlmostEqual(ev, x*self._exploding_ev(y), delta=1e-3)
+
+    def testpruning(self):
+        # Chained additions trim their tails within the bound.
+        pools = [XeY( (10,6) ) for i in range(0,4)] + [XeY( (50,10) )]
+        exact = pools[0]
+        for pool in pools[1:]:
+            exact = exact + pool
+        self.assertEqual(exact.getDropped(), 0.0)
+
+        XeY.prunefraction = 0.1
+        try:
+            pruned = pools[0]
+            for pool in pools[1:]:
+                pruned = pruned + pool
+                self.assertTrue(pruned.getDropped() <= pruned.getPruneBound())
+        finally:
+            del XeY.prunefraction
+        self.assertTrue(0 < pruned.getDropped() <= self._get_error() / 10.)
+        self.assertTrue(len(pruned) < len(exact))
+        self.assertAlmostEqual(numpy.sum(exact[1,:]) - numpy.sum(pruned[1,:]),
+                               pruned.getDropped())
+        self._equals(pruned > 400, exact > 400)
+        self.assertEqual((pruned + 3).getDropped(), pruned.getDropped())
+
+    def testpruningtree(self):
+        # Balanced sums such as (a+b)+(c+d) stay within the bound too.
+        XeY.prunefraction = 0.5
+        try:
+            level = [XeY( (3,6) ) for i in range(0,32)]
+            while len(level) > 1:
+                level = [level[i] + level[i+1] for i in range(0,len(level),2)]
+                for pmf in level:
+                    self.assertTrue(pmf.getDropped() <= pmf.getPruneBound())
+            pruned = level[0]
+        finally:
+            del XeY.prunefraction
+        self.assertEqual(pruned.operands, 32)
+        self.assertTrue(0 < pruned.getDropped() <= 0.5 * self._get_error())
+        level = [XeY( (3,6) ) for i in range(0,32)]
+        while len(level) > 1:
+            level = [level[i] + level[i+1] for i in range(0,len(level),2)]
+        self.assertTrue(len(pruned) < len(level[0]))
+        self._equals(pruned > 350, level[0] > 350)
+
+    def testcumulants(self):
+        # Analytic cumulants match a nearly untruncated distribution.
+        for y in (2, 6, 10):
+            pmf = XeY( (3,y), 1e-12 )
+            expected = computeCumulants(pmf[0,:], pmf[1,:])
+            self.assertTrue(numpy.allclose(XeY.poolCumulants(3,y), expected))
+        self.assertAlmostEqual(XeY.poolStatistics(1,6)[0], self._exploding_ev(6))
+        # Truncated pools describe their own distribution.
+        pmf = XeY( (1,2), 1e-2 )
+        mean, variance = pmf.getStatistics()[:2]
+        self.assertAlmostEqual(mean, pmf.EV())
+        self.assertAlmostEqual(variance, numpy.dot((pmf[0,:] - mean)**2, pmf[1,:]))
+        self.assertAlmostEqual(XeY.poolStatistics(1,2)[0], 3.0)
+        self.assertTrue(abs(mean - 3.0) > 1e-3)
+        total = pmf + pmf
+        self.assertAlmostEqual(total.getStatistics()[0], total.EV())
+
+    def testapproximation(self):
+        # Large exploding pools are approximated once the bound allows.
+        pool = self._build_xey(4000,6)
+        self.assertTrue(0 < pool.getApproximationError() <= self._get_error() / 10.)
+        self._equals(numpy.sum(pool[1,:]), 1.0)
+        self.assertAlmostEqual(pool.EV(), 4000*self._exploding_ev(6), delta=1e-3)
+        # Two faced dice only show odd numbers, so their totals skip every
+        # other value and the bound stays loose.
+        self.assertTrue(XeY.approximationBound(4000,2) > self._get_error())
+
+    def testfamily(self):
+        # Family rows hold the pools within error on a common support.
+        table = XeY.family(6, 10)
+        for x in (1, 2, 5, 10):
+            pool = self._build_xey(x,6)
+            member = XeY.fromFamily(table, x)
+            self.assertTrue(isinstance(member, XeY))
+            for value in (x, 3*x, 4*x+7):
+                self._equals(member == value, pool == value)
+            self.assertAlmostEqual(member.EV(), x*self._exploding_ev(6), delta=1e-3)
+
+    def testbadfaces(self):
+        # A die with one face would explode forever.
+        self.assertRaises(ValueError, self._build_xey, 1, 1)
@@ -0,0 +1,143 @@
+'''
+Bryan Bonvallet
+2014
+
+This contains test functions for XhY
+'''
+
+import numpy
+import unittest
+
+from extramath import combination
+from PMF import computeCumulants, familyMoment
+from XhY import XhY
+
+class testxhy(unittest.TestCase):
+    # Runs through some test cases to check expected behavior.
+
+    def _get_error(self):
+        return XhY.error
+
+    def _equals(self, lhs, rhs):
+        return self.assertAlmostEqual(lhs, rhs, delta=self._get_error())
+
+    def _build_xhy(self, x, y):
+        return XhY( (x,y) )
+
+    def _binomial_prob(self, x, y, z):
+        # Probability that the highest of x dice with y faces is z, found
+        # by summing over the number of dice i that show z.
+        acc = 0
+        for i in range(1,x+1):
+            acc += combination(x,i) * (1.0/y)**i * ((z-1.0)/y)**(x-i)
+        return acc
+
+    def testdistribution(self):
+        # The closed form matches the binomial summation.
+        for x,y in ( (1,6), (2,6), (3,6), (4,20), (10,8), ):
+            pmf = self._build_xhy(x,y)
+            self.assertEqual(len(pmf), y)
+            for z in range(1,y+1):
+                self._equals(pmf[0,z-1], z)
+                self._equals(pmf[1,z-1], self._binomial_prob(x,y,z))
+
+    def testknown(self):
+        # Highest of 2d6 is 6 with probability 11/36, 1 with 1/36.
+        pmf = self._build_xhy(2,6)
+        self._equals(pmf[1,5], 11/36.)
+        self._equals(pmf[1,0], 1/36.)
+
+    def testlargepool(self):
+        # Large pools stay valid and almost surely show the highest face.
+        pmf = self._build_xhy(5000,100)
+        self.assertTrue(numpy.all(pmf[1,:] >= 0))
+        self._equals(numpy.sum(pmf[1,:]), 1.0)
+        self._equals(pmf[1,-1], 1.0 - 0.99**5000)
+
+    def testfamily(self):
+        # Every row of the family matches the pool built on its own.
+        table = XhY.family(20, 100)
+        self.assertEqual(table.shape, (101, 20))
+        evs = familyMoment(table)
+        for x in (1, 2, 7, 100):
+            pool = self._build_xhy(x,20)
+            self.assertTrue(numpy.allclose(table[x,:], pool[1,:]))
+            self._equals(evs[x-1], pool.EV())
+        member = XhY.fromFamily(table, 3)
+        self._equals(member > 10, self._build_xhy(3,20) > 10)
+
+    def _pairwise(self, lhs, rhs, pick):
+        # Accumulate pick() over every pair of values into a dictionary.
+        out = {}
+        for i in range(0,len(lhs)):
+            for j in range(0,len(rhs)):
+                value = pick(lhs[0,i], rhs[0,j])
+                out[value] = out.get(value, 0.0) + lhs[1,i]*rhs[1,j]
+        return out
+
+    def _check_pairwise(self, result, expected):
+        # Every value of result has the pairwise probability.
+        for i in range(0,len(result)):
+            self._equals(result[1,i], expected.get(result[0,i], 0.0))
+        self._equals(numpy.sum(result[1,:]), 1.0)
+
+    def testcumulants(self):
+        # Cumulants come from the closed form and carry through shifts.
+        pool = self._build_xhy(4,12)
+        expected = computeCumulants(pool[0,:], pool[1,:])
+        self.assertTrue(numpy.allclose(XhY.poolCumulants(4,12), expected))
+        shifted = pool + 3
+        self.assertTrue(shifted.knownCumulants() is not None)
+        self._equals(shifted.getStatistics()[0], pool.EV() + 3)
+        self._equals(shifted.getStatistics()[1], pool.getStatistics()[1])
+
+    def testhighest(self):
+        # Take highest of pools is the pool of all the dice.
+        a2h6 = self._build_xhy(2,6)
+        a3h6 = self._build_xhy(3,6)
+        a5h6 = self._build_xhy(5,6)
+        result = a2h6 | a3h6
+        for i in range(0,2):
+            for j in range(0,len(a5h6)):
+                self._equals(result[i,j], a5h6[i,j])
+
+    def testgappedsupport(self):
+        # Supports may be non-integer and non-contiguous.
+        lhs = XhY(numpy.array([ [0.5, 3, 10], [0.2, 0.5, 0.3] ]))
+        rhs = XhY(numpy.array([ [1, 3, 7.25, 20], [0.1, 0.4, 0.3, 0.2] ]))
+        self._check_pairwise(lhs | rhs, self._pairwise(lhs, rhs, max))
+        self._check_pairwise(lhs & rhs, self._pairwise(lhs, rhs, min))
+        self._check_pairwise(rhs & 5, self._pairwise(rhs, XhY(5), min))
+
+    def testsinglepoint(self):
+        # Single point distributions are not mistaken for [X, Y].
+        point = XhY(numpy.array([[4.5],[1.0]]))
+        self.assertEqual(point.getDistribution().shape, (2,1))
+        self._equals(point.EV(), 4.5)
+        highest = point | XhY(numpy.array([[2],[1.0]]))
+        highest.setError(1e-6)
+        self._equals(highest.EV(), 4.5)
+        self.assertRaises(ValueError, XhY, (3,0))
+
+    def testpruningtree(self):
+        # Nested highests and lowests trim their tails within the bound.
+        XhY.prunefraction = 0.5
+        try:
+            for op in (XhY.__or__, XhY.__and__):
+                level = [self._build_xhy(1,20000) for i in range(0,32)]
+                while len(level) > 1:
+                    level = [op(level[i], level[i+1]) for i in range(0,len(level),2)]
+                    for pmf in level:
+                        self.assertTrue(pmf.getDropped() <= pmf.getPruneBound())
+                self.assertTrue(0 < level[0].getDropped() <= 0.5 * self._get_error())
+                self.assertTrue(len(level[0]) < 20000)
+        finally:
+            del XhY.prunefraction
+
+    def testlowest(self):
+        # Lowest of 2d6 is 1 with probability 11/36, 6 with 1/36.
+        a1h6 = self._build_xhy(1,6)
+        result = a1h6 & a1h6
+        self._equals(result[1,0], 11/36.)
+        self._equals(result[1,5], 1/36.)
+        self._check_pairwise(result, self._pairwise(a1h6, a1h6, min))
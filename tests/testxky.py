@@ -0,0 +1,80 @@
+'''
+Bryan Bonvallet
+2014
+
+This file tests the functionality of XkY.py.
+'''
+
+import itertools
+import numpy
+import unittest
+
+from XdY import XdY
+from XhY import XhY
+from XkY import XkY, XlY
+
+class testxky(unittest.TestCase):
+
+    def _enumerate(self, X, Y, K, lowest=False):
+        # Brute force over every roll.
+        probs = {}
+        for roll in itertools.product(range(1,Y+1), repeat=X):
+            roll = sorted(roll)
+            total = sum(roll[:K] if lowest else roll[-K:])
+            probs[total] = probs.get(total, 0.0) + 1.0 / Y**X
+        return probs
+
+    def _check(self, pmf, expected):
+        values, probs = pmf.getDistribution(0), pmf.getDistribution(1)
+        for value, prob in zip(values, probs):
+            self.assertAlmostEqual(prob, expected.get(value, 0.0))
+        self.assertAlmostEqual(numpy.sum(probs), 1.0)
+
+    def testenumeration(self):
+        for X, Y, K in [(4,6,3), (5,4,2), (3,10,1), (6,3,4), (1,6,1)]:
+            self._check(XkY( (X,Y,K) ), self._enumerate(X, Y, K))
+            self._check(XlY( (X,Y,K) ), self._enumerate(X, Y, K, True))
+
+    def testspecialcases(self):
+        # Keeping every die is XdY, keeping one is XhY.
+        self.assertTrue(numpy.allclose(XkY( (20,6,20) ).getDistribution(),
+                                       XdY( (20,6) ).getDistribution()))
+        self.assertTrue(numpy.allclose(XkY( (30,12,1) ).getDistribution(),
+                                       XhY( (30,12) ).getDistribution()))
+        lowest = XhY( (1,8) )
+        for i in range(0,9):
+            lowest = lowest & XhY( (1,8) )
+        self.assertTrue(numpy.allclose(XlY( (10,8,1) ).getDistribution(),
+                                       lowest.getDistribution()))
+        # 4d6 drop lowest.
+        self.assertAlmostEqual(XkY( (4,6,3) ).EV(), 15869/1296.)
+
+    def testlarge(self):
+        pmf = XkY( (50,20,10) )
+        self.assertAlmostEqual(numpy.sum(pmf.getDistribution(1)), 1.0)
+        self.assertTrue(pmf.EV() > 18*10)
+        self.assertTrue(numpy.allclose(pmf.getStatistics(),
+                                       XkY.poolStatistics(50, 20, 10)))
+
+    def testarithmetic(self):
+        stat = XkY( (4,6,3) )
+        total = stat + XdY( (1,6) )
+        self.assertAlmostEqual(total.EV(), stat.EV() + 3.5)
+        self.assertAlmostEqual((XdY( (1,6) ) + stat).EV(), stat.EV() + 3.5)
+        self.assertAlmostEqual((stat + stat).EV(), 2*stat.EV())
+        self.assertAlmostEqual((stat + 2).EV(), stat.EV() + 2)
+        # Comparisons, against 3d6 and against the complement.
+        ref = XdY( (3,6) )
+        self.assertTrue(0.5 < (stat > ref) < 1.0)
+        self.assertAlmostEqual((stat > ref) + (stat == ref) + (stat < ref), 1.0)
+
+    def testinvalid(self):
+        self.assertRaises(ValueError, XkY, (3,6,4))
+        self.assertRaises(ValueError, XkY, (3,6,0))
+
+    def testfamily(self):
+        table = XkY.family(6, 8, 3)
+        for X in range(1,9):
+            pmf = XkY.fromFamily(table, X)
+            expected = XkY( (X,6,min(X,3)) )
+            self.assertTrue(numpy.allclose(pmf.getDistribution(), expected.getDistribution()))